@@ -0,0 +1,9 @@
+from .budget import Budget, BudgetLimits, BudgetExceeded, Clock, charge
+
+__all__ = [
+    "Budget",
+    "BudgetLimits",
+    "BudgetExceeded",
+    "Clock",
+    "charge",
+]
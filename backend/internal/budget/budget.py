@@ -0,0 +1,145 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator
+
+# Node visits between two reads of the clock
+CLOCK_CHECK_INTERVAL = 1024
+
+
+class BudgetExceeded(Exception):
+    """
+    Raised from inside the evaluation once a limit of the active `Budget`
+    is exceeded. `timed_out` tells the deadline apart from the work limits.
+    """
+
+    def __init__(self, limit: str, timed_out: bool = False) -> None:
+        super().__init__(limit)
+        self.limit = limit
+        self.timed_out = timed_out
+
+
+@dataclass(frozen=True)
+class BudgetLimits:
+    """
+    Args:
+        max_visits (int): Nodes visited by simplification, polynomial
+            expansion and formula matching in one statement.
+        max_tree_size (int): Nodes of a subject after any statement.
+        deadline (float): Wall-clock limit of one request, in seconds, shared
+            by the statements it evaluates, see `Clock`. On a worker pool it
+            is derived from the worker timeout, see `ExecutorConfig.deadline`,
+            so the user gets an error step instead of a killed worker.
+    """
+
+    max_visits: int = 1_000_000
+    max_tree_size: int = 100_000
+    deadline: float = 2.0
+
+    @staticmethod
+    def from_env(deadline: float | None = None) -> "BudgetLimits":
+        """
+        `deadline` replaces the default deadline, `EVAL_DEADLINE` still wins.
+        """
+        default = BudgetLimits()
+        if deadline is None:
+            deadline = default.deadline
+        return BudgetLimits(
+            max_visits=int(os.environ.get("EVAL_MAX_VISITS", default.max_visits)),
+            max_tree_size=int(os.environ.get("EVAL_MAX_TREE_SIZE", default.max_tree_size)),
+            deadline=float(os.environ.get("EVAL_DEADLINE", deadline)),
+        )
+
+
+class Clock:
+    """
+    Wall-clock time used by one request, shared by the budgets of its
+    statements. It only runs while one of them is active, so lines taken
+    from a cache and a stream waiting on its consumer between two lines
+    aren't charged.
+    """
+
+    def __init__(self, limit: float) -> None:
+        self.limit = limit
+        self._elapsed = 0.0
+        self._started: float | None = None
+
+    @property
+    def elapsed(self) -> float:
+        if self._started is None:
+            return self._elapsed
+        return self._elapsed + time.monotonic() - self._started
+
+    @contextmanager
+    def running(self) -> Iterator[None]:
+        outermost = self._started is None
+        if outermost:
+            self._started = time.monotonic()
+        try:
+            yield
+        finally:
+            if outermost:
+                self._elapsed = self.elapsed
+                self._started = None
+
+
+class Budget:
+    """
+    Work left to one statement. Long running loops report their work with
+    `charge`, which raises `BudgetExceeded` once a limit is hit, so the
+    evaluation stops cooperatively at the next check. The deadline is
+    checked against `clock`, which budgets of the same request share.
+
+    The budget is found through `active`, so the simplifier and the formula
+    matcher don't have to pass it around.
+    """
+
+    def __init__(self, limits: BudgetLimits, clock: Clock | None = None) -> None:
+        self._limits = limits
+        self._clock = clock if clock is not None else Clock(limits.deadline)
+        self._next_clock_check = CLOCK_CHECK_INTERVAL
+        self.visits = 0
+        self.timed_out = False
+
+    @property
+    def limits(self) -> BudgetLimits:
+        return self._limits
+
+    def charge(self, visits: int = 1) -> None:
+        self.visits += visits
+        if self.visits > self._limits.max_visits:
+            raise BudgetExceeded(f"more than {self._limits.max_visits} node visits")
+        if self.visits >= self._next_clock_check:
+            self._next_clock_check = self.visits + CLOCK_CHECK_INTERVAL
+            self.check_deadline()
+
+    def check_deadline(self) -> None:
+        if self._clock.elapsed > self._clock.limit:
+            self.timed_out = True
+            raise BudgetExceeded(f"more than {self._clock.limit:g}s", timed_out=True)
+
+    def check_size(self, size: int) -> None:
+        if size > self._limits.max_tree_size:
+            raise BudgetExceeded(f"more than {self._limits.max_tree_size} nodes")
+
+    @contextmanager
+    def active(self) -> Iterator["Budget"]:
+        token = _ACTIVE.set(self)
+        try:
+            with self._clock.running():
+                yield self
+        finally:
+            _ACTIVE.reset(token)
+
+
+_ACTIVE: ContextVar[Budget | None] = ContextVar("active_budget", default=None)
+
+
+def charge(visits: int = 1) -> None:
+    """
+    Charges the active budget, does nothing outside of an evaluation.
+    """
+    if (budget := _ACTIVE.get()) is not None:
+        budget.charge(visits)
@@ -1,5 +1,7 @@
 from .evaluator import Evaluator
+from .incremental import IncrementalEvaluator
 
 __all__ = [
     "Evaluator",
+    "IncrementalEvaluator",
 ]
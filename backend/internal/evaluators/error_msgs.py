@@ -26,3 +26,11 @@ class EvaluatorErrorUserMsg:
     @staticmethod
     def no_formula(name: str) -> str:
         return f"No formula `{name}`"
+
+    @staticmethod
+    def too_complex() -> str:
+        return "Expression is too complex to evaluate"
+
+    @staticmethod
+    def too_slow() -> str:
+        return "Evaluation took too long and was stopped"
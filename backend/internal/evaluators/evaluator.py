@@ -1,5 +1,6 @@
-import copy
+from typing import Callable, Iterable, Iterator
 
+from backend.internal.budget import Budget, BudgetLimits, BudgetExceeded, Clock
 from backend.internal.evaluators.error_msgs import EvaluatorErrorUserMsg
 from backend.internal.evaluators.validator import Validator
 from backend.internal.math_builtins import BuiltIns
@@ -25,81 +26,166 @@ from backend.internal.expressions import Expression, Infix, Prefix, Number, Iden
 from backend.internal.tokens import TokenType
 
 from backend.internal.expression_tree import Node, convert_to_expression_tree
+from backend.internal.expression_tree.node import node_size
+
+EvalResult = tuple[SubjectObject | None, list[SubjectObject]]
 
 
 class Evaluator:
-    def eval(self, program: Program) -> list[SubjectObject]:
-        match program.get():
-            case []:
-                return [ErrorObject(EvaluatorErrorUserMsg.no_input())]
-            case [Subject() as subject, *stmts]:
-                return self._eval_statements(subject, stmts)
-            case [LineError(perr) as err, *stmts] if perr.highest_precedence():
-                return [ErrorObject(str(err))]
-            case _:
-                return [ErrorObject(EvaluatorErrorUserMsg.no_expr())]
+    """
+    Every statement runs within its own `Budget` of `limits`, exceeding it
+    stops the evaluation with an error step. The work limits aren't shared
+    between statements, so whether a line is too complex doesn't depend on
+    the lines before it or on which of them an incremental run found cached.
+    The deadline is shared by the statements of one run through a `Clock`.
+    """
 
-    def _eval_statements(
-        self, subject: Subject, stmts: list[Statement]
-    ) -> list[SubjectObject]:
-        subject_object = self._eval_expression(subject.expr)
-        assert isinstance(subject_object, SubjectObject)
-        if err_msg := Validator.check(subject_object):
-            return [ErrorObject(err_msg)]
+    def __init__(self, limits: BudgetLimits | None = None) -> None:
+        self._limits = limits if limits is not None else BudgetLimits()
+
+    def clock(self) -> Clock:
+        return Clock(self._limits.deadline)
 
-        subjects: list[SubjectObject] = [copy.deepcopy(subject_object)]
+    def budget(self, clock: Clock | None = None) -> Budget:
+        return Budget(self._limits, clock)
 
+    def eval(self, program: Program) -> list[SubjectObject]:
+        return list(self.iter_eval(program.get()))
+
+    def iter_eval(self, stmts: Iterable[Statement]) -> Iterator[SubjectObject]:
+        """
+        Generator version of `eval`, a step is yielded as soon as its
+        statement is evaluated. Statements are pulled one at a time, so they
+        may still be parsed while the previous ones are evaluated.
+        """
+        stmts = iter(stmts)
+        first = next(stmts, None)
+        if first is None:
+            yield ErrorObject(EvaluatorErrorUserMsg.no_input())
+            return
+
+        clock = self.clock()
+        subject_object, steps = self.eval_first(first, self.budget(clock))
+        yield from steps
         for stmt in stmts:
-            obj = self._eval_statement(stmt)
-            if err_msg := Validator.check(obj):
-                return subjects + [ErrorObject(err_msg)]
-
-            match obj:
-                case SubjectObject() as sub:
-                    subject_object = sub
-                case (AtomTransformObject() | FormulaObject()) as t_obj:
-                    #WORKAROUMND FOR manual TESTTING
-                    ###### START WORKAROUND
-                    if isinstance(t_obj, FormulaObject) and t_obj.name.literal == "simplify":
-                        from backend.internal.expression_tree.node import FlattenNode
-                        from backend.internal.expression_tree.add_node import simplify
-
-                        if isinstance(subject_object, ExpressionObject):
-                            flattened: FlattenNode = subject_object.value.flatten()
-                            simplified = simplify(flattened)
-                            subject_object.value = simplified.unflatten()
-                            print("Simplified to:", subject_object.value, "type:", type(subject_object.value))
-                            subjects.append(copy.deepcopy(subject_object))
-
-                        elif isinstance(subject_object, EquationObject):
-                            flattened_lhs: FlattenNode = subject_object.lhs.flatten()
-                            simplified_lhs = simplify(flattened_lhs)
-                            flattened_rhs: FlattenNode = subject_object.rhs.flatten()
-                            simplified_rhs = simplify(flattened_rhs)
-
-                            subject_object.lhs = simplified_lhs.unflatten()
-                            subject_object.rhs = simplified_rhs.unflatten()
-                            subjects.append(copy.deepcopy(subject_object))
-
-                        continue
-                    ###### END WORKAROUND
-                    try:
-                        subject_object.apply(t_obj)
-                    except ValueError as e:
-                        subjects.append(ErrorObject(str(e)))
-                        break
-                case ErrorObject() as err:
-                    subjects.append(err)
-                    break
-                case obj:
-                    raise ValueError(f"Unimplemented transform type: {type(obj)}")
-
-
-            if err_msg := Validator.check(subject_object):
-                return subjects + [ErrorObject(err_msg)]
-            subjects.append(copy.deepcopy(subject_object))
-
-        return subjects
+            if subject_object is None:
+                break
+            subject_object, steps = self.eval_step(subject_object, stmt, self.budget(clock))
+            yield from steps
+
+    def eval_first(self, stmt: Statement, budget: Budget | None = None) -> EvalResult:
+        """
+        Evaluates the first line of a program, within `budget` or a new one.
+
+        Returns:
+            tuple: the live subject to transform further (None when evaluation
+            must stop) and the steps produced by the line, with its span.
+        """
+        subject_object, steps = self._within(budget, self._eval_first, stmt)
+        return subject_object, self._at_statement(steps, stmt)
+
+    def eval_step(
+        self, subject_object: SubjectObject, stmt: Statement, budget: Budget | None = None
+    ) -> EvalResult:
+        """
+        Evaluates one statement against the live `subject_object`, within
+        `budget` or a new one.
+
+        Returns:
+            tuple: the live subject after the statement (None when evaluation
+            must stop) and the steps produced by the statement, with its span.
+        """
+        subject_object, steps = self._within(budget, self._eval_step, subject_object, stmt)
+        return subject_object, self._at_statement(steps, stmt)
+
+    def _within(
+        self, budget: Budget | None, eval_fn: Callable[..., EvalResult], *args
+    ) -> EvalResult:
+        budget = budget if budget is not None else self.budget()
+        try:
+            with budget.active():
+                budget.check_deadline()
+                subject_object, steps = eval_fn(*args)
+                for step in steps:
+                    for node in step:
+                        budget.check_size(node_size(node))
+        except BudgetExceeded as err:
+            if err.timed_out:
+                return None, [ErrorObject(EvaluatorErrorUserMsg.too_slow())]
+            return None, [ErrorObject(EvaluatorErrorUserMsg.too_complex())]
+        except RecursionError:
+            # Flattening and printing are iterative, the simplifier still
+            # recurses into nested powers
+            return None, [ErrorObject(EvaluatorErrorUserMsg.too_complex())]
+        return subject_object, steps
+
+    def _at_statement(self, steps: list[SubjectObject], stmt: Statement) -> list[SubjectObject]:
+        for step in steps:
+            step.span = stmt.span
+        return steps
+
+    def _eval_first(
+        self, stmt: Statement
+    ) -> tuple[SubjectObject | None, list[SubjectObject]]:
+        match stmt:
+            case Subject() as subject:
+                subject_object = self._eval_expression(subject.expr)
+                assert isinstance(subject_object, SubjectObject)
+                if err_msg := Validator.check(subject_object):
+                    return None, [ErrorObject(err_msg)]
+                return subject_object, [subject_object.snapshot()]
+            case LineError(perr) as err if perr.highest_precedence():
+                return None, [ErrorObject(str(err))]
+            case _:
+                return None, [ErrorObject(EvaluatorErrorUserMsg.no_expr())]
+
+    def _eval_step(
+        self, subject_object: SubjectObject, stmt: Statement
+    ) -> tuple[SubjectObject | None, list[SubjectObject]]:
+        obj = self._eval_statement(stmt)
+        if err_msg := Validator.check(obj):
+            return None, [ErrorObject(err_msg)]
+
+        match obj:
+            case ErrorObject() as err:
+                return None, [err]
+            case SubjectObject() as sub:
+                subject_object = sub
+            case (AtomTransformObject() | FormulaObject()) as t_obj:
+                #WORKAROUMND FOR manual TESTTING
+                ###### START WORKAROUND
+                if isinstance(t_obj, FormulaObject) and t_obj.name.literal == "simplify":
+                    from backend.internal.expression_tree.node import FlattenNode
+                    from backend.internal.expression_tree.add_node import simplify
+
+                    if isinstance(subject_object, ExpressionObject):
+                        flattened: FlattenNode = subject_object.value.flatten()
+                        simplified = simplify(flattened)
+                        subject_object.value = simplified.unflatten()
+                        return subject_object, [subject_object.snapshot()]
+
+                    elif isinstance(subject_object, EquationObject):
+                        flattened_lhs: FlattenNode = subject_object.lhs.flatten()
+                        simplified_lhs = simplify(flattened_lhs)
+                        flattened_rhs: FlattenNode = subject_object.rhs.flatten()
+                        simplified_rhs = simplify(flattened_rhs)
+
+                        subject_object.lhs = simplified_lhs.unflatten()
+                        subject_object.rhs = simplified_rhs.unflatten()
+                        return subject_object, [subject_object.snapshot()]
+
+                    return subject_object, []
+                ###### END WORKAROUND
+                try:
+                    subject_object.apply(t_obj)
+                except ValueError as e:
+                    return None, [ErrorObject(str(e))]
+            case obj:
+                raise ValueError(f"Unimplemented transform type: {type(obj)}")
+
+        if err_msg := Validator.check(subject_object):
+            return None, [ErrorObject(err_msg)]
+        return subject_object, [subject_object.snapshot()]
 
     def _eval_statement(self, stmt: Statement) -> Object:
         match stmt:
@@ -116,7 +202,7 @@ class Evaluator:
                     f"{type(stmt)} evaluation not implemented yet."
                 )
 
-    def _eval_expression(self, expr: Expression) -> Object:
+    def _eval_expression(self, expr: Expression | Node) -> Object:
         match expr:
             case Infix(op, lhs, rhs) if op.ttype == TokenType.EQUALS:
                 return EquationObject(
@@ -125,10 +211,12 @@ class Evaluator:
                 )
             case Infix() | Prefix() | Number() | Identifier():
                 return ExpressionObject(self._convert_expression(expr))
+            case Node():
+                return ExpressionObject(expr)
             case _:
                 raise ValueError(f"Can't eval type: {type(expr)}")
 
-    def _convert_expression(self, expr: Expression) -> Node:
+    def _convert_expression(self, expr: Expression | Node) -> Node:
         tree = convert_to_expression_tree(expr)
         assert tree
         return tree
@@ -0,0 +1,140 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Iterator, NamedTuple, Optional
+
+from backend.internal.budget import Budget, BudgetLimits
+from backend.internal.evaluators.error_msgs import EvaluatorErrorUserMsg
+from backend.internal.evaluators.evaluator import Evaluator
+from backend.internal.objects import SubjectObject, ErrorObject
+from backend.internal.parsing import PARSE_CACHE
+from backend.internal.parsing.line_cache import split_lines, line_offsets
+from backend.internal.statements import Statement
+
+
+class Checkpoint(NamedTuple):
+    """
+    State of the evaluation right after one line.
+
+    Checkpoints form a linked list through `parent`, so a line only stores
+    the steps it produced itself.
+    """
+
+    parent: Optional["Checkpoint"]
+    steps: list[SubjectObject]
+    subject: SubjectObject | None
+
+    def all_steps(self) -> list[SubjectObject]:
+        chain: list[list[SubjectObject]] = []
+        checkpoint: Checkpoint | None = self
+        while checkpoint is not None:
+            chain.append(checkpoint.steps)
+            checkpoint = checkpoint.parent
+        return [step for steps in reversed(chain) for step in steps]
+
+
+class IncrementalEvaluator:
+    """
+    Evaluates programs line by line, caching the state after every line
+    keyed by a hash of the line prefix. Re-running a program whose first N
+    lines were already seen only lexes, parses and evaluates the rest.
+    """
+
+    def __init__(self, max_entries: int = 4096, limits: BudgetLimits | None = None) -> None:
+        self._max_entries = max_entries
+        self._checkpoints: OrderedDict[bytes, Checkpoint] = OrderedDict()
+        self._lock = threading.Lock()
+        self._evaluator = Evaluator(limits)
+
+    def eval(self, input: str) -> list[SubjectObject]:
+        return list(self.iter_eval(input))
+
+    def iter_eval(self, input: str) -> Iterator[SubjectObject]:
+        """
+        Generator version of `eval`: the steps of the cached prefix come
+        first, then the steps of every other line as soon as it is evaluated.
+        """
+        lines = split_lines(input)
+        keys = prefix_keys(lines)
+        offsets = line_offsets(lines)
+
+        start, checkpoint = self._longest_cached_prefix(keys)
+        if checkpoint is not None:
+            yield from checkpoint.all_steps()
+        # Only the lines evaluated now are charged to the deadline
+        clock = self._evaluator.clock()
+        for idx in range(start, len(lines)):
+            if checkpoint is not None and checkpoint.subject is None:
+                break
+            budget = self._evaluator.budget(clock)
+            checkpoint = self._advance(checkpoint, parse_line(lines[idx], offsets[idx]), budget)
+            # Running out of time depends on the load and on the lines run
+            # before, a later run may finish
+            if not budget.timed_out:
+                self._store(keys[idx], checkpoint)
+            yield from checkpoint.steps
+
+        if checkpoint is None:
+            yield ErrorObject(EvaluatorErrorUserMsg.no_input())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._checkpoints.clear()
+
+    def __len__(self) -> int:
+        return len(self._checkpoints)
+
+    def _longest_cached_prefix(
+        self, keys: list[bytes]
+    ) -> tuple[int, Checkpoint | None]:
+        with self._lock:
+            for idx in range(len(keys) - 1, -1, -1):
+                if (checkpoint := self._checkpoints.get(keys[idx])) is not None:
+                    self._checkpoints.move_to_end(keys[idx])
+                    return idx + 1, checkpoint
+        return 0, None
+
+    def _advance(
+        self, checkpoint: Checkpoint | None, stmt: Statement, budget: Budget
+    ) -> Checkpoint:
+        if checkpoint is None:
+            subject, steps = self._evaluator.eval_first(stmt, budget)
+        else:
+            assert checkpoint.subject is not None
+            live = checkpoint.subject.snapshot()
+            subject, steps = self._evaluator.eval_step(live, stmt, budget)
+
+        # The live subject is mutated by the next statement, the cache keeps its own copy
+        snapshot = subject.snapshot() if subject is not None else None
+        return Checkpoint(checkpoint, steps, snapshot)
+
+    def _store(self, key: bytes, checkpoint: Checkpoint) -> None:
+        with self._lock:
+            self._checkpoints[key] = checkpoint
+            self._checkpoints.move_to_end(key)
+            while len(self._checkpoints) > self._max_entries:
+                self._checkpoints.popitem(last=False)
+
+
+def prefix_keys(lines: list[str]) -> list[bytes]:
+    """
+    Returns chained digests: the i-th key identifies lines[0..i] as a whole.
+    Lines keep their new line character, so a line that was the last one
+    doesn't share its key with the same line followed by more input.
+    """
+    keys: list[bytes] = []
+    digest = b""
+    for line in lines:
+        digest = hashlib.blake2b(digest + line.encode(), digest_size=16).digest()
+        keys.append(digest)
+    return keys
+
+
+def parse_line(line: str, offset: int = 0) -> Statement:
+    """
+    Parses a single line the same way `Parser.parse` treats it inside a
+    whole program, through the shared parse cache.
+    """
+    stmt = PARSE_CACHE.parse_line(line, offset)
+    assert stmt is not None, "only a blank last line has no statement"
+    return stmt
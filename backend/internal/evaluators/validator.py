@@ -1,4 +1,5 @@
-from copy import deepcopy
+import threading
+import weakref
 from typing import Callable, TypeAlias
 
 from backend.internal.evaluators.error_msgs import EvaluatorErrorUserMsg
@@ -11,10 +12,22 @@ CheckerFn: TypeAlias = Callable[[Node], bool]
 
 checkers: list[tuple[CheckerFn, str]] = []
 
+# Bit i is set when checker i fails somewhere in the subtree. Nodes are
+# interned, so a subtree kept from the previous statement is looked up here
+# instead of being traversed again.
+_violations: weakref.WeakKeyDictionary[Node, int] = weakref.WeakKeyDictionary()
+_violations_lock = threading.Lock()
+# Bumped by `register`, masks computed for an older set of checkers aren't stored
+_generation = 0
+
 
 def register(msg: str):
     def decorate(func: CheckerFn):
-        checkers.append((func, msg))
+        global _generation
+        with _violations_lock:
+            checkers.append((func, msg))
+            _violations.clear()
+            _generation += 1
         return func
 
     return decorate
@@ -23,25 +36,69 @@ def register(msg: str):
 class Validator:
     @staticmethod
     def check(obj: Object) -> str | None:
+        """
+        Returns the message of the first registered checker failing anywhere
+        in the reduced roots, all checkers run in one traversal.
+        """
         for root in obj:
-            reduced = deepcopy(root).reduce()
-            for checker, msg in checkers:
-                if Validator._dfs_check(reduced, checker):
-                    return msg
+            if mask := Validator._violation_mask(root.reduce()):
+                first = (mask & -mask).bit_length() - 1
+                return checkers[first][1]
         return None
 
     @staticmethod
-    def _dfs_check(node: Node, checker: CheckerFn) -> bool:
-        if checker(node):
-            return True
-
-        match node:
-            case Add(a, b) | Mul(a, b) | Pow(a, b):
-                lhs = Validator._dfs_check(a, checker)
-                rhs = Validator._dfs_check(b, checker)
-                return lhs or rhs
-
-        return False
+    def _violation_mask(root: Node) -> int:
+        """
+        Only looking up and storing masks holds the lock, the checkers run
+        outside of it. Masks of this traversal are stored once it's done.
+        """
+        if (known := _known_mask(root)) is not None:
+            return known
+
+        generation = _generation
+        masks: dict[int, int] = {}
+        computed: list[tuple[Node, int]] = []
+        # Post-order on an explicit stack, a node is visited again once its children are done
+        pending: list[tuple[Node, bool]] = [(root, False)]
+        while pending:
+            node, children_done = pending.pop()
+            if id(node) in masks:
+                continue
+            children = _children(node)
+            if not children_done:
+                if (known := _known_mask(node)) is not None:
+                    masks[id(node)] = known
+                    continue
+                if children:
+                    pending.append((node, True))
+                    pending.extend((child, False) for child in children)
+                    continue
+
+            mask = 0
+            for idx, (checker, _) in enumerate(checkers):
+                if checker(node):
+                    mask |= 1 << idx
+            for child in children:
+                mask |= masks[id(child)]
+            masks[id(node)] = mask
+            computed.append((node, mask))
+
+        with _violations_lock:
+            if generation == _generation:
+                _violations.update(computed)
+        return masks[id(root)]
+
+
+def _known_mask(node: Node) -> int | None:
+    with _violations_lock:
+        return _violations.get(node)
+
+
+def _children(node: Node) -> tuple[Node, ...]:
+    match node:
+        case Add(a, b) | Mul(a, b) | Pow(a, b):
+            return a, b
+    return ()
 
 
 @register(EvaluatorErrorUserMsg.zero_division())
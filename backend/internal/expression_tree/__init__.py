@@ -1,7 +1,12 @@
-from .node import Node, FlattenNode, convert_to_expression_tree
+from .node import Node, InternedNode, FlattenNode
 from .add_node import Add, FlattenAdd
 from .mul_node import Mul, FlattenMul, Mul
 from .pow_node import Pow, FlattenPow
 from .numeric_node import Numeric, FlattenNumeric
 from .symbol_node import Symbol, FlattenSymbol
 
+from .converter import (
+    convert_to_expression_tree,
+    register_infix_converter,
+    register_prefix_converter,
+)
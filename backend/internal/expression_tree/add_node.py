@@ -1,25 +1,36 @@
 from __future__ import annotations
-from .node import Node, FlattenNode
+from backend.internal.budget import charge
+from .node import Node, InternedNode, FlattenNode, flatten_tree
 from backend.internal.expression_tree.numeric_node import FlattenNumeric, Numeric
 from backend.internal.expression_tree.mul_node import FlattenMul
 from backend.internal.expression_tree.symbol_node import FlattenSymbol
 from backend.internal.expression_tree.pow_node import FlattenPow
 
 
-class Add(Node):
+class Add(InternedNode):
     __match_args__ = ("left", "right")
+    __slots__ = ("left", "right")
 
-    def __init__(self, left: Node, right: Node) -> None:
-        self.left = left
-        self.right = right
+    left: Node
+    right: Node
+
+    def __new__(cls, left: Node, right: Node) -> Add:
+        return cls._intern_pair(("left", "right"), left, right)
 
     def __eq__(self, other):
-        return (
+        return self is other or (
             isinstance(other, Add)
+            and not self._structurally_differs(other)
             and self.left == other.left
             and self.right == other.right
         )
 
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __reduce__(self):
+        return (Add, (self.left, self.right))
+
     def __repr__(self):
         return "(" + repr(self.left) + "+" + repr(self.right) + ")"
 
@@ -27,23 +38,28 @@ class Add(Node):
         return self.flatten().__str__()
 
     def flatten(self) -> FlattenAdd:
-        children: list[FlattenNode] = []
-
-        def _flat_node(n: Node) -> None:
-            if isinstance(n, Add):
-                flat = n.flatten()
-                children.extend(flat.children)
+        return flatten_tree(self)  # type: ignore[return-value]
+
+    def flatten_children(self) -> tuple[Node, ...]:
+        # The operands of the whole Add chain, left to right
+        children: list[Node] = []
+        pending: list[Node] = [self.right, self.left]
+        while pending:
+            node = pending.pop()
+            if isinstance(node, Add):
+                pending.extend((node.right, node.left))
             else:
-                children.append(n.flatten())
+                children.append(node)
+        return tuple(children)
 
-        _flat_node(self.left)
-        _flat_node(self.right)
+    def flatten_with(self, children: tuple[FlattenNode, ...]) -> FlattenAdd:
+        return FlattenAdd(list(children))
 
-        return FlattenAdd(children)
+    def operands(self) -> tuple[Node, ...]:
+        return self.left, self.right
 
-    def reduce(self) -> Node:
-        left = self.left.reduce()
-        right = self.right.reduce()
+    def reduce_operands(self, operands: tuple[Node, ...]) -> Node:
+        left, right = operands
 
         match left, right:
             # 0 + x or x + 0 => x
@@ -62,12 +78,12 @@ class FlattenAdd(FlattenNode):
     def __init__(self, chidren: list[FlattenNode]) -> None:
         self.children = chidren
 
-    def constant_fold(self):
+    def constant_fold(self, recursive: bool = True):
         numeric_sum = 0.0
         new_children = []
 
         for child in self.children:
-            folded = child.constant_fold()
+            folded = child.constant_fold() if recursive else child
 
             if isinstance(folded, FlattenNumeric):
                 numeric_sum += folded.value
@@ -82,19 +98,22 @@ class FlattenAdd(FlattenNode):
 
         return FlattenAdd(new_children)
 
-    def __str__(self) -> str:
-        parts = []
-        for c in self.children:
+    def children_to_format(self) -> tuple[FlattenNode, ...]:
+        return tuple(self.children)
+
+    def format(self, parts: list[str]) -> str:
+        terms = []
+        for c, part in zip(self.children, parts):
             if isinstance(c, FlattenNumeric) and c.value < 0:
-                parts.append(f"- {abs(c.value)}")
+                terms.append(f"- {abs(c.value)}")
             elif isinstance(c, FlattenMul) and c.children[0] == FlattenNumeric(-1):
-                parts.append(f"- {c}")
+                terms.append(f"- {part}")
             elif c.precedence() < self.PRECEDENCE:
-                parts.append(f"({c})")
+                terms.append(f"({part})")
             else:
-                parts.append(f"+ {c}")
+                terms.append(f"+ {part}")
 
-        result = " ".join(parts).strip()
+        result = " ".join(terms).strip()
         if result.startswith("+ "):
             result = result[2:]
 
@@ -117,187 +136,85 @@ class FlattenAdd(FlattenNode):
     def precedence(self):
         return self.PRECEDENCE
 
-    def canonical_sort(self):
-        def extract_symbol_and_power(term):
-            if isinstance(term, FlattenNumeric):
-                return ("~", 0)
-
-            if isinstance(term, FlattenSymbol):
-                return (term.name, 1)
-
-            if isinstance(term, FlattenPow) and isinstance(term.base, FlattenSymbol) and isinstance(term.exponent, FlattenNumeric):
-                return (term.base.name, term.exponent.value)
-
-            if isinstance(term, FlattenMul):
-                max_symbol = "~"
-                max_power = 0
-                for c in term.children:
-                    if isinstance(c, FlattenSymbol):
-                        if c.name < max_symbol:
-                            max_symbol = c.name
-                            max_power = 1
-                    elif isinstance(c, FlattenPow) and isinstance(c.base, FlattenSymbol) and isinstance(c.exponent, FlattenNumeric):
-                        if c.base.name < max_symbol:
-                            max_symbol = c.base.name
-                            max_power = c.exponent.value
-                        elif c.base.name == max_symbol:
-                            max_power = max(max_power, c.exponent.value)
-                return (max_symbol, max_power)
-
-            return ("~", 0)
-
-        def key(term):
-            symbol, power = extract_symbol_and_power(term)
-            return (symbol,-power)
-
-        self.children.sort(key=key)
-
 
 # RULES
 
-# ---------- Rule: Sort children ----------
-def rule_canonical_form(node: FlattenNode) -> FlattenNode | None:
-    if isinstance(node, FlattenAdd) or isinstance(node, FlattenMul):
-        if hasattr(node, "canonical_sort"):
-            return node.canonical_sort()
-    return None
-
-
 # ---------- Rule: Constant Fold ----------
 def rule_constant_fold(node: FlattenNode) -> FlattenNode | None:
+    # Children are simplified before their parent, folding them again is wasted work
     if hasattr(node, "constant_fold"):
-        return node.constant_fold()
+        return node.constant_fold(recursive=False)
     return None
 
 
-# ---------- Rule: Combine Like Terms ----------
-def rule_combine_like_terms(node: FlattenNode) -> FlattenNode| None:
-    if not isinstance(node, FlattenAdd):
-        return None
-
-    terms: list[tuple[FlattenNode, float]] = []
-    numeric_sum = 0.0
-
-    for child in node.children:
-        if isinstance(child, FlattenNumeric):
-            numeric_sum += child.value
-            continue
-
-        if isinstance(child, FlattenSymbol):
-            base = child
-            coeff = 1.0
-        elif isinstance(child, FlattenMul):
-            coeff = 1.0
-            base_factors = []
-            for f in child.children:
-                if isinstance(f, FlattenNumeric):
-                    coeff *= f.value
-                else:
-                    base_factors.append(f)
-            if len(base_factors) == 1:
-                base = base_factors[0]
-            else:
-                base = FlattenMul(base_factors)
-        else:
-            base = child
-            coeff = 1.0
-
-        for i, (existing_base, existing_coeff) in enumerate(terms):
-            if existing_base == base:
-                terms[i] = (existing_base, existing_coeff + coeff)
-                break
-        else:
-            terms.append((base, coeff))
-
-    new_children = []
-
-    if numeric_sum != 0:
-        new_children.append(FlattenNumeric(numeric_sum))
-
-    for base, coeff in terms:
-        if coeff == 1:
-            new_children.append(base)
-        else:
-            new_children.append(FlattenMul([FlattenNumeric(coeff), base]))
-
-    if len(new_children) == 1:
-        return new_children[0]
-
-    return FlattenAdd(new_children)
-
-
-
-# ---------- Rule: Distribute Mul----------
-def rule_distribute_mul(node: FlattenNode) -> FlattenNode | None:
-    if not isinstance(node, FlattenMul):
-        return None
-    
-    for i, child in enumerate(node.children):
-        if isinstance(child, FlattenAdd):
-            other_factors = node.children[:i] + node.children[i+1:]
-            distributed_terms = []
-            for term in child.children:
-                distributed_terms.append(FlattenMul([term] + other_factors))
-            return FlattenAdd(distributed_terms)
+# ---------- Rule: Collect polynomial ----------
+def rule_collect_polynomial(node: FlattenNode) -> FlattenNode | None:
+    """
+    Distributes products over sums, combines like terms and powers of the
+    same base and sorts the result canonically, see `Polynomial`.
+    """
+    from backend.internal.expression_tree.polynomial import Polynomial
 
+    if isinstance(node, FlattenAdd) or isinstance(node, FlattenMul):
+        return Polynomial.from_node(node).to_node()
     return None
 
-# ---------- Rule: Combine powers in multiplication ----------
-def rule_combine_powers(node: "FlattenNode") -> "FlattenNode" | None:
-    if not isinstance(node, FlattenMul):
-        return None
-
-    powers: dict[str, float] = {}
-    new_factors: list[FlattenNode] = []
-
-    for child in node.children:
-        if isinstance(child, FlattenPow) and isinstance(child.base, FlattenSymbol) and isinstance(child.exponent, FlattenNumeric):
-            key = child.base.name
-            powers[key] = powers.get(key, 0) + child.exponent.value
-        elif isinstance(child, FlattenSymbol):
-            key = child.name
-            powers[key] = powers.get(key, 0) + 1
-        else:
-            new_factors.append(child)
-
-    for sym_name, exp in powers.items():
-        if exp == 1:
-            new_factors.append(FlattenSymbol(sym_name))
-        else:
-            new_factors.append(FlattenPow(FlattenSymbol(sym_name), FlattenNumeric(exp)))
-
-    if len(new_factors) == 1:
-        return new_factors[0]
-
-    return FlattenMul(new_factors)
-
-
-RULES = [
-    rule_constant_fold,
-    rule_combine_like_terms,
-    rule_distribute_mul,
-    rule_canonical_form,
-    rule_combine_powers,
-]
 
 def simplify(node: FlattenNode) -> FlattenNode:
-    prev_str = ""
-    current = node
-    while str(current) != prev_str: #TODO: constant_fold czasami nie dziala po aplikacji wszystkich reguł i zostaje np 4+2*2x
-        prev_str = str(current)
-        current = _apply_rules_recursively(current)
-    return current
-
-
-def _apply_rules_recursively(node: FlattenNode) -> FlattenNode:
-    if isinstance(node, FlattenAdd) or isinstance(node, FlattenMul):
-        node.children = [_apply_rules_recursively(c) for c in node.children]
-    elif isinstance(node, FlattenPow):
-        node.base = _apply_rules_recursively(node.base)
-        node.exponent = _apply_rules_recursively(node.exponent)
-
-    for rule in RULES:
-        new_node = rule(node)
-        if new_node is not None:
-            node = new_node
-    return node
\ No newline at end of file
+    """
+    Applies the rules of `_apply_rules` bottom-up until the tree stops
+    changing structurally.
+
+    Subtrees that no rule changed during a pass are marked clean and skipped
+    by the following passes.
+    """
+    changed = True
+    while changed:
+        node, changed = _simplify_pass(node)
+    return node
+
+
+def _simplify_pass(node: FlattenNode) -> tuple[FlattenNode, bool]:
+    if not node.dirty:
+        return node, False
+    charge()
+
+    changed = False
+    match node:
+        case FlattenAdd() | FlattenMul():
+            children: list[FlattenNode] = []
+            for child in node.children:
+                child, child_changed = _simplify_pass(child)
+                children.append(child)
+                changed |= child_changed
+            if changed:
+                node = type(node)(children)
+        case FlattenPow():
+            base, base_changed = _simplify_pass(node.base)
+            exponent, exponent_changed = _simplify_pass(node.exponent)
+            if base_changed or exponent_changed:
+                node = FlattenPow(base, exponent)
+                changed = True
+
+    result = _apply_rules(node)
+    if result is not node and result != node:
+        node = result
+        changed = True
+
+    if not changed:
+        node.dirty = False
+    return node, changed
+
+
+def _apply_rules(node: FlattenNode) -> FlattenNode:
+    """
+    Powers are constant folded, sums and products are collected into a
+    polynomial, which also folds their numeric terms and factors. A folded
+    power may become a product, which is collected too.
+    """
+    if isinstance(node, FlattenPow) and (folded := rule_constant_fold(node)) is not None:
+        node = folded
+    if isinstance(node, (FlattenAdd, FlattenMul)):
+        if (collected := rule_collect_polynomial(node)) is not None:
+            node = collected
+    return node
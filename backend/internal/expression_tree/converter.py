@@ -0,0 +1,98 @@
+from typing import Callable, Optional, TypeAlias
+
+from backend.internal.expression_tree.node import Node
+from backend.internal.expression_tree.add_node import Add
+from backend.internal.expression_tree.mul_node import Mul
+from backend.internal.expression_tree.pow_node import Pow
+from backend.internal.expression_tree.numeric_node import Numeric
+from backend.internal.expression_tree.symbol_node import Symbol
+from backend.internal.expressions import Expression, Infix, Number, Prefix, Identifier
+from backend.internal.tokens import TokenType
+
+InfixConverter: TypeAlias = Callable[[Node, Node], Node]
+PrefixConverter: TypeAlias = Callable[[Node], Node]
+
+
+def _subtract(lhs: Node, rhs: Node) -> Node:
+    return Add(lhs, Mul(rhs, Numeric(-1)))
+
+
+def _divide(lhs: Node, rhs: Node) -> Node:
+    return Mul(lhs, Pow(rhs, Numeric(-1)))
+
+
+def _negate(expr: Node) -> Node:
+    return Mul(expr, Numeric(-1))
+
+
+# Operators without a converter, e.g. relations, have no node
+INFIX_CONVERTERS: dict[TokenType, InfixConverter] = {
+    TokenType.PLUS: Add,
+    TokenType.MINUS: _subtract,
+    TokenType.ASTERISK: Mul,
+    TokenType.SLASH: _divide,
+    TokenType.CARET: Pow,
+}
+PREFIX_CONVERTERS: dict[TokenType, PrefixConverter] = {
+    TokenType.MINUS: _negate,
+}
+
+
+def register_infix_converter(ttype: TokenType, converter: InfixConverter) -> None:
+    INFIX_CONVERTERS[ttype] = converter
+
+
+def register_prefix_converter(ttype: TokenType, converter: PrefixConverter) -> None:
+    PREFIX_CONVERTERS[ttype] = converter
+
+
+def convert_to_expression_tree(expression: Optional[Expression | Node]) -> Optional[Node]:
+    """
+    Converts the AST to an expression tree, post-order on an explicit stack.
+    Returns None for an expression without a node, an operator with such an
+    operand fails the assertion.
+    """
+    if expression is None:
+        return None
+
+    converted: list[Node | None] = []
+    # An operator is visited twice, the second time its operands are converted
+    pending: list[tuple[Expression | Node, bool]] = [(expression, False)]
+    while pending:
+        expr, operands_done = pending.pop()
+        match expr:
+            # Already built by the parser, see `NodeBuilder`
+            case Node():
+                converted.append(expr)
+
+            case Number():
+                converted.append(Numeric(expr.value))
+
+            case Identifier():
+                converted.append(Symbol(expr.name.literal))
+
+            case Infix() if expr.op.ttype in INFIX_CONVERTERS:
+                if not operands_done:
+                    pending.append((expr, True))
+                    pending.append((expr.rhs, False))
+                    pending.append((expr.lhs, False))
+                    continue
+                rhs = converted.pop()
+                lhs = converted.pop()
+                assert lhs is not None and rhs is not None, "lhs and rhs must be not None"
+                converted.append(INFIX_CONVERTERS[expr.op.ttype](lhs, rhs))
+
+            case Prefix() if expr.operator().ttype in PREFIX_CONVERTERS:
+                if not operands_done:
+                    pending.append((expr, True))
+                    pending.append((expr.expr, False))
+                    continue
+                operand = converted.pop()
+                assert operand is not None, "operand must be not None"
+                converted.append(PREFIX_CONVERTERS[expr.operator().ttype](operand))
+
+            case _:
+                converted.append(None)
+
+    [tree] = converted
+    return tree
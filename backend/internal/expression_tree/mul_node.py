@@ -1,26 +1,35 @@
 from __future__ import annotations
-from backend.internal.expression_tree import Node, FlattenNode
+from backend.internal.expression_tree import Node, InternedNode, FlattenNode
+from backend.internal.expression_tree.node import flatten_tree
 from backend.internal.expression_tree.numeric_node import FlattenNumeric, Numeric
 from backend.internal.expression_tree.pow_node import Pow, FlattenPow
 from backend.internal.expression_tree.symbol_node import FlattenSymbol
 
 
-class Mul(Node):
+class Mul(InternedNode):
     __match_args__ = ("left", "right")
+    __slots__ = ("left", "right")
 
-    def __init__(self, left: Node, right: Node) -> None:
-        self.left = left
-        self.right = right
+    left: Node
+    right: Node
 
-        self.children = []
+    def __new__(cls, left: Node, right: Node) -> Mul:
+        return cls._intern_pair(("left", "right"), left, right)
 
     def __eq__(self, other):
-        return (
+        return self is other or (
             isinstance(other, Mul)
+            and not self._structurally_differs(other)
             and self.left == other.left
             and self.right == other.right
         )
 
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __reduce__(self):
+        return (Mul, (self.left, self.right))
+
     def __repr__(self):
         return "(" + repr(self.left) + "*" + repr(self.right) + ")"
 
@@ -28,23 +37,28 @@ class Mul(Node):
         return self.flatten().__str__()
 
     def flatten(self) -> FlattenMul:
-        children = []
-
-        def _flat_node(n: Node) -> None:
-            if isinstance(n, Mul):
-                flat = n.flatten()
-                children.extend(flat.children)
+        return flatten_tree(self)  # type: ignore[return-value]
+
+    def flatten_children(self) -> tuple[Node, ...]:
+        # The operands of the whole Mul chain, left to right
+        children: list[Node] = []
+        pending: list[Node] = [self.right, self.left]
+        while pending:
+            node = pending.pop()
+            if isinstance(node, Mul):
+                pending.extend((node.right, node.left))
             else:
-                children.append(n.flatten())
+                children.append(node)
+        return tuple(children)
 
-        _flat_node(self.left)
-        _flat_node(self.right)
+    def flatten_with(self, children: tuple[FlattenNode, ...]) -> FlattenMul:
+        return FlattenMul(list(children))
 
-        return FlattenMul(children)
+    def operands(self) -> tuple[Node, ...]:
+        return self.left, self.right
 
-    def reduce(self) -> Node:
-        left = self.left.reduce()
-        right = self.right.reduce()
+    def reduce_operands(self, operands: tuple[Node, ...]) -> Node:
+        left, right = operands
 
         match left, right:
             case Numeric(0), Pow(Numeric(0), Numeric(a)) if a < 1:
@@ -70,12 +84,12 @@ class FlattenMul(FlattenNode):
     def __init__(self, children: list[FlattenNode]) -> None:
         self.children = children
 
-    def constant_fold(self) -> FlattenNode:
+    def constant_fold(self, recursive: bool = True) -> FlattenNode:
         numeric_product = 1.0
         new_children = []
 
         for child in self.children:
-            folded = child.constant_fold()
+            folded = child.constant_fold() if recursive else child
 
             if isinstance(folded, FlattenNumeric):
                 numeric_product *= folded.value
@@ -102,41 +116,28 @@ class FlattenMul(FlattenNode):
         return result
 
 
-    def __str__(self) -> str:
-        parts = []
+    def children_to_format(self) -> tuple[FlattenNode, ...]:
+        return tuple(self.children)
+
+    def format(self, parts: list[str]) -> str:
+        factors = []
         is_negative = isinstance(self.children[0], FlattenNumeric) and self.children[0] == FlattenNumeric(-1)
         start = 1 if is_negative else 0
 
-        for c in self.children[start:]:
+        for c, part in zip(self.children[start:], parts[start:]):
             if (
                 is_negative and isinstance(c, FlattenNumeric) and c.value < 0
             ):  # example case: x - (-3)
-                parts.append(f"({c.value})")
+                factors.append(f"({c.value})")
             elif c is not None and c.precedence() < self.PRECEDENCE:
-                parts.append(f"({c})")
+                factors.append(f"({part})")
             else:
-                parts.append(f"{c}")
+                factors.append(part)
 
-        return " * ".join(parts)
+        return " * ".join(factors)
 
     def __eq__(self, other):
         return isinstance(other, FlattenMul) and self.children == other.children
 
     def precedence(self):
         return self.PRECEDENCE
-    
-    def canonical_sort(self):
-        def key(term):
-
-            if isinstance(term, FlattenNumeric):
-                return (0, "", 0)
-
-            if isinstance(term, FlattenSymbol):
-                return (1, term.name, -1)
-
-            if isinstance(term, FlattenPow) and isinstance(term.base, FlattenSymbol) and isinstance(term.exponent, FlattenNumeric):
-                return (1, term.base.name, -term.exponent.value)
-
-            return (2, str(term), 0)
-
-        self.children.sort(key=key)
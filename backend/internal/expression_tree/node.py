@@ -1,12 +1,13 @@
 from __future__ import annotations
-from typing import Optional
+import math
+import weakref
+from typing import Any
 from abc import ABC, abstractmethod
 
-from backend.internal.expressions import Expression, Infix, Number, Prefix, Identifier
-from backend.internal.tokens.token import Token, TokenType
-
 
 class Node(ABC):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__()
 
@@ -52,16 +53,239 @@ class Node(ABC):
         pass
 
 
+_INTERN_TABLE: weakref.WeakValueDictionary[tuple, InternedNode] = (
+    weakref.WeakValueDictionary()
+)
+
+
+class InternedNode(Node):
+    """
+    Immutable, hash-consed node. Constructing a node structurally equal to a
+    live one returns that same object, so equal subtrees are shared, equality
+    is an identity check in the common case and copies are free.
+
+    A node is `ground` when its whole subtree consists of interned nodes.
+    Nodes holding foreign children (e.g. `WildNode` patterns) fall back to
+    structural comparison. `_size` is the number of nodes in the subtree.
+
+    `_reduced` is the only slot written after construction: the result of
+    `reduce`, filled in on first use, or `_IRREDUCIBLE`.
+    """
+
+    __slots__ = ("_hash", "_ground", "_size", "_reduced", "__weakref__")
+
+    _hash: int
+    _ground: bool
+    _size: int
+    _reduced: Node | object | None
+
+    def __init__(self, *_: Any) -> None:
+        pass
+
+    @classmethod
+    def _intern(
+        cls, key: tuple, hash_value: int, ground: bool, size: int = 1, **fields: Any
+    ) -> Any:
+        node = _INTERN_TABLE.get(key)
+        if node is not None:
+            return node
+
+        node = object.__new__(cls)
+        for name, value in fields.items():
+            object.__setattr__(node, name, value)
+        object.__setattr__(node, "_hash", hash_value)
+        object.__setattr__(node, "_ground", ground)
+        object.__setattr__(node, "_size", size)
+        object.__setattr__(node, "_reduced", None)
+        return _INTERN_TABLE.setdefault(key, node)
+
+    @classmethod
+    def _intern_pair(cls, names: tuple[str, str], lhs: Node, rhs: Node) -> Any:
+        return cls._intern(
+            (cls, id(lhs), id(rhs)),
+            hash((cls.__name__, hash(lhs), hash(rhs))),
+            is_ground(lhs) and is_ground(rhs),
+            1 + node_size(lhs) + node_size(rhs),
+            **{names[0]: lhs, names[1]: rhs},
+        )
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def operands(self) -> tuple[Node, ...]:
+        """
+        Children reduced before the node itself, see `reduce_tree`.
+        """
+        return ()
+
+    def reduce_operands(self, operands: tuple[Node, ...]) -> Node:
+        """
+        Reduces the node given its already reduced `operands`.
+        """
+        _ = operands
+        return self
+
+    def reduce(self) -> Node:
+        return reduce_tree(self)
+
+    def flatten_children(self) -> tuple[Node, ...]:
+        """
+        Children flattened before the node itself, see `flatten_tree`.
+        """
+        return ()
+
+    def flatten_with(self, children: tuple[FlattenNode, ...]) -> FlattenNode:
+        """
+        Flattens the node given its already flattened `flatten_children`.
+        """
+        _ = children
+        return self.flatten()
+
+    def __copy__(self) -> InternedNode:
+        return self
+
+    def __deepcopy__(self, memo: dict) -> InternedNode:
+        return self
+
+    def _structurally_differs(self, other: InternedNode) -> bool:
+        """
+        Cheap rejection: two ground trees with different hashes can't be equal.
+        """
+        return self._ground and other._ground and self._hash != other._hash
+
+
+# Marks a node that reduces to itself, storing the node would make a cycle
+_IRREDUCIBLE = object()
+
+
+def reduce_tree(root: Node) -> Node:
+    """
+    Reduces the tree bottom-up on an explicit stack. The result is kept on
+    every ground node, so reducing it again, or any tree sharing subtrees
+    with it, only visits nodes not reduced before. Foreign nodes (e.g.
+    `WildNode`) are reduced on their own.
+    """
+    reduced: dict[int, Node] = {}
+    pending: list[tuple[Node, bool]] = [(root, False)]
+    while pending:
+        node, operands_done = pending.pop()
+        if id(node) in reduced:
+            continue
+        if not isinstance(node, InternedNode):
+            reduced[id(node)] = node.reduce()
+            continue
+
+        if not operands_done:
+            if (known := node._reduced) is not None:
+                reduced[id(node)] = node if known is _IRREDUCIBLE else known  # type: ignore[assignment]
+                continue
+            if operands := node.operands():
+                pending.append((node, True))
+                pending.extend((operand, False) for operand in reversed(operands))
+                continue
+
+        result = node.reduce_operands(tuple(reduced[id(operand)] for operand in node.operands()))
+        if node._ground:
+            object.__setattr__(node, "_reduced", _IRREDUCIBLE if result is node else result)
+        reduced[id(node)] = result
+    return reduced[id(root)]
+
+
+def flatten_tree(root: Node) -> FlattenNode:
+    """
+    Flattens the tree bottom-up on an explicit stack, so deeply nested input
+    doesn't hit the recursion limit. Shared subtrees are flattened once per
+    occurrence, the flattened tree is mutable and must not share nodes.
+    """
+    flattened: list[FlattenNode] = []
+    pending: list[tuple[Node, tuple[Node, ...] | None]] = [(root, None)]
+    while pending:
+        node, children = pending.pop()
+        if not isinstance(node, InternedNode):
+            flattened.append(node.flatten())
+            continue
+
+        if children is None:
+            children = node.flatten_children()
+            if children:
+                pending.append((node, children))
+                pending.extend((child, None) for child in reversed(children))
+                continue
+
+        done = tuple(flattened[len(flattened) - len(children) :])
+        del flattened[len(flattened) - len(children) :]
+        flattened.append(node.flatten_with(done))
+    return flattened[0]
+
+
+def format_tree(root: FlattenNode) -> str:
+    """
+    Formats the tree bottom-up on an explicit stack, see `FlattenNode.format`.
+    """
+    formatted: list[str] = []
+    pending: list[tuple[FlattenNode, bool]] = [(root, False)]
+    while pending:
+        node, children_done = pending.pop()
+        if not isinstance(node, FlattenNode):
+            formatted.append(str(node))
+            continue
+        children = node.children_to_format()
+        if not children:
+            formatted.append(node.format([]))
+            continue
+        if not children_done:
+            pending.append((node, True))
+            pending.extend((child, False) for child in reversed(children))
+            continue
+
+        parts = formatted[len(formatted) - len(children) :]
+        del formatted[len(formatted) - len(children) :]
+        formatted.append(node.format(parts))
+    return formatted[0]
+
+
+def is_ground(node: Node) -> bool:
+    return isinstance(node, InternedNode) and node._ground
+
+
+def node_size(node: Node) -> int:
+    """
+    Number of nodes in the subtree, a foreign node (e.g. `WildNode`) counts as one.
+    """
+    return node._size if isinstance(node, InternedNode) else 1
+
+
+def numeric_key(value: float) -> tuple:
+    """
+    Intern key of a numeric value. Keeps `2` and `2.0` (and `0.0` and `-0.0`)
+    apart so the representation of a node never depends on which one was
+    created first.
+    """
+    if isinstance(value, float):
+        return (float, value, math.copysign(1.0, value))
+    return (type(value), value)
+
+
 class FlattenNode(ABC):
     PRECEDENCE = 999
 
+    # Cleared by the simplifier once no rule changes the subtree anymore
+    dirty: bool = True
+
     @abstractmethod
-    def constant_fold(self) -> FlattenNode:
+    def constant_fold(self, recursive: bool = True) -> FlattenNode:
         """
         Performs constant folding on the expression tree node.
 
         - If the node has child nodes that can be constant folded, it recursively
-          applies constant folding to those child nodes.
+          applies constant folding to those child nodes. With `recursive` set to
+          False only the direct children are folded into the node.
 
         - If the node represents a numeric operation (e.g., addition, multiplication)
           and both operands are numeric constants, it computes the result and
@@ -80,8 +304,20 @@ class FlattenNode(ABC):
     def __eq__(self, other) -> bool:
         pass
 
-    @abstractmethod
     def __str__(self) -> str:
+        return format_tree(self)
+
+    def children_to_format(self) -> tuple[FlattenNode, ...]:
+        """
+        Children formatted before the node itself, see `format`. Leaves have none.
+        """
+        return ()
+
+    @abstractmethod
+    def format(self, parts: list[str]) -> str:
+        """
+        Formats the node given the strings of its `children_to_format`.
+        """
         pass
 
     @abstractmethod
@@ -91,54 +327,3 @@ class FlattenNode(ABC):
     @abstractmethod
     def precedence(self) -> int:
         pass
-
-
-def convert_to_expression_tree(expression: Optional[Expression]) -> Optional[Node]:
-    from backend.internal.expression_tree import Mul, Numeric, Add, Pow, Symbol
-
-    if expression is None:
-        return None
-
-    match expression:
-        case Infix(_op=Token(TokenType.PLUS), _lhs=left, _rhs=right):
-            lhs = convert_to_expression_tree(left)
-            rhs = convert_to_expression_tree(right)
-            assert lhs and rhs, "lhs and rhs must be not None"
-            return Add(lhs, rhs)
-        case Infix(_op=Token(TokenType.MINUS), _lhs=left, _rhs=right):
-            lhs = convert_to_expression_tree(left)
-            rhs = convert_to_expression_tree(right)
-            assert rhs, "rhs must be not None"
-            negation = Mul(rhs, Numeric(-1))
-            assert lhs and negation, "lhs and rhs must be not None"
-            return Add(lhs, negation)
-        case Infix(_op=Token(TokenType.ASTERISK), _lhs=left, _rhs=right):
-            lhs = convert_to_expression_tree(left)
-            rhs = convert_to_expression_tree(right)
-            assert lhs and rhs, "lhs and rhs must be not None"
-            return Mul(lhs, rhs)
-        case Infix(_op=Token(TokenType.SLASH), _lhs=left, _rhs=right):
-            lhs = convert_to_expression_tree(left)
-            inverse_base = convert_to_expression_tree(right)
-            assert inverse_base, "inverse base must be not None"
-            rhs = Pow(inverse_base, Numeric(-1))
-            assert lhs and rhs, "lhs and rhs must be not None"
-            return Mul(lhs, rhs)
-        case Infix(_op=Token(TokenType.CARET), _lhs=left, _rhs=right):
-            base = convert_to_expression_tree(left)
-            exponent = convert_to_expression_tree(right)
-            assert base and exponent, "base and exponent must be not None"
-            return Pow(base, exponent)
-
-        case Prefix(_op=Token(TokenType.MINUS), _expr=expr):
-            inner_mul = convert_to_expression_tree(expr)
-            assert inner_mul
-            return Mul(inner_mul, Numeric(-1))
-
-        case Number(value=value):
-            return Numeric(value)
-
-        case Identifier(name=Token(_, literal)):
-            return Symbol(literal)
-
-    return None
\ No newline at end of file
@@ -1,14 +1,29 @@
-from backend.internal.expression_tree import Node, FlattenNode
+from backend.internal.expression_tree import Node, InternedNode, FlattenNode
+from backend.internal.expression_tree.node import numeric_key
 
 
-class Numeric(Node):
+class Numeric(InternedNode):
     __match_args__ = ("value",)
+    __slots__ = ("value",)
 
-    def __init__(self, value: float) -> None:
-        self.value = value
+    value: float
+
+    def __new__(cls, value: float) -> "Numeric":
+        return cls._intern(
+            (cls, *numeric_key(value)),
+            hash(("Numeric", value)),
+            True,
+            value=value,
+        )
 
     def __eq__(self, other):
-        return isinstance(other, Numeric) and self.value == other.value
+        return self is other or (isinstance(other, Numeric) and self.value == other.value)
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __reduce__(self):
+        return (Numeric, (self.value,))
 
     def __repr__(self):
         return str(self.value)
@@ -30,13 +45,14 @@ class FlattenNumeric(FlattenNode):
     def __init__(self, value: float) -> None:
         self.value = value
 
-    def constant_fold(self) -> FlattenNode:
+    def constant_fold(self, recursive: bool = True) -> FlattenNode:
         return self
 
     def __eq__(self, other):
         return isinstance(other, FlattenNumeric) and self.value == other.value
 
-    def __str__(self):
+    def format(self, parts: list[str]) -> str:
+        _ = parts
         if self.value == int(self.value):
             return str(int(self.value))
         return str(self.value)
@@ -0,0 +1,187 @@
+from __future__ import annotations
+from typing import TypeAlias
+
+from backend.internal.budget import charge
+from backend.internal.expression_tree.node import Node, FlattenNode
+from backend.internal.expression_tree.add_node import FlattenAdd
+from backend.internal.expression_tree.mul_node import FlattenMul
+from backend.internal.expression_tree.numeric_node import FlattenNumeric
+from backend.internal.expression_tree.pow_node import FlattenPow
+from backend.internal.expression_tree.symbol_node import FlattenSymbol, Symbol
+
+
+class Atom:
+    """
+    Factor a polynomial is built from: a symbol, or any subtree the polynomial
+    doesn't look into, e.g. `x + 1` in `(x + 1) ^ -1` or `2 ^ x`.
+
+    Atoms are identified by the interned tree of the factor, so comparing them
+    is a hash lookup instead of a recursive walk.
+    """
+
+    __slots__ = ("node", "key", "order")
+
+    def __init__(self, node: FlattenNode) -> None:
+        self.node = node
+        self.key: Node
+        if isinstance(node, FlattenSymbol):
+            self.key = Symbol(node.name)
+            self.order = (0, node.name)
+        else:
+            self.key = node.unflatten()
+            self.order = (1, str(node))
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Atom) and self.key == other.key
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    def __repr__(self) -> str:
+        return str(self.node)
+
+
+# Atoms with their exponents, sorted by `Atom.order`. The empty monomial is the constant term.
+Monomial: TypeAlias = tuple[tuple[Atom, float], ...]
+
+# Sorts after every atom, so `x` goes after `x * y` and the constant term goes last
+_END_OF_MONOMIAL = ((2, ""), 0)
+
+
+class Polynomial:
+    """
+    Sparse polynomial: maps every monomial to its coefficient.
+
+    Adding and multiplying polynomials collects like terms through the dict,
+    so expanding `FlattenMul` over `FlattenAdd` and combining like terms and
+    powers take near-linear time in the number of terms.
+
+    Example:
+        2x * (x + y) - x * y  =>  {(x^2,): 2, (x, y): 1}
+    """
+
+    __slots__ = ("terms",)
+
+    def __init__(self, terms: dict[Monomial, float] | None = None) -> None:
+        self.terms: dict[Monomial, float] = terms if terms is not None else {}
+
+    @staticmethod
+    def constant(value: float) -> Polynomial:
+        return Polynomial({(): value} if value != 0 else {})
+
+    @staticmethod
+    def atom(node: FlattenNode, exponent: float = 1) -> Polynomial:
+        return Polynomial({((Atom(node), exponent),): 1})
+
+    @staticmethod
+    def from_node(node: FlattenNode) -> Polynomial:
+        charge()
+        if isinstance(node, FlattenNumeric):
+            return Polynomial.constant(node.value)
+
+        if isinstance(node, FlattenAdd):
+            result = Polynomial()
+            for child in node.children:
+                result += Polynomial.from_node(child)
+            return result
+
+        if isinstance(node, FlattenMul):
+            result = Polynomial.constant(1)
+            for child in node.children:
+                result *= Polynomial.from_node(child)
+                if not result.terms:
+                    break
+            return result
+
+        if (
+            isinstance(node, FlattenPow)
+            and isinstance(node.exponent, FlattenNumeric)
+            and not isinstance(node.base, FlattenNumeric)
+        ):
+            return Polynomial.atom(node.base, node.exponent.value)
+
+        return Polynomial.atom(node)
+
+    def to_node(self) -> FlattenNode:
+        """
+        Builds the canonical tree: terms in lexicographic order of their
+        monomials with the constant term last, factors of a term ordered by
+        atom with the numeric coefficient first.
+        """
+        ordered = sorted(self.terms.items(), key=lambda term: _monomial_order(term[0]))
+        children = [_term_to_node(monomial, coeff) for monomial, coeff in ordered]
+
+        if not children:
+            return FlattenNumeric(0)
+        if len(children) == 1:
+            return children[0]
+        return FlattenAdd(children)
+
+    def __add__(self, other: Polynomial) -> Polynomial:
+        charge(len(other.terms))
+        terms = dict(self.terms)
+        for monomial, coeff in other.terms.items():
+            _accumulate(terms, monomial, coeff)
+        return Polynomial(terms)
+
+    def __mul__(self, other: Polynomial) -> Polynomial:
+        terms: dict[Monomial, float] = {}
+        for lhs_monomial, lhs_coeff in self.terms.items():
+            # Expanding products of sums is where the work blows up, charged row by row
+            charge(len(other.terms))
+            for rhs_monomial, rhs_coeff in other.terms.items():
+                monomial = _mul_monomials(lhs_monomial, rhs_monomial)
+                _accumulate(terms, monomial, lhs_coeff * rhs_coeff)
+        return Polynomial(terms)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Polynomial) and self.terms == other.terms
+
+    def __repr__(self) -> str:
+        return str(self.to_node())
+
+
+def _accumulate(terms: dict[Monomial, float], monomial: Monomial, coeff: float) -> None:
+    total = terms.get(monomial, 0) + coeff
+    if total == 0:
+        terms.pop(monomial, None)
+    else:
+        terms[monomial] = total
+
+
+def _mul_monomials(lhs: Monomial, rhs: Monomial) -> Monomial:
+    if not lhs:
+        return rhs
+    if not rhs:
+        return lhs
+
+    exponents = dict(lhs)
+    for atom, exponent in rhs:
+        exponents[atom] = exponents.get(atom, 0) + exponent
+    return tuple(
+        sorted(
+            ((atom, exponent) for atom, exponent in exponents.items() if exponent != 0),
+            key=lambda factor: factor[0].order,
+        )
+    )
+
+
+def _monomial_order(monomial: Monomial) -> tuple:
+    return tuple((atom.order, -exponent) for atom, exponent in monomial) + (
+        _END_OF_MONOMIAL,
+    )
+
+
+def _term_to_node(monomial: Monomial, coeff: float) -> FlattenNode:
+    factors: list[FlattenNode] = [
+        atom.node if exponent == 1 else FlattenPow(atom.node, FlattenNumeric(exponent))
+        for atom, exponent in monomial
+    ]
+
+    if not factors:
+        return FlattenNumeric(coeff)
+    if coeff != 1:
+        factors.insert(0, FlattenNumeric(coeff))
+    if len(factors) == 1:
+        return factors[0]
+    return FlattenMul(factors)
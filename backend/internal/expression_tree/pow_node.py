@@ -1,22 +1,33 @@
 from __future__ import annotations
-from backend.internal.expression_tree import Node, FlattenNode
+from backend.internal.expression_tree import Node, InternedNode, FlattenNode
+from backend.internal.expression_tree.node import flatten_tree
 from backend.internal.expression_tree.numeric_node import FlattenNumeric, Numeric
 
 
-class Pow(Node):
+class Pow(InternedNode):
     __match_args__ = ("base", "exponent")
+    __slots__ = ("base", "exponent")
 
-    def __init__(self, base: Node, exponent: Node) -> None:
-        self.base = base
-        self.exponent = exponent
+    base: Node
+    exponent: Node
+
+    def __new__(cls, base: Node, exponent: Node) -> Pow:
+        return cls._intern_pair(("base", "exponent"), base, exponent)
 
     def __eq__(self, other):
-        return (
+        return self is other or (
             isinstance(other, Pow)
+            and not self._structurally_differs(other)
             and self.base == other.base
             and self.exponent == other.exponent
         )
 
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __reduce__(self):
+        return (Pow, (self.base, self.exponent))
+
     def __repr__(self):
         return "(" + repr(self.base) + "^" + repr(self.exponent) + ")"
 
@@ -24,11 +35,20 @@ class Pow(Node):
         return str(self.flatten())
 
     def flatten(self) -> FlattenPow:
-        return FlattenPow(self.base.flatten(), self.exponent.flatten())
+        return flatten_tree(self)  # type: ignore[return-value]
 
-    def reduce(self) -> Node:
-        base = self.base.reduce()
-        exponent = self.exponent.reduce()
+    def flatten_children(self) -> tuple[Node, ...]:
+        return self.base, self.exponent
+
+    def flatten_with(self, children: tuple[FlattenNode, ...]) -> FlattenPow:
+        base, exponent = children
+        return FlattenPow(base, exponent)
+
+    def operands(self) -> tuple[Node, ...]:
+        return self.base, self.exponent
+
+    def reduce_operands(self, operands: tuple[Node, ...]) -> Node:
+        base, exponent = operands
 
         match base, exponent:
             case Numeric(a), Numeric(b) if a < 0 and b == int(b):
@@ -56,9 +76,9 @@ class FlattenPow(FlattenNode):
         self.base = base
         self.exponent = exponent
 
-    def constant_fold(self) -> FlattenNode:
-        base = self.base.constant_fold()
-        exponent = self.exponent.constant_fold()
+    def constant_fold(self, recursive: bool = True) -> FlattenNode:
+        base = self.base.constant_fold() if recursive else self.base
+        exponent = self.exponent.constant_fold() if recursive else self.exponent
 
         match base, exponent:
             case FlattenNumeric(lv), FlattenNumeric(rv):
@@ -73,12 +93,15 @@ class FlattenPow(FlattenNode):
         return FlattenPow(base, exponent)
 
 
-    def __str__(self) -> str:
-        base_str = str(self.base)
-        if hasattr(self.base, "PRECEDENCE") and self.base.PRECEDENCE < self.PRECEDENCE:
+    def children_to_format(self) -> tuple[FlattenNode, ...]:
+        return self.base, self.exponent
+
+    def format(self, parts: list[str]) -> str:
+        base_str, exponent_str = parts
+        # Powers are right-associative, a power base needs parentheses too
+        if hasattr(self.base, "PRECEDENCE") and self.base.PRECEDENCE <= self.PRECEDENCE:
             base_str = f"({base_str})"
 
-        exponent_str = str(self.exponent)
         if (
             hasattr(self.exponent, "PRECEDENCE")
             and self.exponent.PRECEDENCE < self.PRECEDENCE
@@ -1,14 +1,23 @@
-from backend.internal.expression_tree import Node, FlattenNode
+from backend.internal.expression_tree import Node, InternedNode, FlattenNode
 
 
-class Symbol(Node):
+class Symbol(InternedNode):
     __match_args__ = ("name",)
+    __slots__ = ("name",)
 
-    def __init__(self, name: str) -> None:
-        self.name = name
+    name: str
+
+    def __new__(cls, name: str) -> "Symbol":
+        return cls._intern((cls, name), hash(("Symbol", name)), True, name=name)
 
     def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+        return self is other or (isinstance(other, Symbol) and self.name == other.name)
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __reduce__(self):
+        return (Symbol, (self.name,))
 
     def __repr__(self):
         return self.name
@@ -31,10 +40,11 @@ class FlattenSymbol(FlattenNode):
     def __init__(self, name: str) -> None:
         self.name = name
 
-    def constant_fold(self) -> FlattenNode:
+    def constant_fold(self, recursive: bool = True) -> FlattenNode:
         return self
 
-    def __str__(self):
+    def format(self, parts: list[str]) -> str:
+        _ = parts
         return self.name
 
     def __eq__(self, other):
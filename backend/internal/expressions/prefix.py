@@ -23,3 +23,7 @@ class Prefix(Expression):
 
     def operator(self) -> Token:
         return self._op
+
+    @property
+    def expr(self) -> Expression:
+        return self._expr
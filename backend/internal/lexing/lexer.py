@@ -1,121 +1,124 @@
-from typing import Callable
-from backend.internal.tokens import Token, TokenType
-
-NULL_CODE: str = "\0"
+import re
+from typing import Iterator
+from backend.internal.tokens import Token, TokenType, TokenBuffer
+from backend.internal.tokens.token_buffer import TYPE_CODES
+
+# Characters `str.lower` maps into a-z besides ASCII letters
+_EXTRA_LETTERS = "İK"
+
+# Alternatives are tried in order, the two-character operators go before their prefixes
+_MASTER_PATTERN = re.compile(
+    rf"""
+    ([ \r\t]+)
+    | ([A-Za-z_{_EXTRA_LETTERS}]+)
+    | ([0-9]+(?:\.[0-9]*)?)
+    | (!=|<=|>=|[-+*/^=,()\n!<>])
+    | (.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+_WHITESPACE_GROUP = 1
+_OPERATOR_GROUP = 4
+
+# Token type of every group of `_MASTER_PATTERN`, by group index
+_GROUP_TYPES: tuple[TokenType | None, ...] = (
+    None,
+    None,
+    TokenType.IDENT,
+    TokenType.NUMBER,
+    None,
+    TokenType.ILLEGAL,
+)
+
+# Operators carry a fixed literal, so their tokens are built only once
+_OPERATOR_TOKENS: dict[str, Token] = {
+    "+": Token(TokenType.PLUS, "+"),
+    "-": Token(TokenType.MINUS, "-"),
+    "*": Token(TokenType.ASTERISK, "*"),
+    "/": Token(TokenType.SLASH, "/"),
+    "^": Token(TokenType.CARET, "^"),
+    "=": Token(TokenType.EQUALS, "="),
+    "!=": Token(TokenType.NOT_EQUALS, "!="),
+    "<": Token(TokenType.LT, "<"),
+    "<=": Token(TokenType.LE, "<="),
+    ">": Token(TokenType.GT, ">"),
+    ">=": Token(TokenType.GE, ">="),
+    "!": Token(TokenType.BANG, "!"),
+    ",": Token(TokenType.COMMA, ","),
+    "(": Token(TokenType.LPAREN, "("),
+    ")": Token(TokenType.RPAREN, ")"),
+    "\n": Token(TokenType.NEW_LINE, "\\n"),
+}
+
+_OPERATOR_CODES: dict[str, int] = {
+    text: TYPE_CODES[token.ttype] for text, token in _OPERATOR_TOKENS.items()
+}
+_GROUP_CODES: tuple[int, ...] = tuple(
+    TYPE_CODES[ttype] if ttype is not None else 0 for ttype in _GROUP_TYPES
+)
+_EOF_CODE = TYPE_CODES[TokenType.EOF]
+
+EOF_TOKEN = Token(TokenType.EOF, "EOF")
 
 
 class Lexer:
-    def __init__(self, input: str) -> None:
-        self._input = input
+    """
+    Splits the input into tokens with one precompiled regex.
 
-        self._pos: int = 0
-        self._read_pos: int = 0
-        self._current: str = ""
+    Tokens are produced lazily by iterating the lexer, `tokenize` collects
+    them into a list on first use and `compact` into a `TokenBuffer`.
+    """
 
-        self._read_content_idx: int = 0
-        self._content: list[Token] = []
-
-        self._tokenize()
+    def __init__(self, input: str) -> None:
+        self._input = input
+        self._content: list[Token] | None = None
 
     def tokenize(self) -> list[Token]:
+        if self._content is None:
+            self._content = list(self)
         return self._content
 
-    def _tokenize(self) -> None:
-        self._content.clear()
-        self._read_unicode()
-
-        token = self._read_next_token()
-        while token.ttype is not TokenType.EOF:
-            self._content.append(token)
-            token = self._read_next_token()
-        self._content.append(Token(TokenType.EOF, "EOF"))
-
-    def _read_unicode(self) -> None:
-        self._current = (
-            NULL_CODE
-            if self._read_pos >= len(self._input)
-            else self._input[self._read_pos]
-        )
-        self._pos = self._read_pos
-        self._read_pos += 1
-
-    def _read_next_token(self) -> Token:
-        self._skip_whitespace()
-        if self._pos >= len(self._input):
-            return Token(TokenType.EOF, "EOF")
-
-        token = Token(TokenType.EOF, "EOF")
-        match self._current:
-            case "+":
-                token = Token(TokenType.PLUS, "+")
-            case "-":
-                token = Token(TokenType.MINUS, "-")
-            case "*":
-                token = Token(TokenType.ASTERISK, "*")
-            case "/":
-                token = Token(TokenType.SLASH, "/")
-            case "^":
-                token = Token(TokenType.CARET, "^")
-            case "=":
-                token = Token(TokenType.EQUALS, "=")
-            case ",":
-                token = Token(TokenType.COMMA, ",")
-            case "(":
-                token = Token(TokenType.LPAREN, "(")
-            case ")":
-                token = Token(TokenType.RPAREN, ")")
-            case "\n":
-                token = Token(TokenType.NEW_LINE, "\\n")
-            case "!":
-                if self._peek_unicode() == "=":
-                    token = Token(TokenType.NOT_EQUALS, "!=")
-                    self._read_unicode()
-                else:
-                    token = Token(TokenType.BANG, "!")
-            case "<":
-                if self._peek_unicode() == "=":
-                    token = Token(TokenType.LE, "<=")
-                    self._read_unicode()
-                else:
-                    token = Token(TokenType.LT, "<")
-            case ">":
-                if self._peek_unicode() == "=":
-                    token = Token(TokenType.GE, ">=")
-                    self._read_unicode()
-                else:
-                    token = Token(TokenType.GT, ">")
-            case _:
-                if is_letter(self._current):
-                    literal = self._read_pred(is_letter)
-                    return Token(TokenType.IDENT, literal)
-                elif is_number(self._current):
-                    literal = self._read_pred(number_pred())
-                    return Token(TokenType.NUMBER, literal)
-                else:
-                    token = Token(TokenType.ILLEGAL, self._current)
-
-        self._read_unicode()
-        return token
-
-    def _skip_whitespace(self) -> None:
-        while is_whitespace(self._current):
-            self._read_unicode()
-
-    def _peek_unicode(self) -> str:
-        if self._read_pos >= len(self._input):
-            return NULL_CODE
-        return self._input[self._read_pos]
-
-    def _read_pred(self, pred: Callable[[str], bool]) -> str:
-        start = self._pos
-        while pred(self._current):
-            self._read_unicode()
-        return self._input[start : self._pos]
+    def compact(self) -> TokenBuffer:
+        """
+        Tokenizes the input without allocating a `Token` per token, keeping
+        the type and source offsets of each one.
+        """
+        buffer = TokenBuffer(self._input)
+        append = buffer.append
+        operators = _OPERATOR_CODES
+        codes = _GROUP_CODES
+        for found in _MASTER_PATTERN.finditer(self._input):
+            group = found.lastindex
+            if group == _WHITESPACE_GROUP:
+                continue
+            start, end = found.span()
+            if group == _OPERATOR_GROUP:
+                append(operators[found.group()], start, end)
+            else:
+                append(codes[group], start, end)  # type: ignore[index]
+        append(_EOF_CODE, len(self._input), len(self._input))
+        return buffer
+
+    def __iter__(self) -> Iterator[Token]:
+        if self._content is not None:
+            yield from self._content
+            return
+
+        operators = _OPERATOR_TOKENS
+        types = _GROUP_TYPES
+        for found in _MASTER_PATTERN.finditer(self._input):
+            group = found.lastindex
+            if group == _WHITESPACE_GROUP:
+                continue
+            if group == _OPERATOR_GROUP:
+                yield operators[found.group()]
+            else:
+                yield Token(types[group], found.group())  # type: ignore[index, arg-type]
+        yield EOF_TOKEN
 
 
 def is_whitespace(code: str) -> bool:
-    whitespaces: set[str] = {" ", "\r", "\t"}
-    return code in whitespaces
+    return code in " \r\t" and len(code) == 1
 
 
 def is_letter(code: str) -> bool:
@@ -125,18 +128,3 @@ def is_letter(code: str) -> bool:
 
 def is_number(code: str) -> bool:
     return "0" <= code and code <= "9"
-
-
-def number_pred() -> Callable[[str], bool]:
-    seen_dot = False
-
-    def inner(code: str) -> bool:
-        nonlocal seen_dot
-        if is_number(code):
-            return True
-        elif (code == ".") and not seen_dot:
-            seen_dot = True
-            return True
-        return False
-
-    return inner
@@ -1,6 +1,9 @@
 from collections.abc import Mapping
 from typing import Callable, TypeAlias
 from backend.internal.math_builtins.formula_entry import FormulaEntry
+from backend.internal.math_builtins.formula_index import FormulaIndex, FormulaRewrite
+from backend.internal.math_builtins.pattern_compiler import Matcher, compile_pattern
+from backend.internal.expression_tree import Node
 
 FormulaCategory: TypeAlias = Mapping[str, FormulaEntry]
 
@@ -8,24 +11,73 @@ FormulaCategory: TypeAlias = Mapping[str, FormulaEntry]
 class FormulaHandler:
     def __init__(self) -> None:
         self._formulas: dict[str, Mapping[str, FormulaEntry]] = {}
+        self._entries: dict[str, FormulaEntry] = {}
+        self._rewrites: dict[str, tuple[FormulaRewrite, ...]] = {}
+        self._index: FormulaIndex[FormulaRewrite] = FormulaIndex()
+        # Keyed by id, WildNodes make different patterns compare equal
+        self._matchers: dict[int, tuple[Node, Matcher]] = {}
 
     def formula_category(self, category_name: str):
         def register(category: FormulaCategory | Callable[[], FormulaCategory]):
-            self._formulas[category_name] = (
-                category() if callable(category) else category
-            )
+            formulas = category() if callable(category) else category
+            self._formulas[category_name] = formulas
+            for name, entry in formulas.items():
+                self._register(name, entry)
             return category
 
         return register
 
+    def _register(self, name: str, entry: FormulaEntry) -> None:
+        # The first category registering a name wins, same as the lookup by category order did
+        if name in self._entries:
+            return
+        self._entries[name] = entry
+        self._rewrites[name] = (
+            FormulaRewrite(name, entry.lhs, entry.rhs),
+            FormulaRewrite(name, entry.rhs, entry.lhs),
+        )
+        for rewrite in self._rewrites[name]:
+            self._index.insert(rewrite.pattern, rewrite)
+            self._matchers[id(rewrite.pattern)] = (
+                rewrite.pattern,
+                compile_pattern(rewrite.pattern),
+            )
+
     def __getitem__(self, formula_name: str) -> FormulaEntry:
-        for category in self._formulas.values():
-            if formula_name in category:
-                return category[formula_name]
-        raise KeyError(f"No formula {formula_name}")
+        if formula_name not in self._entries:
+            raise KeyError(f"No formula {formula_name}")
+        return self._entries[formula_name]
 
     def __contains__(self, formula_name: str) -> bool:
-        return any(formula_name in category for category in self._formulas.values())
+        return formula_name in self._entries
+
+    def rewrites(self, formula_name: str) -> tuple[FormulaRewrite, ...]:
+        """
+        Returns both directions of the formula, lhs -> rhs first.
+        """
+        return self._rewrites[formula_name]
+
+    def matcher(self, pattern: Node) -> Matcher:
+        """
+        Returns the matcher compiled at registration, patterns of no formula
+        are compiled on every call.
+        """
+        if (compiled := self._matchers.get(id(pattern))) is not None:
+            return compiled[1]
+        return compile_pattern(pattern)
+
+    def candidates(
+        self, node: Node, formula_name: str | None = None
+    ) -> list[FormulaRewrite]:
+        """
+        Returns rewrites whose pattern has the shape of `node`, in registration
+        order, optionally only of one formula. Both directions of a formula
+        are indexed.
+        """
+        found = self._index.candidates(node)
+        if formula_name is None:
+            return found
+        return [rewrite for rewrite in found if rewrite.name == formula_name]
 
     def items(self):
         return self._formulas.items()
@@ -0,0 +1,124 @@
+from __future__ import annotations
+from typing import Generic, Hashable, NamedTuple, TypeVar
+
+from backend.internal.math_builtins.formula_node import WildNode
+from backend.internal.expression_tree import Node, Add, Mul, Pow, Numeric, Symbol
+
+V = TypeVar("V")
+
+
+class FormulaRewrite(NamedTuple):
+    """
+    One direction of a formula: a subtree matching `pattern` can be
+    rewritten to `replacement`.
+    """
+
+    name: str
+    pattern: Node
+    replacement: Node
+
+
+class _TrieNode(Generic[V]):
+    __slots__ = ("children", "wild", "values")
+
+    def __init__(self) -> None:
+        self.children: dict[Hashable, _TrieNode[V]] = {}
+        self.wild: _TrieNode[V] | None = None
+        self.values: list[tuple[int, V]] = []
+
+
+# Subject nodes still to be visited, as a linked list: (node, rest)
+_Pending = tuple[Node, "_Pending"] | None
+
+
+class FormulaIndex(Generic[V]):
+    """
+    Discrimination tree over formula patterns.
+
+    Every pattern is stored as its preorder sequence of node heads
+    (`Add`, `Mul`, `Pow`, the value of a `Numeric`, the name of a `Symbol`),
+    with a `WildNode` standing for a whole subtree. Looking up a subject
+    walks the tree once along the subject's preorder, so only patterns
+    sharing its shape are visited instead of every registered one.
+
+    Heads follow the rule of `compile_pattern`, so the candidates are a
+    superset of the matching patterns: the index only doesn't check that a
+    repeated WildNode binds the same subtree every time.
+    """
+
+    def __init__(self) -> None:
+        self._root: _TrieNode[V] = _TrieNode()
+        self._size = 0
+
+    def insert(self, pattern: Node, value: V) -> None:
+        trie = self._root
+        for key in _preorder_keys(pattern):
+            if key is None:
+                if trie.wild is None:
+                    trie.wild = _TrieNode()
+                trie = trie.wild
+            else:
+                trie = trie.children.setdefault(key, _TrieNode())
+        trie.values.append((self._size, value))
+        self._size += 1
+
+    def candidates(self, node: Node) -> list[V]:
+        """
+        Returns values of all patterns that can match `node`, in insertion order.
+        """
+        found: list[tuple[int, V]] = []
+        stack: list[tuple[_TrieNode[V], _Pending]] = [(self._root, (node, None))]
+        while stack:
+            trie, pending = stack.pop()
+            if pending is None:
+                found.extend(trie.values)
+                continue
+
+            subject, rest = pending
+            if trie.wild is not None:
+                stack.append((trie.wild, rest))
+            if (child := trie.children.get(_head_key(subject))) is not None:
+                stack.append((child, _push_children(subject, rest)))
+
+        found.sort(key=lambda item: item[0])
+        return [value for _, value in found]
+
+    def __len__(self) -> int:
+        return self._size
+
+
+def _head_key(node: Node) -> Hashable:
+    match node:
+        case Add() | Mul() | Pow():
+            return type(node)
+        case Numeric(value):
+            return (Numeric, value)
+        case Symbol(name):
+            return (Symbol, name)
+    return (type(node), id(node))
+
+
+def _preorder_keys(pattern: Node) -> list[Hashable | None]:
+    """
+    Keys of `pattern` in preorder, None stands for a WildNode.
+    """
+    keys: list[Hashable | None] = []
+    stack = [pattern]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, WildNode):
+            keys.append(None)
+            continue
+        keys.append(_head_key(node))
+        match node:
+            case Add(left, right) | Mul(left, right) | Pow(left, right):
+                stack.append(right)
+                stack.append(left)
+    return keys
+
+
+def _push_children(node: Node, rest: _Pending) -> _Pending:
+    match node:
+        case Add(left, right) | Mul(left, right) | Pow(left, right):
+            return (left, (right, rest))
+    return rest
@@ -12,6 +12,9 @@ class WildNode(Node):
         _ = other
         return True
 
+    def __hash__(self) -> int:
+        return hash(("WildNode", self.tag))
+
     def __repr__(self) -> str:
         return f"WILDNODE({self.tag!r})"
 
@@ -1,4 +1,8 @@
+import threading
+import weakref
+from collections import OrderedDict
 from typing import Callable, Protocol, TypeVar
+from backend.internal.budget import charge
 from backend.internal.math_builtins.builtins_error import (
     BuiltinsError,
     NotMatchingFormula,
@@ -7,7 +11,9 @@ from backend.internal.math_builtins.builtins_error import (
 from backend.internal.math_builtins.formula_entry import FormulaEntry
 from backend.internal.math_builtins.formula_handler import FORMULA_MAP
 from backend.internal.math_builtins.formula_node import WildNode
-from backend.internal.expression_tree import Node, Mul, Pow, Add, Numeric
+from backend.internal.math_builtins.pattern_compiler import Mismatch
+from backend.internal.expression_tree import Node, Mul, Pow, Add
+from backend.internal.expression_tree.node import is_ground, node_size
 
 
 class TupleProtocol(Protocol):
@@ -20,16 +26,39 @@ class TupleProtocol(Protocol):
 
 T = TypeVar("T", bound=TupleProtocol)
 
+# Number of (formula, pattern, subtree) bindings kept by `BuiltIns._bind_formula`
+BIND_CACHE_SIZE = 4096
+
 
 class BuiltIns:
     @staticmethod
     def is_present(name: str) -> bool:
         return name in FORMULA_MAP
 
+    @staticmethod
+    def matching_formulas(node: Node) -> list[str]:
+        """
+        Names of formulas that can be applied to `node` itself, in either direction.
+        """
+        names: list[str] = []
+        for rewrite in FORMULA_MAP.candidates(node):
+            if rewrite.name in names:
+                continue
+            bound = BuiltIns._bind_formula(rewrite.name, node, rewrite.pattern)
+            if not isinstance(bound, Mismatch):
+                names.append(rewrite.name)
+        return names
+
     @staticmethod
     def get_replacements(
         name: str, root: Node, params: list[Node], make_tuple: Callable[[Node, Node], T]
     ) -> list[T] | BuiltinsError:
+        if not params:
+            sites = BuiltIns.find_sites(name, root)
+            if not sites:
+                return NotMatchingFormula(BuiltIns.no_site_msg(name, root))
+            return [make_tuple(site, replacement) for site, replacement in sites]
+
         replacements: list[T] = []
         for param in params:
             match BuiltIns.get_replacement(name, root, param):
@@ -44,7 +73,10 @@ class BuiltIns:
         name: str, root: Node, param: Node | None
     ) -> Node | BuiltinsError:
         if not param:
-            raise NotImplementedError("Auto search param not implemented yet")
+            sites = BuiltIns.find_sites(name, root)
+            if not sites:
+                return NotMatchingFormula(BuiltIns.no_site_msg(name, root))
+            return sites[0][1]
 
         entry = FORMULA_MAP[name]
 
@@ -54,12 +86,68 @@ class BuiltIns:
 
         to_match, replacement = BuiltIns.get_match_and_replacement(param, entry)
 
-        match BuiltIns._bind_wildnodes(to_replace, to_match):
-            case NotMatchingFormula() as err:
-                return err
+        match BuiltIns._bind_formula(name, to_replace, to_match):
+            case Mismatch() as mismatch:
+                return mismatch.to_error(to_replace, name)
             case cache:
                 return BuiltIns._build_node(replacement, cache)
 
+    @staticmethod
+    def find_sites(
+        name: str, root: Node, first_only: bool = True
+    ) -> list[tuple[Node, Node]]:
+        """
+        Walks `root` once in preorder, matching formula `name` in either
+        direction at every node. A matched subtree isn't searched any deeper.
+
+        Subtrees smaller than the smallest pattern are skipped together with
+        their children, and only nodes of the type of a pattern root are matched.
+
+        Returns:
+            list[tuple[Node, Node]]: (site, replacement) pairs in preorder,
+            at most one with `first_only`.
+        """
+        rewrites = FORMULA_MAP.rewrites(name)
+        min_size = min(node_size(rewrite.pattern) for rewrite in rewrites)
+        heads = {type(rewrite.pattern) for rewrite in rewrites}
+
+        sites: list[tuple[Node, Node]] = []
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            charge()
+            if node_size(node) < min_size:
+                continue
+
+            if WildNode in heads or type(node) in heads:
+                replacement = BuiltIns._rewrite_site(name, node)
+                if replacement is not None:
+                    sites.append((node, replacement))
+                    if first_only:
+                        break
+                    continue
+
+            match node:
+                case Add(a, b) | Mul(a, b) | Pow(a, b):
+                    stack.append(b)
+                    stack.append(a)
+
+        return sites
+
+    @staticmethod
+    def _rewrite_site(name: str, node: Node) -> Node | None:
+        for rewrite in FORMULA_MAP.candidates(node, name):
+            match BuiltIns._bind_formula(name, node, rewrite.pattern):
+                case Mismatch():
+                    continue
+                case cache:
+                    return BuiltIns._build_node(rewrite.replacement, cache)
+        return None
+
+    @staticmethod
+    def no_site_msg(name: str, root: object) -> str:
+        return f"Cannot use {name} anywhere in {root}"
+
     @staticmethod
     def _find_match(node: Node, param: Node) -> Node | None:
         """
@@ -68,6 +156,7 @@ class BuiltIns:
         Returns:
             Node | None: the original node reference if found, or None otherwise.
         """
+        charge()
         if node == param:
             return node
 
@@ -90,55 +179,35 @@ class BuiltIns:
             to_match, replacement = replacement, to_match
         return to_match, replacement
 
+    @staticmethod
+    def _bind_formula(
+        name: str, node: Node, to_match: Node
+    ) -> dict[str, Node] | Mismatch:
+        """
+        `_bind_wildnodes` memoized per formula, pattern and subtree, without
+        building the user message of a mismatch. Subtrees
+        are interned, so the same subtree in a later statement or request
+        handled by this process hits the cache. Returned bindings are shared,
+        don't modify them.
+        """
+        if not is_ground(node):
+            return _bind(node, to_match)
+        return _cached_bind(name, node, to_match)
+
     @staticmethod
     def _bind_wildnodes(
         node: Node, to_match: Node
     ) -> dict[str, Node] | NotMatchingFormula:
         """
-        Recursively binds each WildNode in `to_match` to the corresponding node in `node`.
+        Binds each WildNode in `to_match` to the corresponding node in `node`,
+        using the matcher compiled from `to_match`.
         Fills cache with {tag: Node} pair.
         """
-        cache: dict[str, Node] = {}
-
-        def aux(node_, to_match_) -> NotMatchingFormula | None:
-            match node_, to_match_:
-                case Pow() as lhs, Pow() as rhs:
-                    if err := aux(lhs.base, rhs.base):
-                        return err
-                    if err := aux(lhs.exponent, rhs.exponent):
-                        return err
-
-                case (Add() as lhs, Add() as rhs) | (Mul() as lhs, Mul() as rhs):
-                    if err := aux(lhs.left, rhs.left):
-                        return err
-                    if err := aux(lhs.right, rhs.right):
-                        return err
-
-                case lhs, WildNode(tag) if tag not in cache:
-                    cache[tag] = lhs
-
-                case Numeric(lvalue), Numeric(rvalue) if lvalue != rvalue:
-                    return NotMatchingFormula(
-                        f"Cannot use this formula because {lvalue} and {rvalue} aren't the same"
-                    )
-
-                case lhs, WildNode(tag) if tag in cache and lhs != cache[tag]:
-                    return NotMatchingFormula(
-                        f"Cannot use this formula because {lhs} and {cache[tag]} aren't the same"
-                    )
-
-                case (Pow() | Add() | Mul()) as lhs, rhs if id(lhs) != id(
-                    rhs
-                ) and not isinstance(rhs, WildNode):
-                    return NotMatchingFormula(
-                        f"Cannot use this formula because {lhs} and {rhs} aren't the same"
-                    )
-
-            return None
-
-        if err := aux(node, to_match):
-            return err
-        return cache
+        match _bind(node, to_match):
+            case Mismatch() as mismatch:
+                return mismatch.to_error(node)
+            case cache:
+                return cache
 
     @staticmethod
     def _build_node(node: Node, cache: dict[str, Node]) -> Node:
@@ -151,6 +220,7 @@ class BuiltIns:
         Returns:
             Node: The reconstructed node tree with all WildNodes replaced.
         """
+        charge()
         if isinstance(node, WildNode):
             return cache[node.tag]
 
@@ -172,3 +242,66 @@ class BuiltIns:
                 )
 
         return node
+
+
+def _bind(node: Node, to_match: Node) -> dict[str, Node] | Mismatch:
+    cache: dict[str, Node] = {}
+    if mismatch := FORMULA_MAP.matcher(to_match)(node, cache):
+        return mismatch
+    return cache
+
+
+class BindCache:
+    """
+    LRU cache of bindings keyed by the identity of the interned subtree and
+    of the pattern, so a lookup never compares trees structurally and `2`
+    doesn't share an entry with `2.0`. Entries keep a weak reference to the
+    subtree, an entry whose subtree is gone doesn't match a new one reusing
+    its id.
+
+    Patterns are the registered ones, kept alive by `FORMULA_MAP`.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self._max_entries = max_entries
+        self._entries: OrderedDict[
+            tuple[str, int, int], tuple[weakref.ref[Node], dict[str, Node] | Mismatch]
+        ] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def bind(self, name: str, node: Node, to_match: Node) -> dict[str, Node] | Mismatch:
+        key = (name, id(node), id(to_match))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0]() is node:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry[1]
+            self.misses += 1
+
+        bound = _bind(node, to_match)
+
+        with self._lock:
+            self._entries[key] = (weakref.ref(node), bound)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return bound
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_BIND_CACHE = BindCache(BIND_CACHE_SIZE)
+
+
+def _cached_bind(name: str, node: Node, to_match: Node) -> dict[str, Node] | Mismatch:
+    return _BIND_CACHE.bind(name, node, to_match)
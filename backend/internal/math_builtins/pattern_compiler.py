@@ -0,0 +1,106 @@
+from typing import Callable, NamedTuple, TypeAlias
+
+from backend.internal.math_builtins.builtins_error import NotMatchingFormula
+from backend.internal.math_builtins.formula_node import WildNode
+from backend.internal.expression_tree import Node, Add, Mul, Pow, Numeric
+from backend.internal.expression_tree.node import is_ground
+
+
+
+class Mismatch(NamedTuple):
+    """
+    First pair of values that didn't match. The user message is only built
+    when needed, formatting nodes costs more than matching them.
+    """
+
+    lhs: object
+    rhs: object
+
+    def to_error(self, node: Node, name: str | None = None) -> NotMatchingFormula:
+        """
+        Message for matching formula `name` against `node`. A pattern still
+        holding WildNodes can't be printed, the whole node is named instead.
+        """
+        if isinstance(self.rhs, Node) and not is_ground(self.rhs):
+            formula = name if name is not None else "this formula"
+            return NotMatchingFormula(f"{node} doesn't have the form of {formula}")
+        return NotMatchingFormula(
+            f"Cannot use this formula because {self.lhs} and {self.rhs} aren't the same"
+        )
+
+
+# Binds WildNodes of the compiled pattern into the cache, returns the first mismatch
+Matcher: TypeAlias = Callable[[Node, dict[str, Node]], Mismatch | None]
+
+
+def compile_pattern(pattern: Node) -> Matcher:
+    """
+    Compiles `pattern` into a tree of closures specialized for each pattern
+    node, so matching doesn't go through a generic structural `match`.
+
+    A WildNode matches any subtree, every other pattern node only a node of
+    its type: a `Numeric` of the same value, an equal leaf, or a compound
+    whose children match. `FormulaIndex` filters candidates by the same rule.
+    """
+    match pattern:
+        case WildNode(tag):
+            return _compile_wildnode(tag)
+        case Pow(base, exponent):
+            return _compile_pow(pattern, compile_pattern(base), compile_pattern(exponent))
+        case Add(left, right) | Mul(left, right):
+            return _compile_binary(
+                pattern, type(pattern), compile_pattern(left), compile_pattern(right)
+            )
+        case Numeric(value):
+            return _compile_numeric(pattern, value)
+    return _compile_leaf(pattern)
+
+
+def _compile_wildnode(tag: str) -> Matcher:
+    def match_wildnode(node: Node, cache: dict[str, Node]) -> Mismatch | None:
+        bound = cache.get(tag)
+        if bound is None:
+            cache[tag] = node
+        elif node != bound:
+            return Mismatch(node, bound)
+        return None
+
+    return match_wildnode
+
+
+def _compile_pow(pattern: Node, match_base: Matcher, match_exponent: Matcher) -> Matcher:
+    def match_pow(node: Node, cache: dict[str, Node]) -> Mismatch | None:
+        if isinstance(node, Pow):
+            return match_base(node.base, cache) or match_exponent(node.exponent, cache)
+        return Mismatch(node, pattern)
+
+    return match_pow
+
+
+def _compile_binary(
+    pattern: Node, node_type: type[Add] | type[Mul], match_left: Matcher, match_right: Matcher
+) -> Matcher:
+    def match_binary(node: Node, cache: dict[str, Node]) -> Mismatch | None:
+        if isinstance(node, node_type):
+            return match_left(node.left, cache) or match_right(node.right, cache)
+        return Mismatch(node, pattern)
+
+    return match_binary
+
+
+def _compile_numeric(pattern: Node, value: float) -> Matcher:
+    def match_numeric(node: Node, cache: dict[str, Node]) -> Mismatch | None:
+        _ = cache
+        if isinstance(node, Numeric):
+            return Mismatch(node.value, value) if node.value != value else None
+        return Mismatch(node, pattern)
+
+    return match_numeric
+
+
+def _compile_leaf(pattern: Node) -> Matcher:
+    def match_leaf(node: Node, cache: dict[str, Node]) -> Mismatch | None:
+        _ = cache
+        return Mismatch(node, pattern) if node != pattern else None
+
+    return match_leaf
@@ -1,18 +1,24 @@
 from abc import ABC, abstractmethod
 from typing import Callable, Generator, NamedTuple
+from backend.internal.budget import charge
 from backend.internal.math_builtins import BuiltIns
 from backend.internal.expression_tree import Node, Add, Mul, Pow
-from backend.internal.math_builtins.builtins_error import BuiltinsError
+from backend.internal.math_builtins.builtins_error import BuiltinsError, NotMatchingFormula
 from backend.internal.objects import TransformObject, AtomTransformObject
 from backend.internal.objects import Object
 from backend.internal.objects.transform_object import FormulaObject
+from backend.internal.tokens.span import Span
 from backend.internal.tokens.token import TokenType
 
 
-TransformFn = Callable[[Node, TransformObject], Node | None]
+# A formula that can't be applied gives the reason instead of a node
+TransformFn = Callable[[Node, TransformObject], Node | BuiltinsError]
 
 
 class SubjectObject(Object, ABC):
+    # Source span of the statement the step comes from
+    span: Span | None = None
+
     @abstractmethod
     def __repr__(self) -> str:
         pass
@@ -29,6 +35,16 @@ class SubjectObject(Object, ABC):
     def apply(self, t_obj: TransformObject) -> None:
         pass
 
+    @abstractmethod
+    def snapshot(self) -> "SubjectObject":
+        """
+        Returns a copy to keep as a step. Nodes are interned and immutable,
+        so the copy shares its trees with this object: a step costs one
+        object whatever the tree size, and consecutive steps share every
+        subtree a transform didn't rebuild.
+        """
+        pass
+
     def _get_transformer(self, t_obj: TransformObject) -> TransformFn:
         match t_obj:
             case AtomTransformObject():
@@ -54,7 +70,7 @@ class SubjectObject(Object, ABC):
             case _:
                 assert False, "Unreachable"
 
-    def _handle_formula(self, value: Node, formula: TransformObject) -> Node | None:
+    def _handle_formula(self, value: Node, formula: TransformObject) -> Node | BuiltinsError:
         assert isinstance(formula, FormulaObject)
 
         ParamToReplace = NamedTuple(
@@ -72,9 +88,10 @@ class SubjectObject(Object, ABC):
         )
 
         if isinstance(replacements, BuiltinsError):
-            return None
+            return replacements
 
         def dfs_replace(node: Node, param: Node, replacement: Node) -> Node:
+            charge()
             if node == param:
                 return replacement
             match node:
@@ -114,12 +131,18 @@ class ExpressionObject(SubjectObject):
     def __iter__(self) -> Generator[Node, None, None]:
         yield self.value
 
+    def snapshot(self) -> "ExpressionObject":
+        copied = ExpressionObject(self.value)
+        copied.span = self.span
+        return copied
+
     def apply(self, t_obj: TransformObject) -> None:
         transformer = self._get_transformer(t_obj)
-        if result := transformer(self.value, t_obj):
-            self.value = result
-        else:
-            raise ValueError(f"Can't transform {str(t_obj)} on {str(self)}")
+        match transformer(self.value, t_obj):
+            case BuiltinsError(msg):
+                raise ValueError(msg)
+            case result:
+                self.value = result
 
 
 class EquationObject(SubjectObject):
@@ -139,25 +162,45 @@ class EquationObject(SubjectObject):
     def __iter__(self) -> Generator[Node, None, None]:
         return (i for i in (self.lhs, self.rhs))
 
+    def snapshot(self) -> "EquationObject":
+        copied = EquationObject(self.lhs, self.rhs)
+        copied.span = self.span
+        return copied
+
     def apply(self, t_obj: TransformObject) -> None:
         transformer = self._get_transformer(t_obj)
 
         result_lhs = transformer(self.lhs, t_obj)
         result_rhs = transformer(self.rhs, t_obj)
 
-        if not (result_lhs or result_rhs):
-            raise ValueError(f"Can't transform {str(t_obj)} on {str(self)}")
+        match result_lhs, result_rhs:
+            case BuiltinsError() as lhs_err, BuiltinsError() as rhs_err:
+                raise ValueError(self._formula_error(t_obj, lhs_err, rhs_err))
 
-        if result_lhs:
+        if not isinstance(result_lhs, BuiltinsError):
             self.lhs = result_lhs
-        if result_rhs:
+        if not isinstance(result_rhs, BuiltinsError):
             self.rhs = result_rhs
 
+    def _formula_error(
+        self, t_obj: TransformObject, lhs_err: BuiltinsError, rhs_err: BuiltinsError
+    ) -> str:
+        # The site search covered both sides, so it has no site in the whole equation
+        if (
+            isinstance(t_obj, FormulaObject)
+            and not t_obj.params
+            and isinstance(lhs_err, NotMatchingFormula)
+            and isinstance(rhs_err, NotMatchingFormula)
+        ):
+            return BuiltIns.no_site_msg(t_obj.name.literal, self)
+        return lhs_err.msg
+
 
 class ErrorObject(SubjectObject):
-    def __init__(self, msg: str) -> None:
+    def __init__(self, msg: str, span: Span | None = None) -> None:
         super().__init__()
         self.msg = msg
+        self.span = span
 
     def __repr__(self) -> str:
         return f"ERROR: {self.msg}"
@@ -171,6 +214,9 @@ class ErrorObject(SubjectObject):
     def __iter__(self) -> Generator[Node, None, None]:
         yield from ()
 
+    def snapshot(self) -> "ErrorObject":
+        return ErrorObject(self.msg, self.span)
+
     def apply(self, t_obj: TransformObject) -> None:
         _ = t_obj
         assert False, "Can't transform error"
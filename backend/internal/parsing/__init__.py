@@ -1,7 +1,19 @@
 from .parser import Parser
 from .parseerror import ParseErr
+from .builders import ExpressionBuilder, AstBuilder, NodeBuilder, AST_BUILDER, NODE_BUILDER
+from .line_cache import LineParseCache, ParseCacheStats, PARSE_CACHE, parse_program, iter_statements
 
 __all__ = [
     "Parser",
     "ParseErr",
+    "ExpressionBuilder",
+    "AstBuilder",
+    "NodeBuilder",
+    "AST_BUILDER",
+    "NODE_BUILDER",
+    "LineParseCache",
+    "ParseCacheStats",
+    "PARSE_CACHE",
+    "parse_program",
+    "iter_statements",
 ]
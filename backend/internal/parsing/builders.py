@@ -0,0 +1,83 @@
+from abc import ABC, abstractmethod
+
+from backend.internal.expression_tree import Node, Numeric, Symbol
+from backend.internal.expression_tree.converter import INFIX_CONVERTERS, PREFIX_CONVERTERS
+from backend.internal.expressions import Expression, Identifier, Infix, Number, Prefix
+from backend.internal.tokens import Token
+
+
+class ExpressionBuilder(ABC):
+    """
+    Builds the values of parsed expressions, the parser only decides their shape.
+    """
+
+    @abstractmethod
+    def number(self, value: float) -> Expression | Node:
+        pass
+
+    @abstractmethod
+    def identifier(self, name: Token) -> Expression | Node:
+        pass
+
+    @abstractmethod
+    def prefix(self, operator: Token, expr: Expression | Node) -> Expression | Node:
+        pass
+
+    @abstractmethod
+    def infix(
+        self, operator: Token, lhs: Expression | Node, rhs: Expression | Node
+    ) -> Expression | Node:
+        pass
+
+
+class AstBuilder(ExpressionBuilder):
+    """
+    Builds the `Expression` AST.
+    """
+
+    def number(self, value: float) -> Expression:
+        return Number(value)
+
+    def identifier(self, name: Token) -> Expression:
+        return Identifier(name)
+
+    def prefix(self, operator: Token, expr: Expression | Node) -> Expression:
+        return Prefix(operator, expr)  # type: ignore[arg-type]
+
+    def infix(self, operator: Token, lhs: Expression | Node, rhs: Expression | Node) -> Expression:
+        return Infix(operator, lhs, rhs)  # type: ignore[arg-type]
+
+
+class NodeBuilder(ExpressionBuilder):
+    """
+    Builds expression tree nodes directly with the converters of
+    `convert_to_expression_tree`.
+
+    Operators without a converter, e.g. relations, stay an `Infix` or a
+    `Prefix` of trees and so does anything built on top of one, which
+    `convert_to_expression_tree` rejects the same way as in the AST.
+    """
+
+    def number(self, value: float) -> Node:
+        return Numeric(value)
+
+    def identifier(self, name: Token) -> Node:
+        return Symbol(name.literal)
+
+    def prefix(self, operator: Token, expr: Expression | Node) -> Expression | Node:
+        converter = PREFIX_CONVERTERS.get(operator.ttype)
+        if converter is None or not isinstance(expr, Node):
+            return Prefix(operator, expr)  # type: ignore[arg-type]
+        return converter(expr)
+
+    def infix(
+        self, operator: Token, lhs: Expression | Node, rhs: Expression | Node
+    ) -> Expression | Node:
+        converter = INFIX_CONVERTERS.get(operator.ttype)
+        if converter is None or not isinstance(lhs, Node) or not isinstance(rhs, Node):
+            return Infix(operator, lhs, rhs)  # type: ignore[arg-type]
+        return converter(lhs, rhs)
+
+
+AST_BUILDER = AstBuilder()
+NODE_BUILDER = NodeBuilder()
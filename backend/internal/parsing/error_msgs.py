@@ -21,7 +21,7 @@ class ParserErrorUserMsg:
         return f"Extra character: {next_str} after the expression. Maybe move to next line?"
 
     @staticmethod
-    def missing_rhs_in_expr(lhs: str, op: str) -> str:
+    def missing_rhs_in_expr(lhs: object, op: str) -> str:
         return f"The expression `{lhs} {op}` is incomplete, something should come after the operator"
 
     @staticmethod
@@ -0,0 +1,210 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor
+from itertools import repeat
+from typing import Iterable, Iterator, NamedTuple
+
+from backend.internal.ast import Program
+from backend.internal.lexing import Lexer
+from backend.internal.parsing.builders import ExpressionBuilder, AST_BUILDER, NODE_BUILDER
+from backend.internal.parsing.parser import Parser
+from backend.internal.statements import Statement, LineError
+from backend.internal.tokenstreams import TokenStream
+
+
+class ParseCacheStats(NamedTuple):
+    hits: int
+    misses: int
+    size: int
+    max_entries: int
+
+
+class LineParseCache:
+    """
+    LRU cache of parsed lines, keyed by the normalized line text. Programs
+    repeat the same lines (`/2`, `!simplify`, ...) all the time, so only
+    lines never seen before reach the parser.
+
+    Cached statements are shared between programs and must not be modified.
+    Expressions are built by `builder`, see `Parser`.
+    """
+
+    def __init__(self, max_entries: int = 8192, builder: ExpressionBuilder = AST_BUILDER) -> None:
+        self._max_entries = max_entries
+        self._builder = builder
+        self._lines: OrderedDict[str, Statement | None] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def parse_line(self, line: str, offset: int = 0) -> Statement | None:
+        """
+        Parses one line of a program, with its new line character unless it
+        is the last line. Returns None for an empty last line, which
+        `Parser.parse` skips too.
+
+        `offset` is where the line starts in the program, the span of the
+        statement is relative to it.
+        """
+        key = normalize_line(line)
+        offset += leading_blanks(line)
+        with self._lock:
+            if key in self._lines:
+                self._hits += 1
+                self._lines.move_to_end(key)
+                return _moved(self._lines[key], offset)
+            self._misses += 1
+
+        stmt = _parse_line(key, self._builder)
+
+        with self._lock:
+            self._store(key, stmt)
+        return _moved(stmt, offset)
+
+    def parse_lines(
+        self, lines: list[str], executor: Executor | None = None
+    ) -> list[Statement | None]:
+        """
+        Parses the lines of one program at once. Lines missing from the cache
+        are parsed independently of each other, on `executor` if given.
+        """
+        keys = [normalize_line(line) for line in lines]
+        # Hits are taken right away, other threads may evict them while the rest is parsed
+        with self._lock:
+            found = {key: self._lines[key] for key in keys if key in self._lines}
+            missing = list(dict.fromkeys(key for key in keys if key not in found))
+            self._misses += len(missing)
+            self._hits += len(keys) - len(missing)
+
+        if executor is None or len(missing) < 2:
+            parsed = [_parse_line(key, self._builder) for key in missing]
+        else:
+            parsed = list(executor.map(_parse_line, missing, repeat(self._builder)))
+        found.update(zip(missing, parsed))
+
+        with self._lock:
+            for key in keys:
+                self._store(key, found[key])
+        return [
+            _moved(found[key], offset + leading_blanks(line))
+            for key, line, offset in zip(keys, lines, line_offsets(lines))
+        ]
+
+    def stats(self) -> ParseCacheStats:
+        with self._lock:
+            return ParseCacheStats(self._hits, self._misses, len(self._lines), self._max_entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lines.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def _store(self, key: str, stmt: Statement | None) -> None:
+        self._lines[key] = stmt
+        self._lines.move_to_end(key)
+        while len(self._lines) > self._max_entries:
+            self._lines.popitem(last=False)
+
+
+# The evaluator takes expression trees as they are, skipping the AST
+PARSE_CACHE = LineParseCache(builder=NODE_BUILDER)
+
+
+def parse_program(
+    input: str, cache: LineParseCache = PARSE_CACHE, executor: Executor | None = None
+) -> Program:
+    """
+    Parses the program line by line through `cache`. Gives the same program
+    as `Parser.parse`, stopping after the first line that fails to parse.
+
+    Every `\\n` in the source is a `NEW_LINE` token and a statement never
+    spans lines, so the lines are independent. With `executor` they are all
+    parsed up front in parallel, including the ones after a failing line.
+    """
+    if executor is None:
+        stmts = iter_statements(input, cache)
+    else:
+        stmts = _until_error(cache.parse_lines(split_lines(input), executor))
+
+    program = Program()
+    for stmt in stmts:
+        program.append(stmt)
+    return program
+
+
+def iter_statements(input: str, cache: LineParseCache = PARSE_CACHE) -> Iterator[Statement]:
+    """
+    Lazy version of `parse_program`, a line is parsed only once the
+    previous statement has been consumed.
+    """
+    lines = split_lines(input)
+    yield from _until_error(map(cache.parse_line, lines, line_offsets(lines)))
+
+
+def _until_error(stmts: Iterable[Statement | None]) -> Iterator[Statement]:
+    for stmt in stmts:
+        if stmt is None:
+            continue
+        yield stmt
+        if isinstance(stmt, LineError):
+            break
+
+
+def split_lines(input: str) -> list[str]:
+    """
+    Splits the program into lines, each one keeping its new line character.
+    A blank last line is dropped, the same way `Parser.parse` ignores it.
+    """
+    lines = [line + "\n" for line in input.split("\n")]
+    lines[-1] = lines[-1][:-1]
+    if is_blank(lines[-1]):
+        lines.pop()
+    return lines
+
+
+def line_offsets(lines: list[str]) -> list[int]:
+    offsets: list[int] = []
+    offset = 0
+    for line in lines:
+        offsets.append(offset)
+        offset += len(line)
+    return offsets
+
+
+def normalize_line(line: str) -> str:
+    """
+    Strips whitespace around the line, which the lexer skips anyway.
+    """
+    if line.endswith("\n"):
+        return line[:-1].strip(" \r\t") + "\n"
+    return line.strip(" \r\t")
+
+
+def leading_blanks(line: str) -> int:
+    """
+    Number of characters `normalize_line` strips from the start of the line.
+    """
+    return len(line) - len(line.lstrip(" \r\t"))
+
+
+def is_blank(line: str) -> bool:
+    return not line.strip(" \r\t")
+
+
+def _moved(stmt: Statement | None, offset: int) -> Statement | None:
+    return stmt.at(offset) if stmt is not None else None
+
+
+def _parse_line(line: str, builder: ExpressionBuilder) -> Statement | None:
+    stmts = Parser(TokenStream(Lexer(line), compact=True), builder).parse().get()
+    assert len(stmts) <= 1, "single line must parse to at most one statement"
+    if not stmts:
+        return None
+    # Error messages quote the AST of the expression parsed so far
+    if isinstance(stmts[0], LineError) and builder is not AST_BUILDER:
+        return _parse_line(line, AST_BUILDER)
+    return stmts[0]
@@ -1,6 +1,26 @@
-from typing import Any
+import os
+from typing import Any, Callable, TypeAlias
 
 from backend.internal.parsing.error_msgs import ErrorPrecedence
+from backend.internal.tokens import Span
+
+# Debug frames only show up in `repr`, production can skip recording them
+RECORD_FRAMES: bool = os.environ.get("PARSER_DEBUG_FRAMES", "1") != "0"
+
+# Message formatter with its arguments, called only once the message is shown
+DeferredMsg: TypeAlias = tuple[Callable[..., str], tuple[Any, ...]]
+Msg: TypeAlias = str | DeferredMsg
+
+
+def deferred(fn: Callable[..., str], *args: Any) -> DeferredMsg:
+    return fn, args
+
+
+def render_msg(msg: Msg) -> str:
+    if isinstance(msg, str):
+        return msg
+    fn, args = msg
+    return fn(*args)
 
 
 class StackFrame:
@@ -14,35 +34,58 @@ class StackFrame:
 
 
 class ParseErr:
+    """
+    Messages may be given as `deferred` formatters, and frames are kept as
+    plain tuples; both are turned into strings only when the error is printed.
+
+    `span` is where in the source the error is, when known.
+    """
+
     def __init__(
         self,
-        user_msg: str,
-        msg: str,
+        user_msg: Msg,
+        msg: Msg,
         precedence: ErrorPrecedence = ErrorPrecedence.LOWEST,
+        span: Span | None = None,
     ) -> None:
         self._user_msg = user_msg
         self._msg = msg
-        self._frames: list[StackFrame] = []
+        self.span = span
+        self._frames: list[tuple[str, tuple]] = []
         self._precedence = precedence
 
-    def __str__(self) -> str:
+    @property
+    def user_msg(self) -> str:
+        if not isinstance(self._user_msg, str):
+            self._user_msg = render_msg(self._user_msg)
         return self._user_msg
 
+    @property
+    def msg(self) -> str:
+        if not isinstance(self._msg, str):
+            self._msg = render_msg(self._msg)
+        return self._msg
+
+    def __str__(self) -> str:
+        return self.user_msg
+
     def __repr__(self) -> str:
         if self._frames:
-            lines = "\n".join(f"|{repr(frame):>60}|" for frame in self._frames)
-            return f"{lines}\n|{self._msg:>60}|\n| STR:{str(self._user_msg):>55}|"
-        return self._msg
+            frames = (StackFrame(name, args) for name, args in self._frames)
+            lines = "\n".join(f"|{repr(frame):>60}|" for frame in frames)
+            return f"{lines}\n|{self.msg:>60}|\n| STR:{self.user_msg:>55}|"
+        return self.msg
 
     def __eq__(self, other) -> bool:
         if not isinstance(other, ParseErr):
             return False
-        return self._msg == other._msg
+        return self.msg == other.msg
 
     def append(self, frame: str, *args) -> None:
-        self._frames.append(StackFrame(frame, args))
+        if RECORD_FRAMES:
+            self._frames.append((frame, args))
 
-    def more_precise_user_msg(self, msg: str, precedence: ErrorPrecedence) -> None:
+    def more_precise_user_msg(self, msg: Msg, precedence: ErrorPrecedence) -> None:
         if precedence > self._precedence:
             self._user_msg = msg
 
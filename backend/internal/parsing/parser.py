@@ -1,5 +1,5 @@
 from enum import IntEnum, auto, unique
-from typing import Callable, Optional
+from typing import Callable, NamedTuple, Optional
 
 from backend.internal.parsing.error_msgs import ErrorPrecedence, ParserErrorUserMsg
 from backend.internal.statements import (
@@ -9,9 +9,11 @@ from backend.internal.statements import (
     AtomTransform,
     LineError,
 )
-from backend.internal.expressions import Expression, Identifier, Number, Prefix, Infix
-from backend.internal.parsing.parseerror import ParseErr
-from backend.internal.tokens import Token, TokenType, token
+from backend.internal.expressions import Expression
+from backend.internal.expression_tree import Node
+from backend.internal.parsing.builders import ExpressionBuilder, AST_BUILDER
+from backend.internal.parsing.parseerror import ParseErr, deferred
+from backend.internal.tokens import Token, TokenType, Span, token
 from backend.internal.tokenstreams import TokenStream
 from backend.internal.ast import Program
 
@@ -38,34 +40,85 @@ precedences: dict[TokenType, Precedence] = {
     TokenType.CARET: Precedence.POWER,
 }
 
-prefix_expr_fn = Callable[[], Expression | ParseErr]
-infix_expr_fn = Callable[[Expression], Expression | ParseErr]
+prefix_expr_fn = Callable[[], Expression | Node | ParseErr]
 prefix_atom_fn = Callable[[], Statement | ParseErr]
 
 
+@unique
+class Nesting(IntEnum):
+    """
+    Kinds of sub-expressions the Pratt loop descends into.
+    """
+
+    PREFIX = auto()
+    GROUP = auto()
+    INFIX = auto()
+
+
+# Prefix tokens followed by a nested expression, with its binding power
+nesting_prefixes: dict[TokenType, tuple[Nesting, Precedence]] = {
+    TokenType.MINUS: (Nesting.PREFIX, Precedence.PREFIX),
+    TokenType.LPAREN: (Nesting.GROUP, Precedence.LOWEST),
+}
+
+
+class _Pending(NamedTuple):
+    """
+    Expression waiting on its nested sub-expression, `precedence` is the
+    binding power of the waiting expression itself.
+    """
+
+    nesting: Nesting
+    precedence: Precedence
+    operator: Token
+    lhs: Expression | Node | None
+
+
+@unique
+class _Step(IntEnum):
+    ENTER = auto()
+    AFTER_PREFIX = auto()
+    INFIX_LOOP = auto()
+    RETURN = auto()
+
+
 class Parser:
-    def __init__(self, stream: TokenStream) -> None:
+    """
+    Expressions are built by `builder`, as the `Expression` AST by default
+    or as expression tree nodes with `NODE_BUILDER`.
+
+    Statements get the span of their tokens when the stream knows spans,
+    i.e. it is compact. A `LineError` gets the span of the failing token.
+    """
+
+    def __init__(self, stream: TokenStream, builder: ExpressionBuilder = AST_BUILDER) -> None:
         self._stream = stream
+        self._builder = builder
         self._current: Optional[Token] = None
         self._peek: Optional[Token] = None
+        self._current_span: Span | None = None
+        self._peek_span: Span | None = None
+        # Span of the last token that wasn't a line end
+        self._last_span: Span | None = None
 
+        # Prefixes of a single token, the nested ones are in `nesting_prefixes`
         self._prefix_fns: dict[TokenType, prefix_expr_fn] = {
             TokenType.IDENT: self._parse_identifier,
             TokenType.NUMBER: self._parse_number,
-            TokenType.MINUS: self._parse_prefix_epxr,
-            TokenType.LPAREN: self._parse_grouped_expr,
             TokenType.ILLEGAL: self._parse_illegal,
         }
-        self._infix_fns: dict[TokenType, infix_expr_fn] = {
-            TokenType.EQUALS: self._parse_infix_expr,
-            TokenType.LT: self._parse_infix_expr,
-            TokenType.GT: self._parse_infix_expr,
-            TokenType.PLUS: self._parse_infix_expr,
-            TokenType.MINUS: self._parse_infix_expr,
-            TokenType.ASTERISK: self._parse_infix_expr,
-            TokenType.SLASH: self._parse_infix_expr,
-            TokenType.CARET: self._parse_infix_expr,
-        }
+        self._infix_operators: frozenset[TokenType] = frozenset(
+            {
+                TokenType.EQUALS,
+                TokenType.LT,
+                TokenType.GT,
+                TokenType.PLUS,
+                TokenType.MINUS,
+                TokenType.ASTERISK,
+                TokenType.SLASH,
+                TokenType.CARET,
+            }
+        )
         self._atom_fns: dict[TokenType, prefix_atom_fn] = {
             TokenType.NUMBER: self._parse_atom_div,
             TokenType.IDENT: self._parse_atom_div,
@@ -84,18 +137,22 @@ class Parser:
         assert self._current
         program = Program()
         while self._current.ttype != TokenType.EOF:
+            start = self._current_span
             result = self._parse_statement()
             stmt = self._bind_statement(result)
             if isinstance(stmt, LineError):
                 program.append(stmt)
                 break
+            if start is not None and self._last_span is not None:
+                stmt.span = Span(start.start, self._last_span.end)
             if self._current.ttype == TokenType.NEW_LINE:
                 self._advance_token()
             elif self._current.ttype != TokenType.EOF:
                 assert self._peek
                 err = ParseErr(
-                    user_msg=ParserErrorUserMsg.extra_input_in_line(self._peek.literal),
-                    msg=ParserErrorUserMsg.extra_input_in_line(self._peek.literal),
+                    user_msg=deferred(ParserErrorUserMsg.extra_input_in_line, self._peek.literal),
+                    msg=deferred(ParserErrorUserMsg.extra_input_in_line, self._peek.literal),
+                    span=self._peek_span,
                 )
                 program.append(LineError(err))
                 break
@@ -112,7 +169,11 @@ class Parser:
 
     def _advance_token(self) -> None:
         self._current = self._peek
+        self._current_span = self._peek_span
+        if self._current is not None and not self._new_line_or_eof(self._current):
+            self._last_span = self._current_span
         self._peek = self._stream.next()
+        self._peek_span = self._stream.span()
 
     def _parse_statement(self) -> Statement | ParseErr:
         assert self._current
@@ -126,9 +187,10 @@ class Parser:
     def _parse_illegal(self) -> ParseErr:
         assert self._current
         err = ParseErr(
-            user_msg=ParserErrorUserMsg.illegal_str(self._current.literal),
-            msg=ParserErrorUserMsg.illegal_str(self._current.literal),
+            user_msg=deferred(ParserErrorUserMsg.illegal_str, self._current.literal),
+            msg=deferred(ParserErrorUserMsg.illegal_str, self._current.literal),
             precedence=ErrorPrecedence.ILLEGAL_CHAR,
+            span=self._current_span,
         )
         err.append("parse_illegal")
         return err
@@ -141,6 +203,7 @@ class Parser:
                 err = ParseErr(
                     user_msg=ParserErrorUserMsg.expected_expression_after("/"),
                     msg="No input after `/`",
+                    span=self._current_span,
                 )
                 err.append("_parse_atom_transform_statement")
                 return err
@@ -176,6 +239,7 @@ class Parser:
                     user_msg=ParserErrorUserMsg.no_formula_name(),
                     msg="No input after `!`",
                     precedence=ErrorPrecedence.MISSING_FORMULA_NAME,
+                    span=self._current_span,
                 )
 
     def _parse_subject(self) -> Statement | ParseErr:
@@ -204,6 +268,7 @@ class Parser:
                 err = ParseErr(
                     user_msg=ParserErrorUserMsg.missing_comma_in_formula(),
                     msg="No comma between params in formula",
+                    span=self._current_span,
                 )
                 return err
         return params
@@ -212,9 +277,10 @@ class Parser:
         assert self._current
         if self._current.ttype not in self._atom_fns:
             err = ParseErr(
-                user_msg=ParserErrorUserMsg.invalid_atom_prefix(self._current.literal),
+                user_msg=deferred(ParserErrorUserMsg.invalid_atom_prefix, self._current.literal),
                 msg=f"Error near: `{self._current.literal}`",
                 precedence=ErrorPrecedence.ILLEGAL_CHAR,
+                span=self._current_span,
             )
             err.append("parse_atom_transform", self._current)
             return err
@@ -225,36 +291,99 @@ class Parser:
             result.append("parse_atom_transform")
         return result
 
-    def _parse_identifier(self) -> Identifier:
+    def _parse_identifier(self) -> Expression | Node:
         assert self._current
-        return Identifier(self._current)
+        return self._builder.identifier(self._current)
 
-    def _parse_number(self) -> Number | ParseErr:
+    def _parse_number(self) -> Expression | Node | ParseErr:
         assert self._current
         try:
             num = float(self._current.literal)
-            return Number(num)
+            return self._builder.number(num)
         except ValueError:
             err = ParseErr(
                 user_msg=f"{self._current} is not number",
                 msg=f"Parsing number error for: {self._current.literal}",
+                span=self._current_span,
             )
             err.append("parse_number", self._current)
             return err
 
-    def _parse_expr(self, precedence: Precedence) -> Expression | ParseErr:
+    def _parse_expr(self, precedence: Precedence) -> Expression | Node | ParseErr:
+        """
+        Pratt loop on an explicit stack: a prefix `-`, a `(` or an infix
+        operator pushes the expression waiting on its operand instead of
+        recursing, so the nesting depth isn't bound by the recursion limit.
+        Error frames are appended as if every nested expression was a call.
+        """
+        pending: list[_Pending] = []
+        result: Expression | Node | ParseErr
+        lhs: Expression | Node
+        step = _Step.ENTER
+        while True:
+            assert self._current and self._peek
+            match step:
+                case _Step.ENTER:
+                    if self._current.ttype in nesting_prefixes:
+                        nesting, nested_precedence = nesting_prefixes[self._current.ttype]
+                        pending.append(_Pending(nesting, precedence, self._current, None))
+                        precedence = nested_precedence
+                        self._advance_token()
+                        continue
+                    result = self._parse_prefix()
+                    if isinstance(result, ParseErr):
+                        step = _Step.RETURN
+                        continue
+                    lhs = result
+                    step = _Step.AFTER_PREFIX
+
+                case _Step.AFTER_PREFIX:
+                    if self._peek.ttype == TokenType.ILLEGAL:
+                        self._advance_token()
+                        result = self._parse_illegal()
+                        step = _Step.RETURN
+                        continue
+                    step = _Step.INFIX_LOOP
+
+                case _Step.INFIX_LOOP:
+                    if (
+                        self._new_line_or_eof(self._peek)
+                        or precedence >= self._peek_precedence()
+                        or self._peek.ttype not in self._infix_operators
+                    ):
+                        result = lhs
+                        step = _Step.RETURN
+                        continue
+                    self._advance_token()
+                    pending.append(_Pending(Nesting.INFIX, precedence, self._current, lhs))
+                    precedence = self._current_precedence()
+                    self._advance_token()
+                    step = _Step.ENTER
+
+                case _Step.RETURN:
+                    if not pending:
+                        return result
+                    waiting = pending.pop()
+                    precedence = waiting.precedence
+                    result, step = self._resume(waiting, result)
+                    if not isinstance(result, ParseErr):
+                        lhs = result
+
+    def _parse_prefix(self) -> Expression | Node | ParseErr:
         assert self._current
         if self._current.ttype == TokenType.EOF:
             err = ParseErr(
                 user_msg=ParserErrorUserMsg.unexpected_eof(),
                 msg=f"Error near `{self._current.literal}`",
+                span=self._current_span,
             )
             err.append("EOF parse_expr")
             return err
         if self._current.ttype not in self._prefix_fns:
             err = ParseErr(
-                user_msg=ParserErrorUserMsg.invalid_prefix(self._current.literal),
+                user_msg=deferred(ParserErrorUserMsg.invalid_prefix, self._current.literal),
                 msg=f"Error near `{self._current.literal}`",
+                span=self._current_span,
             )
             err.append("no prefix fn in parse_expr", self._current)
             return err
@@ -262,76 +391,57 @@ class Parser:
         lhs = self._prefix_fns[self._current.ttype]()
         if isinstance(lhs, ParseErr):
             lhs.append("parse_expr", self._current)
-            return lhs
-
-        assert self._peek
-        if self._peek.ttype == TokenType.ILLEGAL:
-            self._advance_token()
-            return self._parse_illegal()
-
-        while (
-            not self._new_line_or_eof(self._peek)
-            and precedence < self._peek_precedence()
-        ):
-            if self._peek.ttype not in self._infix_fns:
-                return lhs
-            operator = self._peek
-            infix = self._infix_fns[operator.ttype]
-            self._advance_token()
-            next_lhs = infix(lhs)
-            if isinstance(next_lhs, ParseErr):
-                next_lhs.append("parse_expr")
-                next_lhs.more_precise_user_msg(
-                    ParserErrorUserMsg.missing_rhs_in_expr(
-                        str(lhs),
-                        operator.literal,
-                    ),
-                    ErrorPrecedence.MISSING_RHS_EXPR,
-                )
-                return next_lhs
-            lhs = next_lhs
         return lhs
 
-    def _parse_prefix_epxr(self) -> Expression | ParseErr:
-        assert self._current
-        operator = self._current
-        self._advance_token()
-        rhs = self._parse_expr(Precedence.PREFIX)
-        if isinstance(rhs, ParseErr):
-            rhs.append("prase_prefix_expression", self._current)
-            return rhs
-        return Prefix(operator, rhs)
-
-    def _parse_grouped_expr(self) -> Expression | ParseErr:
-        assert self._current
-        self._advance_token()
-        expr = self._parse_expr(Precedence.LOWEST)
-        if isinstance(expr, ParseErr):
-            expr.append("parse_grouped_expr", self._current)
-            return expr
-
-        assert self._peek
-        if self._peek.ttype != TokenType.RPAREN:
-            err = ParseErr(
-                user_msg=ParserErrorUserMsg.no_rparen(),
-                msg="Missing `)` in expr",
-                precedence=ErrorPrecedence.MISSING_RPAREN,
-            )
-            err.append("parse_grouped_expr", self._current)
-            return err
-        self._advance_token()
-        return expr
-
-    def _parse_infix_expr(self, lhs: Expression) -> Expression | ParseErr:
-        assert self._current
-        operator = self._current
-        precedence = self._current_precedence()
-        self._advance_token()
-        rhs = self._parse_expr(precedence)
-        if isinstance(rhs, ParseErr):
-            rhs.append("parse_infix_expr", self._current)
-            return rhs
-        return Infix(operator, lhs, rhs)
+    def _resume(
+        self, waiting: _Pending, operand: Expression | Node | ParseErr
+    ) -> tuple[Expression | Node | ParseErr, _Step]:
+        """
+        Completes `waiting` with its nested `operand` and tells where the
+        Pratt loop of the waiting expression continues.
+        """
+        match waiting.nesting:
+            case Nesting.PREFIX:
+                if isinstance(operand, ParseErr):
+                    operand.append("prase_prefix_expression", self._current)
+                    operand.append("parse_expr", self._current)
+                    return operand, _Step.RETURN
+                return self._builder.prefix(waiting.operator, operand), _Step.AFTER_PREFIX
+
+            case Nesting.GROUP:
+                if isinstance(operand, ParseErr):
+                    operand.append("parse_grouped_expr", self._current)
+                    operand.append("parse_expr", self._current)
+                    return operand, _Step.RETURN
+                assert self._peek
+                if self._peek.ttype != TokenType.RPAREN:
+                    err = ParseErr(
+                        user_msg=ParserErrorUserMsg.no_rparen(),
+                        msg="Missing `)` in expr",
+                        precedence=ErrorPrecedence.MISSING_RPAREN,
+                        span=self._current_span,
+                    )
+                    err.append("parse_grouped_expr", self._current)
+                    err.append("parse_expr", self._current)
+                    return err, _Step.RETURN
+                self._advance_token()
+                return operand, _Step.AFTER_PREFIX
+
+            case Nesting.INFIX:
+                assert waiting.lhs is not None
+                if isinstance(operand, ParseErr):
+                    operand.append("parse_infix_expr", self._current)
+                    operand.append("parse_expr")
+                    operand.more_precise_user_msg(
+                        deferred(
+                            ParserErrorUserMsg.missing_rhs_in_expr,
+                            waiting.lhs,
+                            waiting.operator.literal,
+                        ),
+                        ErrorPrecedence.MISSING_RHS_EXPR,
+                    )
+                    return operand, _Step.RETURN
+                return self._builder.infix(waiting.operator, waiting.lhs, operand), _Step.INFIX_LOOP
 
     def _parse_atom_div(self) -> Statement | ParseErr:
         assert self._current
@@ -350,7 +460,7 @@ class Parser:
         if isinstance(expr, ParseErr):
             expr.append("parse_atom", self._current)
             expr.more_precise_user_msg(
-                ParserErrorUserMsg.expected_expression_after(operator.literal),
+                deferred(ParserErrorUserMsg.expected_expression_after, operator.literal),
                 ErrorPrecedence.MISSING_EXPR,
             )
             return expr
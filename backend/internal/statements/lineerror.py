@@ -6,6 +6,7 @@ class LineError(Statement):
 
     def __init__(self, err) -> None:
         self._err = err
+        self.span = err.span
 
     def __eq__(self, other, /) -> bool:
         if not isinstance(other, LineError):
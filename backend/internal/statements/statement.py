@@ -1,7 +1,24 @@
+import copy
 from abc import ABC, abstractmethod
 
+from backend.internal.tokens import Span
+
 
 class Statement(ABC):
+    # Where the statement is in the source, where the error is for a `LineError`
+    span: Span | None = None
+
     @abstractmethod
     def __str__(self) -> str:
         pass
+
+    def at(self, offset: int) -> "Statement":
+        """
+        Returns the statement with its span moved by `offset`, a copy unless
+        there is nothing to move. Parsed statements may be shared.
+        """
+        if self.span is None or offset == 0:
+            return self
+        moved = copy.copy(self)
+        moved.span = self.span.shifted(offset)
+        return moved
@@ -3,6 +3,7 @@ from dataclasses import dataclass
 
 from backend.internal.expression_tree import FlattenNode, FlattenMul, FlattenAdd, FlattenSymbol, FlattenNumeric, FlattenPow
 from backend.internal.expression_tree.add_node import simplify
+from backend.pkg.api import compile_math_input
 
 
 @dataclass
@@ -322,6 +323,74 @@ CASES_ADVANCED = [
 
 ]
 
+CASES_NESTED = [
+    Case(
+        "Canonical order inside power base",
+        FlattenPow(
+            FlattenAdd([
+                FlattenNumeric(3),
+                FlattenMul([FlattenNumeric(-1), FlattenSymbol("x")]),
+            ]),
+            FlattenNumeric(3),
+        ),
+        FlattenPow(
+            FlattenAdd([
+                FlattenMul([FlattenNumeric(-1), FlattenSymbol("x")]),
+                FlattenNumeric(3),
+            ]),
+            FlattenNumeric(3),
+        ),
+    ),
+    Case(
+        "Constant fold inside power exponent",
+        FlattenPow(
+            FlattenSymbol("x"),
+            FlattenAdd([FlattenNumeric(1), FlattenNumeric(2)]),
+        ),
+        FlattenPow(FlattenSymbol("x"), FlattenNumeric(3)),
+    ),
+]
+
+
+CASES_POLYNOMIAL = [
+    Case(
+        "Expand product of sums",
+        FlattenMul([
+            FlattenAdd([FlattenSymbol("a"), FlattenSymbol("b")]),
+            FlattenAdd([FlattenSymbol("a"), FlattenSymbol("b")]),
+        ]),
+        FlattenAdd([
+            FlattenPow(FlattenSymbol("a"), FlattenNumeric(2)),
+            FlattenMul([FlattenNumeric(2), FlattenSymbol("a"), FlattenSymbol("b")]),
+            FlattenPow(FlattenSymbol("b"), FlattenNumeric(2)),
+        ]),
+    ),
+    Case(
+        "Like terms with factors in different order cancel out",
+        FlattenAdd([
+            FlattenMul([FlattenSymbol("x"), FlattenSymbol("y")]),
+            FlattenMul([FlattenNumeric(-1), FlattenSymbol("y"), FlattenSymbol("x")]),
+        ]),
+        FlattenNumeric(0),
+    ),
+    Case(
+        "Combine powers of a non-symbol base",
+        FlattenMul([
+            FlattenPow(FlattenAdd([FlattenSymbol("x"), FlattenNumeric(1)]), FlattenNumeric(2)),
+            FlattenPow(FlattenAdd([FlattenSymbol("x"), FlattenNumeric(1)]), FlattenNumeric(3)),
+        ]),
+        FlattenPow(FlattenAdd([FlattenSymbol("x"), FlattenNumeric(1)]), FlattenNumeric(5)),
+    ),
+    Case(
+        "Powers cancel out to constant",
+        FlattenMul([
+            FlattenNumeric(3),
+            FlattenSymbol("x"),
+            FlattenPow(FlattenSymbol("x"), FlattenNumeric(-1)),
+        ]),
+        FlattenNumeric(3),
+    ),
+]
 
 
 EXPRESSION_TREE_UT: list[Case] = []
@@ -330,9 +399,42 @@ EXPRESSION_TREE_UT.extend(CASES_DISTRIBUTE_MUL)
 EXPRESSION_TREE_UT.extend(CASES_COMBINE_POWERS)
 EXPRESSION_TREE_UT.extend(CASES_SIMPLE)
 EXPRESSION_TREE_UT.extend(CASES_ADVANCED)
+EXPRESSION_TREE_UT.extend(CASES_NESTED)
+EXPRESSION_TREE_UT.extend(CASES_POLYNOMIAL)
 
 
 @pytest.mark.parametrize("case", EXPRESSION_TREE_UT, ids=lambda c: c.name)
 def test_expression_tree(case: Case) -> None:
     result = simplify(case.input)
     assert result == case.expected, f"GOT: {result}, EXPECTED: {case.expected}"
+
+
+@pytest.mark.parametrize("case", EXPRESSION_TREE_UT, ids=lambda c: c.name)
+def test_simplify_is_idempotent(case: Case) -> None:
+    result = simplify(case.input)
+    assert simplify(result) is result
+    assert not result.dirty
+
+
+@dataclass
+class OutputCase:
+    name: str
+    input: str
+    expected: str
+
+
+# Output users see after `!simplify`, pins the canonical form of `Polynomial`
+CASES_SIMPLIFY_OUTPUT = [
+    # Powers with a numeric exponent aren't expanded, terms are ordered with the constant last
+    OutputCase("Power of a difference", "(3-x)^3", "(- x + 3) ^ 3"),
+    # Equal factors are combined into a power of the factor, whatever the factor is
+    OutputCase("Product of equal powers", "2^x*2^x", "(2 ^ x) ^ 2"),
+    OutputCase("Product of equal symbols", "x*x", "x ^ 2"),
+    OutputCase("Product of powers of a symbol", "x^2*x^3", "x ^ 5"),
+    OutputCase("Constant power folded", "2^3*x", "8 * x"),
+]
+
+
+@pytest.mark.parametrize("case", CASES_SIMPLIFY_OUTPUT, ids=lambda c: c.name)
+def test_simplify_output(case: OutputCase) -> None:
+    assert compile_math_input(f"{case.input}\n!simplify")[-1] == case.expected
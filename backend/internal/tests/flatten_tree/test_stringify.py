@@ -3,6 +3,8 @@ from dataclasses import dataclass
 
 from backend.internal.expression_tree import Node, Mul, Pow, Add, Numeric, Symbol
 from backend.internal.expression_tree import FlattenNode, FlattenMul, FlattenAdd, FlattenSymbol, FlattenNumeric, FlattenPow
+from backend.internal.evaluators.error_msgs import EvaluatorErrorUserMsg
+from backend.pkg.api import compile_math_input
 
 @dataclass
 class Case:
@@ -183,4 +185,41 @@ EXPRESSION_TREE_UT.extend(CASES_COMPLEX)
 
 @pytest.mark.parametrize("case", EXPRESSION_TREE_UT, ids=lambda c: c.name)
 def test_expression_tree(case: Case) -> None:
-    assert str(case.input) == case.expected
\ No newline at end of file
+    assert str(case.input) == case.expected
+
+# Nested deeper than the default recursion limit allows for recursive printing
+DEPTH = 1000
+
+
+@dataclass
+class DeepCase:
+    name: str
+    input: str
+    expected: list[str]
+
+
+CASES_DEEP = [
+    DeepCase("Long sum", "x" + "+x" * DEPTH, [" + ".join(["x"] * (DEPTH + 1))]),
+    DeepCase(
+        "Simplified long sum",
+        "x" + "+x" * DEPTH + "\n!simplify",
+        [" + ".join(["x"] * (DEPTH + 1)), f"{DEPTH + 1} * x"],
+    ),
+    DeepCase("Nested negation", "-(" * DEPTH + "x" + ")" * DEPTH, ["x" + " * -1" * DEPTH]),
+    DeepCase("Repeated negation", "-" * DEPTH + "x", ["x" + " * -1" * DEPTH]),
+    DeepCase(
+        "Power tower",
+        "x" + "^x" * DEPTH,
+        ["(" * (DEPTH - 1) + "x ^ x" + ") ^ x" * (DEPTH - 1)],
+    ),
+    DeepCase(
+        "Simplified power tower",
+        "x" + "^x" * DEPTH + "\n!simplify",
+        ["(" * (DEPTH - 1) + "x ^ x" + ") ^ x" * (DEPTH - 1), EvaluatorErrorUserMsg.too_complex()],
+    ),
+]
+
+
+@pytest.mark.parametrize("case", CASES_DEEP, ids=lambda c: c.name)
+def test_stringify_deep(case: DeepCase) -> None:
+    assert compile_math_input(case.input) == case.expected
@@ -0,0 +1,100 @@
+import pytest
+from typing import NamedTuple
+
+from backend.internal.expression_tree import Node, Add, Numeric, Symbol, Mul, Pow
+from backend.internal.math_builtins import BuiltIns
+from backend.internal.math_builtins.lookups import _BIND_CACHE
+
+
+class Case(NamedTuple):
+    name: str
+    formula_name: str
+    root: Node
+    expected: list[tuple[Node, Node]]
+
+
+a, b, c = Symbol("a"), Symbol("b"), Symbol("c")
+
+CASES_FIND_SITES: list[Case] = [
+    Case(
+        name="Root",
+        formula_name="product_of_powers",
+        root=Mul(Pow(a, Numeric(2.0)), Pow(a, Numeric(3.0))),
+        expected=[
+            (
+                Mul(Pow(a, Numeric(2.0)), Pow(a, Numeric(3.0))),
+                Pow(a, Add(Numeric(2.0), Numeric(3.0))),
+            )
+        ],
+    ),
+    Case(
+        name="Every site in preorder",
+        formula_name="power_of_a_power",
+        root=Add(Pow(Pow(a, Numeric(2.0)), b), Mul(c, Pow(Pow(b, c), a))),
+        expected=[
+            (Pow(Pow(a, Numeric(2.0)), b), Pow(a, Mul(Numeric(2.0), b))),
+            (Pow(Pow(b, c), a), Pow(b, Mul(c, a))),
+        ],
+    ),
+    Case(
+        name="Matched site isn't searched deeper",
+        formula_name="power_of_a_power",
+        root=Pow(Pow(Pow(a, b), c), a),
+        expected=[
+            (Pow(Pow(Pow(a, b), c), a), Pow(Pow(a, b), Mul(c, a))),
+        ],
+    ),
+    Case(
+        name="Repeated wildnode must bind the same subtree",
+        formula_name="product_of_powers",
+        root=Add(Mul(Pow(a, b), Pow(c, b)), Mul(Pow(c, b), Pow(c, a))),
+        expected=[
+            (Mul(Pow(c, b), Pow(c, a)), Pow(c, Add(b, a))),
+        ],
+    ),
+    Case(
+        name="Subject smaller than pattern",
+        formula_name="square_of_a_sum",
+        root=Add(a, b),
+        expected=[],
+    ),
+]
+
+
+@pytest.mark.parametrize("case", CASES_FIND_SITES, ids=lambda c: c.name)
+def test_find_sites(case: Case) -> None:
+    sites = BuiltIns.find_sites(case.formula_name, case.root, first_only=False)
+
+    assert sites == case.expected
+    for (site, _), (expected_site, _) in zip(sites, case.expected):
+        assert site is expected_site
+
+
+@pytest.mark.parametrize("case", CASES_FIND_SITES, ids=lambda c: c.name)
+def test_find_first_site(case: Case) -> None:
+    assert BuiltIns.find_sites(case.formula_name, case.root) == case.expected[:1]
+
+
+def test_bindings_are_reused() -> None:
+    root = Add(Symbol("__bind_cache__"), Mul(Pow(a, Numeric(7.0)), Pow(a, Numeric(9.0))))
+    _BIND_CACHE.clear()
+
+    first = BuiltIns.find_sites("product_of_powers", root)
+    misses = _BIND_CACHE.misses
+    second = BuiltIns.find_sites("product_of_powers", root)
+
+    assert first == second
+    assert _BIND_CACHE.misses == misses
+    assert _BIND_CACHE.hits >= 1
+
+
+def test_bindings_keyed_by_identity() -> None:
+    _BIND_CACHE.clear()
+
+    int_site = Mul(Pow(a, Numeric(2)), Pow(a, Numeric(3)))
+    float_site = Mul(Pow(a, Numeric(2.0)), Pow(a, Numeric(3.0)))
+    [(_, int_replacement)] = BuiltIns.find_sites("product_of_powers", int_site)
+    [(_, float_replacement)] = BuiltIns.find_sites("product_of_powers", float_site)
+
+    assert int_replacement is Pow(a, Add(Numeric(2), Numeric(3)))
+    assert float_replacement is Pow(a, Add(Numeric(2.0), Numeric(3.0)))
@@ -0,0 +1,123 @@
+import pytest
+from typing import NamedTuple
+
+from backend.internal.expression_tree import Node, Add, Numeric, Symbol, Mul, Pow
+from backend.internal.math_builtins import BuiltIns
+from backend.internal.math_builtins.builtins_error import BuiltinsError
+from backend.internal.math_builtins.formula_index import FormulaIndex
+from backend.internal.math_builtins.formula_handler import FORMULA_MAP
+from backend.internal.math_builtins.formula_node import WildNode
+from backend.internal.math_builtins.pattern_compiler import compile_pattern
+
+
+class Case(NamedTuple):
+    name: str
+    node: Node
+    expected: list[str]
+
+
+INDEX_PATTERNS: list[tuple[str, Node]] = [
+    ("any", WildNode("a")),
+    ("sum", Add(WildNode("a"), WildNode("b"))),
+    ("square", Pow(WildNode("a"), Numeric(2))),
+    ("square_of_sum", Pow(Add(WildNode("a"), WildNode("b")), Numeric(2))),
+    ("x_plus_one", Add(Symbol("x"), Numeric(1))),
+    ("twice", Add(WildNode("a"), WildNode("a"))),
+]
+
+CASES_INDEX_CANDIDATES: list[Case] = [
+    Case("Leaf", Symbol("x"), ["any"]),
+    Case("Sum", Add(Symbol("y"), Numeric(1)), ["any", "sum", "twice"]),
+    Case("Sum with symbol", Add(Symbol("x"), Numeric(1)), ["any", "sum", "x_plus_one", "twice"]),
+    Case("Sum with float", Add(Symbol("x"), Numeric(1.0)), ["any", "sum", "x_plus_one", "twice"]),
+    Case("Square", Pow(Symbol("x"), Numeric(2)), ["any", "square"]),
+    Case("Cube", Pow(Symbol("x"), Numeric(3)), ["any"]),
+    Case(
+        "Square of sum",
+        Pow(Add(Symbol("x"), Symbol("y")), Numeric(2)),
+        ["any", "square", "square_of_sum"],
+    ),
+    Case("Product", Mul(Symbol("x"), Symbol("y")), ["any"]),
+    Case("Power of symbol", Pow(Symbol("x"), Symbol("n")), ["any"]),
+    Case("Sum of symbols", Add(Symbol("x"), Symbol("y")), ["any", "sum", "twice"]),
+]
+
+
+@pytest.mark.parametrize("case", CASES_INDEX_CANDIDATES, ids=lambda c: c.name)
+def test_index_candidates(case: Case) -> None:
+    index: FormulaIndex[str] = FormulaIndex()
+    for name, pattern in INDEX_PATTERNS:
+        index.insert(pattern, name)
+
+    assert index.candidates(case.node) == case.expected
+
+
+@pytest.mark.parametrize("case", CASES_INDEX_CANDIDATES, ids=lambda c: c.name)
+def test_index_candidates_cover_matches(case: Case) -> None:
+    matching = [
+        name for name, pattern in INDEX_PATTERNS if compile_pattern(pattern)(case.node, {}) is None
+    ]
+
+    assert set(matching) <= set(case.expected)
+
+
+CASES_MATCHING_FORMULAS: list[Case] = [
+    Case(
+        "Product of powers",
+        Mul(Pow(Symbol("a"), Numeric(2.0)), Pow(Symbol("a"), Numeric(3.0))),
+        ["product_of_powers"],
+    ),
+    Case(
+        "Product of powers with different bases",
+        Mul(Pow(Symbol("a"), Numeric(2.0)), Pow(Symbol("b"), Numeric(3.0))),
+        [],
+    ),
+    Case(
+        "Square of a sum",
+        Pow(Add(Symbol("a"), Symbol("b")), Numeric(2.0)),
+        ["square_of_a_sum"],
+    ),
+    Case(
+        "Power of a power",
+        Pow(Pow(Symbol("a"), Numeric(2.0)), Symbol("b")),
+        ["power_of_a_power"],
+    ),
+    Case("Symbol", Symbol("a"), []),
+    Case(
+        "Square of a sum with symbol exponent",
+        Pow(Add(Symbol("a"), Symbol("b")), Symbol("n")),
+        [],
+    ),
+]
+
+
+@pytest.mark.parametrize("case", CASES_MATCHING_FORMULAS, ids=lambda c: c.name)
+def test_matching_formulas(case: Case) -> None:
+    assert BuiltIns.matching_formulas(case.node) == case.expected
+
+
+def test_numeric_leaf_formula_with_params() -> None:
+    root = Pow(Add(Symbol("a"), Symbol("b")), Symbol("n"))
+
+    assert BuiltIns.find_sites("square_of_a_sum", root) == []
+    match BuiltIns.get_replacement("square_of_a_sum", root, root):
+        case BuiltinsError(msg):
+            assert msg == "Cannot use this formula because n and 2 aren't the same"
+        case result:
+            pytest.fail(f"Expected an error, got {result}")
+
+
+@pytest.mark.parametrize("node", [Symbol("x"), Numeric(2.0)], ids=["Symbol", "Numeric"])
+def test_leaf_against_compound_formula(node: Node) -> None:
+    match BuiltIns.get_replacement("square_of_a_sum", node, node):
+        case BuiltinsError(msg):
+            assert msg == f"{node} doesn't have the form of square_of_a_sum"
+        case result:
+            pytest.fail(f"Expected an error, got {result}")
+
+
+def test_registered_patterns_are_compiled_once() -> None:
+    entry = FORMULA_MAP["product_of_powers"]
+
+    assert FORMULA_MAP.matcher(entry.lhs) is FORMULA_MAP.matcher(entry.lhs)
+    assert FORMULA_MAP.matcher(entry.rhs) is FORMULA_MAP.matcher(entry.rhs)
@@ -0,0 +1,83 @@
+from dataclasses import dataclass
+import pytest
+
+from backend.internal.expression_tree import Node, Numeric, Add, Mul, Symbol, Pow
+from backend.internal.math_builtins.formula_handler import FORMULA_MAP
+from backend.internal.math_builtins.formula_node import WildNode
+from backend.internal.math_builtins.pattern_compiler import Mismatch, compile_pattern
+from backend.internal.tests.formulas.test_bind_wildnodes import BIND_WILDNODES_CASES
+from backend.internal.tests.formulas.test_bind_wildnodes_error import (
+    BIND_WILDNODES_CASES as BIND_WILDNODES_ERROR_CASES,
+)
+
+
+@dataclass
+class Case:
+    name: str
+    input: Node
+    to_match: Node
+
+
+def interpret(node: Node, pattern: Node, cache: dict[str, Node]) -> Mismatch | None:
+    """
+    Reference matcher walking the pattern structurally, see `compile_pattern`.
+    """
+    match node, pattern:
+        case _, WildNode(tag):
+            if tag not in cache:
+                cache[tag] = node
+                return None
+            return Mismatch(node, cache[tag]) if node != cache[tag] else None
+        case Pow(), Pow():
+            return interpret(node.base, pattern.base, cache) or interpret(
+                node.exponent, pattern.exponent, cache
+            )
+        case (Add(), Add()) | (Mul(), Mul()):
+            return interpret(node.left, pattern.left, cache) or interpret(
+                node.right, pattern.right, cache
+            )
+        case Numeric(lvalue), Numeric(rvalue):
+            return Mismatch(lvalue, rvalue) if lvalue != rvalue else None
+        case _, Add() | Mul() | Pow() | Numeric():
+            return Mismatch(node, pattern)
+    return Mismatch(node, pattern) if node != pattern else None
+
+
+SUBJECTS: list[Node] = [
+    Symbol("x"),
+    Numeric(2.0),
+    Pow(Symbol("a"), Numeric(2.0)),
+    Pow(Add(Symbol("a"), Symbol("b")), Numeric(2.0)),
+    Pow(Add(Symbol("a"), Symbol("b")), Symbol("n")),
+    Mul(Pow(Symbol("a"), Numeric(3.0)), Pow(Symbol("a"), Numeric(4.0))),
+    Mul(Pow(Symbol("a"), Numeric(3.0)), Pow(Symbol("b"), Numeric(4.0))),
+    Pow(Symbol("a"), Add(Numeric(3.0), Symbol("x"))),
+    Pow(Pow(Symbol("a"), Numeric(2.0)), Numeric(3.0)),
+    Pow(Mul(Symbol("a"), Symbol("b")), Numeric(2.0)),
+    Mul(Add(Symbol("a"), Symbol("b")), Add(Symbol("a"), Mul(Symbol("b"), Numeric(-1)))),
+]
+
+CASES_PATTERN_COMPILER: list[Case] = [
+    *(Case(c.name, c.input, c.to_match) for c in BIND_WILDNODES_CASES),
+    *(Case(c.name, c.input, c.to_match) for c in BIND_WILDNODES_ERROR_CASES),
+    *(
+        Case(f"{name} {direction} on {subject}", subject, pattern)
+        for _, category in FORMULA_MAP.items()
+        for name, entry in category.items()
+        for direction, pattern in (("lhs", entry.lhs), ("rhs", entry.rhs))
+        for subject in SUBJECTS
+    ),
+]
+
+
+@pytest.mark.parametrize("case", CASES_PATTERN_COMPILER, ids=lambda c: c.name)
+def test_compiled_matches_interpreted(case: Case) -> None:
+    compiled_cache: dict[str, Node] = {}
+    interpreted_cache: dict[str, Node] = {}
+
+    compiled = compile_pattern(case.to_match)(case.input, compiled_cache)
+    interpreted = interpret(case.input, case.to_match, interpreted_cache)
+
+    assert compiled == interpreted
+    if interpreted is None:
+        assert compiled_cache == interpreted_cache
@@ -5,7 +5,7 @@ from backend.internal.lexing import Lexer
 from backend.internal.parsing.error_msgs import ParserErrorUserMsg
 from backend.internal.statements import Statement
 from backend.internal.tokenstreams import TokenStream
-from backend.internal.parsing import Parser
+from backend.internal.parsing import Parser, parseerror
 
 from backend.internal.tests.parser_invalid.util_parse_invalid import (
     AnyNonErrorStatement,
@@ -231,3 +231,12 @@ def test_parser_invalid_expr(case: Case) -> None:
     parser = Parser(stream)
     program = parser.parse()
     assert case.expected == program.get()
+
+
+@pytest.mark.parametrize("record_frames", [True, False], ids=["Debug frames", "No frames"])
+def test_parser_invalid_expr_frames(record_frames: bool, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(parseerror, "RECORD_FRAMES", record_frames)
+    [stmt] = Parser(TokenStream(Lexer("2 * (x + "))).parse().get()
+
+    assert str(stmt) == ParserErrorUserMsg.missing_rhs_in_expr("2", "*")
+    assert ("parse_infix_expr" in repr(stmt)) == record_frames
@@ -0,0 +1,50 @@
+import pytest
+
+from backend.pkg import api
+from backend.pkg.api import compile_math_batch, compile_math_input
+from backend.pkg.executor import EvaluationPool, ExecutorConfig
+
+
+INPUTS_BATCH: list[str] = [
+    "a + b\n/+2",
+    "",
+    "/2",
+    "2x = 2\n/+2\n",
+    "x + 1\n/0",
+    "a^3*a^4\n!product_of_powers a^3*a^4\n",
+]
+
+
+def test_batch_matches_single() -> None:
+    expected = [compile_math_input(code) for code in INPUTS_BATCH]
+
+    assert compile_math_batch(INPUTS_BATCH) == expected
+
+
+def test_batch_matches_single_on_pool() -> None:
+    expected = [compile_math_input(code) for code in INPUTS_BATCH]
+    pool = EvaluationPool(ExecutorConfig(workers=2, timeout=10.0))
+    try:
+        assert compile_math_batch(INPUTS_BATCH, pool=pool) == expected
+    finally:
+        pool.close()
+
+
+def test_batch_empty() -> None:
+    assert compile_math_batch([]) == []
+
+
+def test_batch_isolates_failures(monkeypatch: pytest.MonkeyPatch) -> None:
+    def failing_compile(input: str, incremental: bool = False) -> list[str]:
+        if input == "boom":
+            raise ValueError("boom")
+        return compile_math_input(input, incremental)
+
+    monkeypatch.setattr(api, "compile_math_input", failing_compile)
+    results = compile_math_batch(["a + b", "boom", "a + b"])
+
+    assert results == [
+        compile_math_input("a + b"),
+        ["Error: boom"],
+        compile_math_input("a + b"),
+    ]
@@ -0,0 +1,67 @@
+import pytest
+from typing import NamedTuple
+
+from fastapi.testclient import TestClient
+
+from backend.pkg.api import StepSpan, compile_math_steps
+from backend.pkg.executor import EvaluationPool, ExecutorConfig
+from backend.rest.handlers import run
+from backend.rest.router import create_app
+
+
+class Case(NamedTuple):
+    name: str
+    input: str
+    expected: list[StepSpan | None]
+
+
+CASES_STEP_SPANS: list[Case] = [
+    Case("Empty", "", [None]),
+    Case(
+        "Atom transforms",
+        "x + 1\n  /2\n/+3",
+        [StepSpan(0, 5, 0, 0), StepSpan(8, 10, 1, 2), StepSpan(11, 14, 2, 0)],
+    ),
+    Case(
+        "Parse error points at the token",
+        "x + 1\n/+ )",
+        [StepSpan(0, 5, 0, 0), StepSpan(9, 10, 1, 3)],
+    ),
+    Case(
+        "Illegal character",
+        "2 + @",
+        [StepSpan(4, 5, 0, 4)],
+    ),
+    Case(
+        "Evaluation error",
+        "x + 1\n/0",
+        [StepSpan(0, 5, 0, 0), StepSpan(6, 8, 1, 0)],
+    ),
+    Case(
+        "Formula",
+        "a^3*a^4\n!product_of_powers a^3*a^4",
+        [StepSpan(0, 7, 0, 0), StepSpan(8, 34, 1, 0)],
+    ),
+]
+
+
+@pytest.mark.parametrize("incremental", [False, True], ids=["Full", "Incremental"])
+@pytest.mark.parametrize("case", CASES_STEP_SPANS, ids=lambda c: c.name)
+def test_step_spans(case: Case, incremental: bool) -> None:
+    steps = compile_math_steps(case.input, incremental)
+    assert [step.span for step in steps] == case.expected
+
+
+def test_interpret_returns_spans(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(run, "POOL", EvaluationPool(ExecutorConfig(workers=0)))
+    client = TestClient(create_app())
+
+    response = client.post("/interpret", json={"code": "x + 1\n/+ )"})
+
+    assert response.json() == {
+        "steps": ["x + 1", "Expected expression after: `+`"],
+        "spans": [
+            {"start": 0, "end": 5, "line": 0, "column": 0},
+            {"start": 9, "end": 10, "line": 1, "column": 3},
+        ],
+    }
@@ -0,0 +1,60 @@
+import json
+import pytest
+from typing import Iterator
+
+from fastapi.testclient import TestClient
+
+from backend.internal.evaluators import Evaluator
+from backend.internal.parsing import iter_statements
+from backend.internal.statements import Statement
+from backend.pkg.api import compile_math_steps, stream_math_steps
+from backend.pkg.executor import EvaluationPool, ExecutorConfig
+from backend.rest.handlers import run
+from backend.rest.router import create_app
+
+
+INPUTS_STREAM: list[str] = [
+    "",
+    "x + 1\n  /2\n/+3",
+    "x + 1\n/+ )\n/2",
+    "x + 1\n/0\n/2",
+    "a^3*a^4\n!product_of_powers a^3*a^4",
+]
+
+
+@pytest.mark.parametrize("incremental", [False, True], ids=["Full", "Incremental"])
+@pytest.mark.parametrize("input", INPUTS_STREAM)
+def test_stream_matches_steps(input: str, incremental: bool) -> None:
+    assert list(stream_math_steps(input, incremental)) == compile_math_steps(input, incremental)
+
+
+def test_stream_is_lazy() -> None:
+    pulled: list[Statement] = []
+
+    def statements() -> Iterator[Statement]:
+        for stmt in iter_statements("x + 1\n/2\n/3"):
+            pulled.append(stmt)
+            yield stmt
+
+    steps = Evaluator().iter_eval(statements())
+
+    assert str(next(steps)) == "x + 1"
+    assert len(pulled) == 1
+    assert len(list(steps)) == 2
+    assert len(pulled) == 3
+
+
+def test_interpret_stream(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(run, "POOL", EvaluationPool(ExecutorConfig(workers=0)))
+    client = TestClient(create_app())
+
+    response = client.post("/interpret/stream", json={"code": "x + 1\n/+ )"})
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line) for line in response.text.splitlines()] == [
+        {"step": "x + 1", "span": {"start": 0, "end": 5, "line": 0, "column": 0}},
+        {
+            "step": "Expected expression after: `+`",
+            "span": {"start": 9, "end": 10, "line": 1, "column": 3},
+        },
+    ]
@@ -0,0 +1,161 @@
+import time
+
+import pytest
+from typing import NamedTuple
+
+from backend.internal.budget import Budget, BudgetExceeded, BudgetLimits, Clock, charge
+from backend.internal.evaluators import Evaluator, IncrementalEvaluator
+from backend.internal.evaluators.error_msgs import EvaluatorErrorUserMsg
+from backend.internal.parsing import iter_statements, parse_program
+
+
+class Case(NamedTuple):
+    name: str
+    input: str
+    limits: BudgetLimits
+    expected: list[str]
+
+
+CASES_BUDGET: list[Case] = [
+    Case(
+        "Within budget",
+        "(a + b) * (c + d)\n!simplify",
+        BudgetLimits(),
+        ["(a + b) * (c + d)", "a * c + a * d + b * c + b * d"],
+    ),
+    Case(
+        "Simplify visits",
+        "(a + b) * (c + d) * (e + f)\n!simplify",
+        BudgetLimits(max_visits=10),
+        ["(a + b) * (c + d) * (e + f)", EvaluatorErrorUserMsg.too_complex()],
+    ),
+    Case(
+        "Formula visits",
+        "a^3*a^4\n!product_of_powers a^3*a^4",
+        BudgetLimits(max_visits=1),
+        ["a ^ 3 * a ^ 4", EvaluatorErrorUserMsg.too_complex()],
+    ),
+    Case(
+        "Tree size",
+        "x + y\n/z",
+        BudgetLimits(max_tree_size=3),
+        ["x + y", EvaluatorErrorUserMsg.too_complex()],
+    ),
+    Case(
+        "Deadline",
+        "x + y\n/z",
+        BudgetLimits(deadline=-1),
+        [EvaluatorErrorUserMsg.too_slow()],
+    ),
+]
+
+
+@pytest.mark.parametrize("case", CASES_BUDGET, ids=lambda c: c.name)
+def test_evaluator_budget(case: Case) -> None:
+    steps = Evaluator(case.limits).eval(parse_program(case.input))
+    assert [str(step) for step in steps] == case.expected
+
+
+def test_budget_error_has_span() -> None:
+    steps = Evaluator(BudgetLimits(max_tree_size=3)).eval(parse_program("x + y\n/z"))
+    assert steps[-1].span == (6, 8)
+
+
+def test_budget_limits() -> None:
+    budget = Budget(BudgetLimits(max_visits=2, max_tree_size=2))
+
+    budget.charge(2)
+    budget.check_size(2)
+    with pytest.raises(BudgetExceeded):
+        budget.charge()
+    with pytest.raises(BudgetExceeded):
+        budget.check_size(3)
+    assert not budget.timed_out
+
+
+def test_budget_deadline() -> None:
+    budget = Budget(BudgetLimits(deadline=-1))
+
+    with pytest.raises(BudgetExceeded) as err:
+        budget.check_deadline()
+    assert err.value.timed_out
+    assert budget.timed_out
+
+
+def test_clock_is_shared_by_the_budgets_of_a_request() -> None:
+    clock = Clock(0.2)
+
+    with Budget(BudgetLimits(), clock).active() as budget:
+        time.sleep(0.15)
+        budget.check_deadline()
+    time.sleep(0.2)
+    with Budget(BudgetLimits(), clock).active() as budget:
+        time.sleep(0.1)
+        with pytest.raises(BudgetExceeded):
+            budget.check_deadline()
+
+
+@pytest.mark.parametrize(
+    "evaluator",
+    [
+        Evaluator(BudgetLimits(deadline=0.2)),
+        IncrementalEvaluator(limits=BudgetLimits(deadline=0.2)),
+    ],
+    ids=["Full", "Incremental"],
+)
+def test_paused_stream_is_not_charged(evaluator: Evaluator | IncrementalEvaluator) -> None:
+    code = "x + 1\n/2\n/3"
+    if isinstance(evaluator, Evaluator):
+        steps = evaluator.iter_eval(iter_statements(code))
+    else:
+        steps = evaluator.iter_eval(code)
+
+    first = next(steps)
+    time.sleep(0.3)
+    assert [str(first), *map(str, steps)] == [
+        "x + 1",
+        "(x + 1) * 2 ^ -1",
+        "(x + 1) * 2 ^ -1 * 3 ^ -1",
+    ]
+
+
+def test_deadline_from_env(monkeypatch: pytest.MonkeyPatch) -> None:
+    assert BudgetLimits.from_env(deadline=4.0).deadline == 4.0
+    monkeypatch.setenv("EVAL_DEADLINE", "1.5")
+    assert BudgetLimits.from_env(deadline=4.0).deadline == 1.5
+
+
+def test_charge_outside_evaluation() -> None:
+    budget = Budget(BudgetLimits(max_visits=0))
+
+    charge(10)
+    with budget.active():
+        with pytest.raises(BudgetExceeded):
+            charge()
+    charge(10)
+
+
+@pytest.mark.parametrize(
+    "limits, cached",
+    [(BudgetLimits(max_tree_size=1), 1), (BudgetLimits(deadline=-1), 0)],
+    ids=["Too complex", "Too slow"],
+)
+def test_incremental_caches_only_deterministic_errors(limits: BudgetLimits, cached: int) -> None:
+    evaluator = IncrementalEvaluator(limits=limits)
+
+    assert len(evaluator.eval("x + y")) == 1
+    assert len(evaluator) == cached
+
+
+def test_budget_per_statement() -> None:
+    # Each `!simplify` fits the limit on its own, both together don't
+    code = "(a + b) * (c + d)\n!simplify\n!simplify"
+    limits = BudgetLimits(max_visits=100)
+
+    full = [str(step) for step in Evaluator(limits).eval(parse_program(code))]
+    evaluator = IncrementalEvaluator(limits=limits)
+    evaluator.eval("(a + b) * (c + d)\n!simplify\n")
+    incremental = [str(step) for step in evaluator.eval(code)]
+
+    assert full == incremental
+    assert EvaluatorErrorUserMsg.too_complex() not in full
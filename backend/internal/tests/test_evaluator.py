@@ -5,6 +5,7 @@ from backend.internal.lexing import Lexer
 from backend.internal.parsing import Parser
 from backend.internal.tokenstreams import TokenStream
 from backend.internal.evaluators import Evaluator
+from backend.internal.objects import EquationObject
 
 
 @dataclass
@@ -108,3 +109,14 @@ def test_evaluator(case: Case) -> None:
     subjects = evaluator.eval(program)
 
     assert [repr(subject) for subject in subjects] == case.expected
+
+
+def test_evaluator_steps_share_trees() -> None:
+    program = Parser(TokenStream(Lexer("(a + b)^2 = c\n/+1\n/*2"))).parse()
+    first, added, multiplied = Evaluator().eval(program)
+
+    assert isinstance(first, EquationObject)
+    assert isinstance(added, EquationObject) and isinstance(multiplied, EquationObject)
+    assert added.lhs.left is first.lhs
+    assert multiplied.lhs.left is added.lhs
+    assert str(first) == "(a + b) ^ 2 = c"
@@ -5,6 +5,7 @@ from backend.internal.lexing import Lexer
 from backend.internal.tokenstreams import TokenStream
 from backend.internal.parsing import Parser
 from backend.internal.evaluators import Evaluator
+from backend.pkg.api import compile_math_input
 
 
 class Case(NamedTuple):
@@ -118,10 +119,78 @@ CASES_EVALUATOR_FORMULA_BINOMIAL_IDENTITIES: list[Case] = [
     # ),
 ]
 
+CASES_EVALUATOR_FORMULA_AUTO_SEARCH: list[Case] = [
+    Case(
+        name="Auto search product of powers",
+        input="a^3*a^4 + b\n!product_of_powers\n",
+        expected=[
+            "EXPR((((a^3.0)*(a^4.0))+b))",
+            "EXPR(((a^(3.0+4.0))+b))",
+        ],
+    ),
+    Case(
+        name="Auto search reversed",
+        input="b + a^(4 + x)\n!product_of_powers\n",
+        expected=[
+            "EXPR((b+(a^(4.0+x))))",
+            "EXPR((b+((a^4.0)*(a^x))))",
+        ],
+    ),
+    Case(
+        name="Auto search first site only",
+        input="(a^2)^3 + (b^2)^3\n!power_of_a_power\n",
+        expected=[
+            "EXPR((((a^2.0)^3.0)+((b^2.0)^3.0)))",
+            "EXPR(((a^(2.0*3.0))+((b^2.0)^3.0)))",
+        ],
+    ),
+    Case(
+        name="Auto search in both sides of equation",
+        input="a^3*a^4 = (c^2)^3\n!power_of_a_power\n",
+        expected=[
+            "EQUATION(((a^3.0)*(a^4.0)) = ((c^2.0)^3.0))",
+            "EQUATION(((a^3.0)*(a^4.0)) = (c^(2.0*3.0)))",
+        ],
+    ),
+    Case(
+        name="Auto search no site",
+        input="x + 1\n!product_of_powers\n",
+        expected=[
+            "EXPR((x+1.0))",
+            "ERROR: Cannot use product_of_powers anywhere in x + 1",
+        ],
+    ),
+    Case(
+        name="Auto search no site in equation",
+        input="x + 1 = y\n!product_of_powers\n",
+        expected=[
+            "EQUATION((x+1.0) = y)",
+            "ERROR: Cannot use product_of_powers anywhere in x + 1 = y",
+        ],
+    ),
+    Case(
+        name="Auto search no site in power",
+        input="x^2\n!square_of_a_sum\n",
+        expected=[
+            "EXPR((x^2.0))",
+            "ERROR: Cannot use square_of_a_sum anywhere in x ^ 2",
+        ],
+    ),
+    Case(
+        name="Param not found",
+        input="a^3*a^4\n!product_of_powers b^3*b^4\n",
+        expected=[
+            "EXPR(((a^3.0)*(a^4.0)))",
+            "ERROR: There is no b ^ 3 * b ^ 4 in a ^ 3 * a ^ 4",
+        ],
+    ),
+]
+
 CASES_EVALUATOR_FORMULA: list[Case] = []
 CASES_EVALUATOR_FORMULA.extend(CASES_EVALUATOR_FORMULA_POWERS)
 CASES_EVALUATOR_FORMULA.extend(CASES_EVALUATOR_FORMULA_POWERS_FRACTIONS)
 CASES_EVALUATOR_FORMULA.extend(CASES_EVALUATOR_FORMULA_BINOMIAL_IDENTITIES)
+CASES_EVALUATOR_FORMULA.extend(CASES_EVALUATOR_FORMULA_AUTO_SEARCH)
 
 
 @pytest.mark.parametrize("case", CASES_EVALUATOR_FORMULA, ids=lambda c: c.name)
@@ -139,3 +208,27 @@ def test_evaluator_formula(case: Case) -> None:
 
     print(repr(subjects))
     assert [repr(subject) for subject in subjects] == case.expected
+
+
+CASES_FORMULA_MISMATCH_MESSAGE: list[Case] = [
+    Case(
+        name="Leaf is not a sum",
+        input="x^2\n!square_of_a_sum x^2",
+        expected=["x ^ 2", "x ^ 2 doesn't have the form of square_of_a_sum"],
+    ),
+    Case(
+        name="Product is not a product of powers",
+        input="a*b\n!product_of_powers a*b",
+        expected=["a * b", "a * b doesn't have the form of product_of_powers"],
+    ),
+    Case(
+        name="Different bases",
+        input="a^3*b^4\n!product_of_powers a^3*b^4",
+        expected=["a ^ 3 * b ^ 4", "Cannot use this formula because b and a aren't the same"],
+    ),
+]
+
+
+@pytest.mark.parametrize("case", CASES_FORMULA_MISMATCH_MESSAGE, ids=lambda c: c.name)
+def test_formula_mismatch_message(case: Case) -> None:
+    assert compile_math_input(case.input) == case.expected
@@ -0,0 +1,87 @@
+import pytest
+from dataclasses import dataclass
+
+from backend.internal.lexing import Lexer
+from backend.internal.parsing import Parser
+from backend.internal.tokenstreams import TokenStream
+from backend.internal.evaluators import Evaluator, IncrementalEvaluator
+
+
+@dataclass
+class Case:
+    name: str
+    input: str
+
+
+CASES_INCREMENTAL = [
+    Case("Empty", ""),
+    Case("Only new line", "\n"),
+    Case("Single expression", "a + b"),
+    Case("Atom transforms", "a + b\n/+2\n/*3\n/-c"),
+    Case("Trailing new line", "2x = 2\n/+2\n"),
+    Case("Blank line in the middle", "2x = 2\n\n/+2"),
+    Case("Whitespace last line", "2x = 2\n/+2\n  \t"),
+    Case("Atom transform as first line", "/2\n/+2"),
+    Case("Illegal char at start", "@ + 2\n/2"),
+    Case("Parse error stops evaluation", "x + 1\n/+ )\n/2"),
+    Case("Division by zero stops evaluation", "x + 1\n/0\n/2"),
+    Case("New subject line", "x + 1\n/2\ny = 3\n/-3"),
+    Case("Formula", "a^3*a^4\n!product_of_powers a^3*a^4\n/2"),
+    Case("Unknown formula", "a^3*a^4\n!no_such_formula a\n/2"),
+    Case("Simplify", "x + x\n!simplify\n/2"),
+]
+
+
+def full_eval(input: str) -> list[str]:
+    program = Parser(TokenStream(Lexer(input))).parse()
+    return [repr(obj) for obj in Evaluator().eval(program)]
+
+
+@pytest.mark.parametrize("case", CASES_INCREMENTAL, ids=lambda c: c.name)
+def test_incremental_matches_full(case: Case) -> None:
+    evaluator = IncrementalEvaluator()
+    expected = full_eval(case.input)
+
+    assert [repr(obj) for obj in evaluator.eval(case.input)] == expected
+    # second run is served from the cached prefixes
+    assert [repr(obj) for obj in evaluator.eval(case.input)] == expected
+
+
+@pytest.mark.parametrize("case", CASES_INCREMENTAL, ids=lambda c: c.name)
+def test_incremental_every_prefix(case: Case) -> None:
+    evaluator = IncrementalEvaluator()
+    lines = case.input.split("\n")
+    for end in range(1, len(lines) + 1):
+        input = "\n".join(lines[:end])
+        assert [repr(obj) for obj in evaluator.eval(input)] == full_eval(input)
+
+
+def test_incremental_reuses_prefix_steps() -> None:
+    evaluator = IncrementalEvaluator()
+    first = evaluator.eval("x + 1\n/2\n/*3")
+    second = evaluator.eval("x + 1\n/2\n/+4")
+
+    assert first[0] is second[0]
+    assert first[1] is second[1]
+    assert first[2] is not second[2]
+    assert [repr(obj) for obj in second] == full_eval("x + 1\n/2\n/+4")
+
+
+def test_incremental_edit_does_not_leak_state() -> None:
+    evaluator = IncrementalEvaluator()
+    evaluator.eval("x + 1\n/2\n/*3")
+    evaluator.eval("x + 1\n/2\n/*3\n/-1")
+
+    assert [repr(obj) for obj in evaluator.eval("x + 1\n/2\n/*5")] == full_eval(
+        "x + 1\n/2\n/*5"
+    )
+
+
+def test_incremental_eviction() -> None:
+    evaluator = IncrementalEvaluator(max_entries=2)
+    evaluator.eval("x + 1\n/2\n/*3\n/-1")
+
+    assert len(evaluator) == 2
+    assert [repr(obj) for obj in evaluator.eval("x + 1\n/2\n/*3\n/-1")] == full_eval(
+        "x + 1\n/2\n/*3\n/-1"
+    )
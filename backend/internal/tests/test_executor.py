@@ -0,0 +1,208 @@
+import os
+import signal
+import threading
+import time
+import pytest
+
+from backend.pkg import api
+from backend.pkg.api import compile_math_input, compile_math_steps, stream_math_steps, worker_key
+from backend.pkg.executor import (
+    EvaluationPool,
+    EvaluationQueueTimeout,
+    EvaluationTimeout,
+    ExecutorConfig,
+)
+
+
+@pytest.fixture
+def pool():
+    pool = EvaluationPool(ExecutorConfig(workers=2, timeout=0.5, max_tasks_per_worker=1))
+    yield pool
+    pool.close()
+
+
+def test_inline_pool_runs_in_process() -> None:
+    pool = EvaluationPool(ExecutorConfig(workers=0))
+
+    assert pool.run(os.getpid) == os.getpid()
+    assert pool.run(compile_math_input, "a + b\n/2") == compile_math_input("a + b\n/2")
+
+
+def test_pool_runs_in_workers(pool: EvaluationPool) -> None:
+    assert pool.run(os.getpid) != os.getpid()
+    assert pool.run(compile_math_input, "a + b\n/2") == compile_math_input("a + b\n/2")
+
+
+def test_pool_keeps_order(pool: EvaluationPool) -> None:
+    inputs = ["a + b", "x = 2\n/2", "/2", "a^3*a^4\n!product_of_powers a^3*a^4"]
+
+    assert pool.run_all(compile_math_input, [(code,) for code in inputs]) == [
+        compile_math_input(code) for code in inputs
+    ]
+
+
+def test_pool_times_out(pool: EvaluationPool) -> None:
+    start = time.monotonic()
+    with pytest.raises(EvaluationTimeout):
+        pool.run(time.sleep, 30)
+
+    assert time.monotonic() - start < 5
+    assert pool.run(compile_math_input, "a + b") == compile_math_input("a + b")
+
+
+def test_pool_timeout_only_affects_slow_calls(pool: EvaluationPool) -> None:
+    results = pool.run_all(time.sleep, [(30,), (0,), (0,)])
+
+    assert isinstance(results[0], EvaluationTimeout)
+    assert results[1:] == [None, None]
+
+
+def test_pool_recycles_workers(pool: EvaluationPool) -> None:
+    pids = {pool.run(os.getpid) for _ in range(4)}
+
+    assert len(pids) > 2
+
+
+def test_pool_deadline_starts_with_the_call() -> None:
+    # Most calls wait for a free worker longer than the timeout
+    pool = EvaluationPool(ExecutorConfig(workers=2, timeout=1.0))
+    results: list[None | EvaluationTimeout] = []
+
+    def call() -> None:
+        results.extend(pool.run_all(time.sleep, [(0.5,)]))
+
+    try:
+        calls = [threading.Thread(target=call) for _ in range(12)]
+        for thread in calls:
+            thread.start()
+        for thread in calls:
+            thread.join()
+    finally:
+        pool.close()
+
+    assert results == [None] * 12
+
+
+def _sleep_ignoring_alarm(seconds: float) -> None:
+    signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGALRM})
+    time.sleep(seconds)
+
+
+def _sleep_then_getpid(seconds: float) -> int:
+    time.sleep(seconds)
+    return os.getpid()
+
+
+def test_pool_replaces_only_the_stuck_worker() -> None:
+    pool = EvaluationPool(ExecutorConfig(workers=2, timeout=0.5))
+    stuck: list[None | EvaluationTimeout] = []
+    try:
+        thread = threading.Thread(
+            target=lambda: stuck.extend(pool.run_all(_sleep_ignoring_alarm, [(30,)]))
+        )
+        thread.start()
+        time.sleep(0.2)
+        healthy = pool.run(os.getpid)
+        thread.join()
+
+        pids = pool.run_all(_sleep_then_getpid, [(0.2,), (0.2,)])
+    finally:
+        pool.close()
+
+    assert isinstance(stuck[0], EvaluationTimeout)
+    assert healthy in pids
+    assert len(set(pids)) == 2
+
+
+def test_pool_bounds_the_wait_for_a_worker() -> None:
+    pool = EvaluationPool(ExecutorConfig(workers=1, timeout=5.0, queue_timeout=0.2))
+    try:
+        thread = threading.Thread(target=pool.run, args=(time.sleep, 1.0))
+        thread.start()
+        time.sleep(0.2)
+        with pytest.raises(EvaluationQueueTimeout):
+            pool.run(os.getpid)
+        thread.join()
+        assert pool.run(os.getpid) != os.getpid()
+    finally:
+        pool.close()
+
+
+def test_pool_routes_keys_to_one_worker() -> None:
+    pool = EvaluationPool(ExecutorConfig(workers=4))
+    try:
+        assert len({pool.run(os.getpid, key="x + 1") for _ in range(8)}) == 1
+        assert len({pool.run(os.getpid, key=f"x + {idx}") for idx in range(20)}) > 1
+    finally:
+        pool.close()
+
+
+def test_pool_runs_on_each_worker() -> None:
+    pool = EvaluationPool(ExecutorConfig(workers=2, queue_timeout=0.2))
+    try:
+        assert len(set(pool.run_on_each_worker(os.getpid))) == 2
+
+        thread = threading.Thread(target=pool.run, args=(time.sleep, 1.0))
+        thread.start()
+        time.sleep(0.2)
+        results = pool.run_on_each_worker(os.getpid)
+        thread.join()
+    finally:
+        pool.close()
+
+    assert sum(isinstance(result, EvaluationQueueTimeout) for result in results) == 1
+
+
+def _incremental_checkpoints(code: str) -> int:
+    compile_math_input(code, incremental=True)
+    return len(api._INCREMENTAL_EVALUATOR)
+
+
+def test_pool_keeps_incremental_state_on_one_worker() -> None:
+    programs = ["x + 1\n", "x + 1\n/2\n", "x + 1\n/2\n/3"]
+    pool = EvaluationPool(ExecutorConfig(workers=4))
+    try:
+        checkpoints = [
+            pool.run(_incremental_checkpoints, code, key=worker_key(code, True))
+            for code in programs
+        ]
+    finally:
+        pool.close()
+
+    assert checkpoints == [1, 2, 3]
+
+
+def test_worker_key() -> None:
+    assert worker_key("x + 1\n/2", True) == worker_key("x + 1\n/3", True) == "x + 1"
+    assert worker_key("x + 1\n/2", False) is None
+
+
+def test_timeout_message() -> None:
+    assert str(EvaluationTimeout(2.5)) == "Evaluation took longer than 2.5s and was stopped"
+
+
+def test_inline_pool_streams_in_process() -> None:
+    pool = EvaluationPool(ExecutorConfig(workers=0))
+
+    assert list(pool.stream(stream_math_steps, "a + b\n/2")) == compile_math_steps("a + b\n/2")
+
+
+def test_pool_streams_from_workers(pool: EvaluationPool) -> None:
+    code = "a^3*a^4\n!product_of_powers a^3*a^4\n/2"
+
+    assert list(pool.stream(stream_math_steps, code)) == compile_math_steps(code)
+
+
+def test_pool_stream_times_out(pool: EvaluationPool) -> None:
+    items = pool.stream(map, time.sleep, [0, 30])
+
+    assert next(items) is None
+    with pytest.raises(EvaluationTimeout):
+        next(items)
+    assert list(pool.stream(stream_math_steps, "a + b")) == compile_math_steps("a + b")
+
+
+def test_deadline_leaves_time_before_the_timeout() -> None:
+    config = ExecutorConfig(timeout=2.5)
+
+    assert 0 < config.deadline < config.timeout
@@ -3,7 +3,19 @@ from dataclasses import dataclass
 
 from backend.internal.lexing import Lexer
 from backend.internal.parsing import Parser
-from backend.internal.expression_tree import convert_to_expression_tree
+from backend.internal.expression_tree import (
+    Add,
+    Mul,
+    Numeric,
+    Pow,
+    Symbol,
+    convert_to_expression_tree,
+    register_infix_converter,
+)
+from backend.internal.expression_tree.converter import INFIX_CONVERTERS
+from backend.internal.expression_tree.node import node_size
+from backend.internal.expressions import Expression
+from backend.internal.tokens import TokenType
 from backend.internal.statements import Subject
 from backend.internal.tokenstreams.tokenstream import TokenStream
 
@@ -179,3 +191,51 @@ def test_expression_tree(case: Case) -> None:
     node = convert_to_expression_tree(stmnt.expr)
     assert node
     assert repr(node) == case.expected
+
+
+def parse_expression(input: str) -> Expression:
+    [stmnt] = Parser(TokenStream(Lexer(input))).parse().get()
+    assert isinstance(stmnt, Subject)
+    return stmnt.expr
+
+
+def test_expression_tree_deep() -> None:
+    depth = 5000
+    node = convert_to_expression_tree(parse_expression("x" + "+x" * depth))
+
+    assert isinstance(node, Add)
+    assert node_size(node) == 2 * depth + 1
+
+
+def test_expression_tree_registered_converter() -> None:
+    expr = parse_expression("x < 2")
+    assert convert_to_expression_tree(expr) is None
+
+    register_infix_converter(TokenType.LT, lambda lhs, rhs: Add(rhs, Mul(lhs, Numeric(-1))))
+    try:
+        node = convert_to_expression_tree(expr)
+    finally:
+        INFIX_CONVERTERS.pop(TokenType.LT)
+    assert node is Add(Numeric(2.0), Mul(Symbol("x"), Numeric(-1)))
+
+
+def test_reduce() -> None:
+    node = Add(Mul(Numeric(0.0), Symbol("x")), Pow(Symbol("y"), Numeric(1.0)))
+    reduced = node.reduce()
+
+    assert reduced is Symbol("y")
+    assert node.reduce() is reduced
+    assert node is Add(Mul(Numeric(0.0), Symbol("x")), Pow(Symbol("y"), Numeric(1.0)))
+
+
+def test_reduce_irreducible() -> None:
+    node = Add(Symbol("x"), Symbol("y"))
+    assert node.reduce() is node
+
+
+def test_reduce_deep() -> None:
+    depth = 5000
+    node = convert_to_expression_tree(parse_expression("0*x" + "+0*x" * depth))
+
+    assert isinstance(node, Add)
+    assert node.reduce() == Numeric(0)
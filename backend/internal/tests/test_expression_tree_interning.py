@@ -0,0 +1,93 @@
+import copy
+import gc
+import pickle
+import pytest
+from typing import Callable, NamedTuple
+
+from backend.internal.expression_tree import Node, Add, Mul, Pow, Numeric, Symbol
+from backend.internal.expression_tree.node import _INTERN_TABLE
+from backend.internal.math_builtins.formula_node import WildNode
+
+
+class Case(NamedTuple):
+    name: str
+    build: Callable[[], Node]
+
+
+CASES_INTERNING: list[Case] = [
+    Case("Numeric", lambda: Numeric(2.0)),
+    Case("Symbol", lambda: Symbol("x")),
+    Case("Add", lambda: Add(Symbol("x"), Numeric(1.0))),
+    Case("Mul", lambda: Mul(Numeric(2.0), Symbol("y"))),
+    Case("Pow", lambda: Pow(Symbol("x"), Numeric(2.0))),
+    Case(
+        "Nested",
+        lambda: Add(
+            Mul(Numeric(2.0), Pow(Symbol("x"), Numeric(2.0))),
+            Mul(Symbol("y"), Numeric(-1)),
+        ),
+    ),
+]
+
+
+@pytest.mark.parametrize("case", CASES_INTERNING, ids=lambda c: c.name)
+def test_equal_nodes_are_shared(case: Case) -> None:
+    lhs = case.build()
+    rhs = case.build()
+
+    assert lhs is rhs
+    assert hash(lhs) == hash(rhs)
+
+
+@pytest.mark.parametrize("case", CASES_INTERNING, ids=lambda c: c.name)
+def test_copies_share_structure(case: Case) -> None:
+    node = case.build()
+
+    assert copy.copy(node) is node
+    assert copy.deepcopy(node) is node
+    assert copy.deepcopy([node])[0] is node
+
+
+@pytest.mark.parametrize("case", CASES_INTERNING, ids=lambda c: c.name)
+def test_pickle_reinterns(case: Case) -> None:
+    node = case.build()
+
+    assert pickle.loads(pickle.dumps(node)) is node
+
+
+@pytest.mark.parametrize("case", CASES_INTERNING, ids=lambda c: c.name)
+def test_nodes_are_immutable(case: Case) -> None:
+    node = case.build()
+
+    with pytest.raises(AttributeError):
+        node.value = Numeric(3.0)  # type: ignore[misc]
+
+
+def test_int_and_float_numerics_keep_representation() -> None:
+    assert Numeric(2) is not Numeric(2.0)
+    assert repr(Numeric(2)) == "2"
+    assert repr(Numeric(2.0)) == "2.0"
+    assert Numeric(2) == Numeric(2.0)
+    assert Pow(Symbol("x"), Numeric(2)) == Pow(Symbol("x"), Numeric(2.0))
+
+
+def test_different_nodes_are_not_equal() -> None:
+    assert Add(Symbol("x"), Symbol("y")) != Add(Symbol("y"), Symbol("x"))
+    assert Add(Symbol("x"), Symbol("y")) != Mul(Symbol("x"), Symbol("y"))
+
+
+def test_wildnode_patterns_compare_structurally() -> None:
+    pattern = Add(WildNode("a"), WildNode("b"))
+
+    assert pattern == Add(Symbol("x"), Numeric(1.0))
+    assert pattern != Mul(Symbol("x"), Numeric(1.0))
+
+
+def test_intern_table_releases_dead_nodes() -> None:
+    node = Add(Symbol("__interning_tmp__"), Numeric(123456.0))
+    key = (Add, id(node.left), id(node.right))
+    assert key in _INTERN_TABLE
+
+    del node
+    gc.collect()
+    assert key not in _INTERN_TABLE
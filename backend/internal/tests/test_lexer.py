@@ -147,12 +147,74 @@ CASES_EXAMPLE_PROGRAMS = [
     ),
 ]
 
+CASES_EDGE = [
+    Case(
+        "Numbers with dots",
+        "1.2.3 4.",
+        [
+            Token(TokenType.NUMBER, "1.2"),
+            Token(TokenType.ILLEGAL, "."),
+            Token(TokenType.NUMBER, "3"),
+            Token(TokenType.NUMBER, "4."),
+            Token(TokenType.EOF, "EOF"),
+        ],
+    ),
+    Case(
+        "Comparison operators",
+        "a<=b>=c!=d<e>f!g",
+        [
+            Token(TokenType.IDENT, "a"),
+            Token(TokenType.LE, "<="),
+            Token(TokenType.IDENT, "b"),
+            Token(TokenType.GE, ">="),
+            Token(TokenType.IDENT, "c"),
+            Token(TokenType.NOT_EQUALS, "!="),
+            Token(TokenType.IDENT, "d"),
+            Token(TokenType.LT, "<"),
+            Token(TokenType.IDENT, "e"),
+            Token(TokenType.GT, ">"),
+            Token(TokenType.IDENT, "f"),
+            Token(TokenType.BANG, "!"),
+            Token(TokenType.IDENT, "g"),
+            Token(TokenType.EOF, "EOF"),
+        ],
+    ),
+    Case(
+        "Illegal characters one by one",
+        "x_1\0é",
+        [
+            Token(TokenType.IDENT, "x_"),
+            Token(TokenType.NUMBER, "1"),
+            Token(TokenType.ILLEGAL, "\0"),
+            Token(TokenType.ILLEGAL, "é"),
+            Token(TokenType.EOF, "EOF"),
+        ],
+    ),
+]
+
 LEXER_UT: list[Case] = []
 LEXER_UT.extend(CASES_CATEGORIES)
 LEXER_UT.extend(CASES_EXAMPLE_PROGRAMS)
+LEXER_UT.extend(CASES_EDGE)
 
 
 @pytest.mark.parametrize("case", LEXER_UT, ids=lambda c: c.name)
 def test_lexer(case: Case) -> None:
     lexer = Lexer(case.input)
     assert lexer.tokenize() == case.expected
+
+
+@pytest.mark.parametrize("case", LEXER_UT, ids=lambda c: c.name)
+def test_lexer_lazy(case: Case) -> None:
+    assert list(Lexer(case.input)) == case.expected
+
+
+@pytest.mark.parametrize("case", LEXER_UT, ids=lambda c: c.name)
+def test_lexer_compact(case: Case) -> None:
+    buffer = Lexer(case.input).compact()
+
+    assert buffer.tokens() == case.expected
+    for idx, token in enumerate(case.expected):
+        start, end = buffer.span(idx)
+        if token.ttype in (TokenType.IDENT, TokenType.NUMBER, TokenType.ILLEGAL):
+            assert case.input[start:end] == token.literal
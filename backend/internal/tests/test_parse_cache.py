@@ -0,0 +1,124 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from backend.internal.evaluators import Evaluator
+from backend.internal.lexing import Lexer
+from backend.internal.parsing import (
+    Parser,
+    LineParseCache,
+    ParseCacheStats,
+    NODE_BUILDER,
+    parse_program,
+)
+from backend.internal.tests.test_parser import PARSER_UT
+from backend.internal.tokenstreams import TokenStream
+from backend.pkg.executor import EvaluationPool, ExecutorConfig
+from backend.rest.handlers import run
+from backend.rest.router import create_app
+from fastapi.testclient import TestClient
+
+
+@dataclass
+class Case:
+    name: str
+    input: str
+
+
+CASES_PARSE_PROGRAM = [
+    Case("Empty", ""),
+    Case("Only new line", "\n"),
+    Case("Trailing new line", "2x = 2\n/+2\n"),
+    Case("Blank line in the middle", "2x = 2\n\n/+2"),
+    Case("Whitespace last line", "2x = 2\n/+2\n  \t"),
+    Case("Illegal char", "x + 1\n@ + 2\n/2"),
+    Case("Parse error stops parsing", "x + 1\n/+ )\n/2"),
+    Case("Unterminated last line error", "x + 1\n/+ ("),
+    Case("Formula", "a^3*a^4\n!product_of_powers a^3*a^4\n/2"),
+    *(Case(c.name, c.input) for c in PARSER_UT),
+]
+
+
+@pytest.mark.parametrize("case", CASES_PARSE_PROGRAM, ids=[c.name for c in CASES_PARSE_PROGRAM])
+def test_parse_program(case: Case) -> None:
+    expected = Parser(TokenStream(Lexer(case.input))).parse()
+    result = parse_program(case.input, LineParseCache())
+    assert repr(result.get()) == repr(expected.get())
+
+
+def test_parse_cache_stats() -> None:
+    cache = LineParseCache()
+    parse_program("x + 1\n/2\n/2\n/2", cache)
+    parse_program("  x + 1 \n/2", cache)
+
+    assert cache.stats() == ParseCacheStats(hits=3, misses=3, size=3, max_entries=8192)
+
+
+def test_parse_cache_eviction() -> None:
+    cache = LineParseCache(max_entries=2)
+    first = cache.parse_line("x + 1\n")
+    cache.parse_line("/2\n")
+    cache.parse_line("/3\n")
+
+    assert len(cache) == 2
+    assert cache.parse_line("x + 1\n") is not first
+    assert cache.stats().misses == 4
+
+
+@pytest.mark.parametrize("case", CASES_PARSE_PROGRAM, ids=[c.name for c in CASES_PARSE_PROGRAM])
+def test_parse_program_parallel(case: Case) -> None:
+    expected = Parser(TokenStream(Lexer(case.input))).parse()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        result = parse_program(case.input, LineParseCache(), executor)
+    assert repr(result.get()) == repr(expected.get())
+
+
+def test_parse_lines_shares_entries() -> None:
+    cache = LineParseCache()
+    first = cache.parse_line("x + 1\n")
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        stmts = cache.parse_lines(["x + 1\n", "/2\n", "/2\n", "/3"], executor)
+
+    assert stmts[0] is first
+    assert stmts[1] == stmts[2]
+    assert (stmts[1].span, stmts[2].span) == ((6, 8), (9, 11))
+    assert cache.stats() == ParseCacheStats(hits=2, misses=3, size=3, max_entries=8192)
+
+
+def test_parse_lines_keeps_hits_evicted_meanwhile() -> None:
+    cache = LineParseCache()
+    first = cache.parse_line("x + 1\n")
+
+    class EvictingExecutor(ThreadPoolExecutor):
+        def map(self, *args, **kwargs):
+            cache.clear()
+            return super().map(*args, **kwargs)
+
+    with EvictingExecutor(max_workers=2) as executor:
+        stmts = cache.parse_lines(["x + 1\n", "/2\n", "/3"], executor)
+
+    assert stmts[0] is first
+    assert len(cache) == 3
+
+
+def test_stats_route_reads_every_worker(monkeypatch: pytest.MonkeyPatch) -> None:
+    pool = EvaluationPool(ExecutorConfig(workers=2))
+    monkeypatch.setattr(run, "POOL", pool)
+    client = TestClient(create_app())
+    try:
+        client.post("/interpret", json={"code": "x + 1\n/2\n/2\n"})
+        response = client.get("/stats").json()
+    finally:
+        pool.close()
+
+    caches = response["parse_cache"]
+    assert len(caches) == 2
+    assert sum(cache["misses"] for cache in caches) == 2
+    assert sum(cache["hits"] for cache in caches) == 1
+
+
+@pytest.mark.parametrize("case", CASES_PARSE_PROGRAM, ids=[c.name for c in CASES_PARSE_PROGRAM])
+def test_parse_program_nodes(case: Case) -> None:
+    expected = Evaluator().eval(Parser(TokenStream(Lexer(case.input))).parse())
+    result = Evaluator().eval(parse_program(case.input, LineParseCache(builder=NODE_BUILDER)))
+    assert list(map(str, result)) == list(map(str, expected))
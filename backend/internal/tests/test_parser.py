@@ -1,13 +1,22 @@
 import pytest
 from dataclasses import dataclass
 
-from backend.internal.expressions import Prefix, Infix, Identifier, Number
+from backend.internal.expressions import Expression, Prefix, Infix, Identifier, Number
 from backend.internal.lexing import Lexer
-from backend.internal.statements import Statement, Subject, AtomTransform
+from backend.internal.statements import Statement, Subject, AtomTransform, LineError
 from backend.internal.statements.formula import Formula
 from backend.internal.tokens import Token, TokenType
 from backend.internal.tokenstreams import TokenStream
-from backend.internal.parsing import Parser
+from backend.internal.parsing import Parser, NODE_BUILDER
+from backend.internal.expression_tree import (
+    Node,
+    Add,
+    Mul,
+    Pow,
+    Numeric,
+    Symbol,
+    convert_to_expression_tree,
+)
 
 
 @dataclass
@@ -521,3 +530,73 @@ def test_parser(case: Case) -> None:
     parser = Parser(stream)
     program = parser.parse()
     assert program.get() == case.expected
+
+
+DEEP_NESTING = 5000
+
+
+@pytest.mark.parametrize(
+    "input",
+    ["(" * DEEP_NESTING + "x" + ")" * DEEP_NESTING, "-" * DEEP_NESTING + "x"],
+    ids=["Nested parens", "Nested prefix minus"],
+)
+def test_parser_deep_nesting(input: str) -> None:
+    program = Parser(TokenStream(Lexer(input))).parse()
+    [stmt] = program.get()
+    assert isinstance(stmt, Subject)
+
+    expr: Expression = stmt.expr
+    depth = 0
+    while isinstance(expr, Prefix):
+        expr = expr.expr
+        depth += 1
+    assert expr == Identifier(Token(TokenType.IDENT, "x"))
+    assert depth in (0, DEEP_NESTING)
+
+
+def test_parser_deep_nesting_error() -> None:
+    input = "(" * DEEP_NESTING + "x"
+    [stmt] = Parser(TokenStream(Lexer(input))).parse().get()
+    assert isinstance(stmt, LineError)
+
+
+@dataclass
+class NodeCase:
+    name: str
+    input: str
+    expected: Node
+
+
+CASES_NODE_BUILDER: list[NodeCase] = [
+    NodeCase("Sum", "x + 2", Add(Symbol("x"), Numeric(2.0))),
+    NodeCase("Difference", "x - y", Add(Symbol("x"), Mul(Symbol("y"), Numeric(-1)))),
+    NodeCase(
+        "Quotient",
+        "2x / (y + 1)",
+        Mul(
+            Mul(Numeric(2.0), Symbol("x")),
+            Pow(Add(Symbol("y"), Numeric(1.0)), Numeric(-1)),
+        ),
+    ),
+    NodeCase("Power of negation", "-x^2", Mul(Pow(Symbol("x"), Numeric(2.0)), Numeric(-1))),
+    NodeCase(
+        "Nested groups",
+        "((a - b) * (a + b))^3",
+        Pow(
+            Mul(
+                Add(Symbol("a"), Mul(Symbol("b"), Numeric(-1))),
+                Add(Symbol("a"), Symbol("b")),
+            ),
+            Numeric(3.0),
+        ),
+    ),
+]
+
+
+@pytest.mark.parametrize("case", CASES_NODE_BUILDER, ids=[c.name for c in CASES_NODE_BUILDER])
+def test_parser_node_builder(case: NodeCase) -> None:
+    [ast_stmt] = Parser(TokenStream(Lexer(case.input))).parse().get()
+    [node_stmt] = Parser(TokenStream(Lexer(case.input)), NODE_BUILDER).parse().get()
+    assert isinstance(ast_stmt, Subject) and isinstance(node_stmt, Subject)
+    assert node_stmt.expr is case.expected
+    assert node_stmt.expr is convert_to_expression_tree(ast_stmt.expr)
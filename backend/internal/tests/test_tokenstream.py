@@ -170,6 +170,17 @@ CASES_TOKEN_FORMULA = [
             Token(TokenType.EOF, "EOF"),
         ],
     ),
+    Case(
+        name="Trailing bang",
+        input="x + 1 !",
+        expected=[
+            Token(TokenType.IDENT, "x"),
+            Token(TokenType.PLUS, "+"),
+            Token(TokenType.NUMBER, "1"),
+            Token(TokenType.BANG, "!"),
+            Token(TokenType.EOF, "EOF"),
+        ],
+    ),
 ]
 
 TOKEN_UT: list[Case] = []
@@ -182,3 +193,36 @@ def test_lexer(case: Case) -> None:
     lexer = Lexer(case.input)
     stream = TokenStream(lexer)
     assert stream.preprocess() == case.expected
+
+
+@pytest.mark.parametrize("case", TOKEN_UT, ids=[c.name for c in TOKEN_UT])
+def test_tokenstream_next(case: Case) -> None:
+    stream = TokenStream(Lexer(case.input))
+    tokens = [stream.next() for _ in case.expected]
+
+    assert tokens == case.expected
+    assert stream.next() == Token(TokenType.EOF, "EOF")
+
+
+@pytest.mark.parametrize("case", TOKEN_UT, ids=[c.name for c in TOKEN_UT])
+def test_tokenstream_compact(case: Case) -> None:
+    stream = TokenStream(Lexer(case.input), compact=True)
+    assert stream.preprocess() == case.expected
+    assert [stream.next() for _ in case.expected] == case.expected
+
+
+def test_tokenstream_compact_spans() -> None:
+    stream = TokenStream(Lexer("2xy + 10"), compact=True)
+    spans = []
+    while (token := stream.next()).ttype != TokenType.EOF:
+        spans.append((token.literal, stream.span()))
+
+    assert spans == [
+        ("2", (0, 1)),
+        ("*", (1, 1)),
+        ("x", (1, 2)),
+        ("*", (2, 2)),
+        ("y", (2, 3)),
+        ("+", (4, 5)),
+        ("10", (6, 8)),
+    ]
@@ -0,0 +1,64 @@
+import pytest
+from typing import NamedTuple
+
+from backend.internal.evaluators.error_msgs import EvaluatorErrorUserMsg
+from backend.internal.evaluators.validator import Validator
+from backend.internal.expression_tree import Add, Mul, Pow, Numeric, Symbol
+from backend.internal.objects import Object, ExpressionObject, EquationObject
+
+
+class Case(NamedTuple):
+    name: str
+    obj: Object
+    expected: str | None
+
+
+ZERO_DIV = Pow(Numeric(0), Numeric(-1))
+NEGATIVE_ROOT = Pow(Numeric(-4), Numeric(0.5))
+
+
+def nested(node, depth: int):
+    for _ in range(depth):
+        node = Add(Mul(Symbol("x"), node), Symbol("y"))
+    return node
+
+
+CASES_VALIDATOR: list[Case] = [
+    Case("Valid", ExpressionObject(Add(Symbol("x"), Numeric(1))), None),
+    Case(
+        "Zero division",
+        ExpressionObject(Mul(Symbol("x"), ZERO_DIV)),
+        EvaluatorErrorUserMsg.zero_division(),
+    ),
+    Case(
+        "Negative root",
+        ExpressionObject(Add(NEGATIVE_ROOT, Symbol("x"))),
+        EvaluatorErrorUserMsg.negative_root(),
+    ),
+    Case(
+        "First registered checker wins",
+        ExpressionObject(Add(NEGATIVE_ROOT, ZERO_DIV)),
+        EvaluatorErrorUserMsg.zero_division(),
+    ),
+    Case(
+        "First failing root wins",
+        EquationObject(NEGATIVE_ROOT, ZERO_DIV),
+        EvaluatorErrorUserMsg.negative_root(),
+    ),
+    Case(
+        "Reduced before checking",
+        ExpressionObject(Pow(Mul(Numeric(0), Symbol("x")), Numeric(-2))),
+        EvaluatorErrorUserMsg.zero_division(),
+    ),
+    Case(
+        "Deep tree",
+        ExpressionObject(nested(ZERO_DIV, 5000)),
+        EvaluatorErrorUserMsg.zero_division(),
+    ),
+]
+
+
+@pytest.mark.parametrize("case", CASES_VALIDATOR, ids=lambda c: c.name)
+def test_validator(case: Case) -> None:
+    assert Validator.check(case.obj) == case.expected
+    assert Validator.check(case.obj) == case.expected
@@ -1,6 +1,11 @@
 from .token import Token, TokenType
+from .token_buffer import TokenBuffer
+from .span import Span, SourceLines
 
 __all__ = [
     "Token",
     "TokenType",
+    "TokenBuffer",
+    "Span",
+    "SourceLines",
 ]
@@ -0,0 +1,31 @@
+from bisect import bisect_right
+from typing import NamedTuple
+
+
+class Span(NamedTuple):
+    """
+    [start, end) character offsets into the source.
+    """
+
+    start: int
+    end: int
+
+    def shifted(self, offset: int) -> "Span":
+        return Span(self.start + offset, self.end + offset)
+
+
+class SourceLines:
+    """
+    Maps source offsets to 0-based line and column numbers.
+    """
+
+    def __init__(self, source: str) -> None:
+        self._starts = [0]
+        pos = source.find("\n")
+        while pos != -1:
+            self._starts.append(pos + 1)
+            pos = source.find("\n", pos + 1)
+
+    def locate(self, offset: int) -> tuple[int, int]:
+        line = bisect_right(self._starts, offset) - 1
+        return line, offset - self._starts[line]
@@ -0,0 +1,83 @@
+from array import array
+from typing import Iterator
+
+from backend.internal.tokens.span import Span
+from backend.internal.tokens.token import Token, TokenType
+
+TOKEN_TYPES: tuple[TokenType, ...] = tuple(TokenType)
+TYPE_CODES: dict[TokenType, int] = {ttype: code for code, ttype in enumerate(TOKEN_TYPES)}
+
+# Literals implied by the token type, other tokens slice theirs from the source
+FIXED_LITERALS: dict[TokenType, str] = {
+    **{
+        ttype: ttype.value
+        for ttype in TokenType
+        if ttype not in (TokenType.IDENT, TokenType.NUMBER, TokenType.ILLEGAL)
+    },
+    TokenType.NEW_LINE: "\\n",
+    TokenType.EOF: "EOF",
+}
+
+_FIXED_TOKENS: tuple[Token | None, ...] = tuple(
+    Token(ttype, FIXED_LITERALS[ttype]) if ttype in FIXED_LITERALS else None
+    for ttype in TOKEN_TYPES
+)
+
+
+class TokenBuffer:
+    """
+    Tokens of one source string stored column-wise: a type code and the
+    [start, end) offsets of every token in the source. Literals are sliced
+    from the source only when a `Token` is requested.
+
+    Tokens that don't come from the source text, e.g. an implicit `*`,
+    have an empty span.
+    """
+
+    __slots__ = ("_source", "_types", "_starts", "_ends")
+
+    def __init__(self, source: str) -> None:
+        self._source = source
+        self._types = array("B")
+        self._starts = array("I")
+        self._ends = array("I")
+
+    @property
+    def source(self) -> str:
+        return self._source
+
+    def append(self, code: int, start: int, end: int) -> None:
+        self._types.append(code)
+        self._starts.append(start)
+        self._ends.append(end)
+
+    def code(self, idx: int) -> int:
+        return self._types[idx]
+
+    def ttype(self, idx: int) -> TokenType:
+        return TOKEN_TYPES[self._types[idx]]
+
+    def span(self, idx: int) -> Span:
+        return Span(self._starts[idx], self._ends[idx])
+
+    def literal(self, idx: int) -> str:
+        code = self._types[idx]
+        if (fixed := _FIXED_TOKENS[code]) is not None:
+            return fixed.literal
+        return self._source[self._starts[idx] : self._ends[idx]]
+
+    def token(self, idx: int) -> Token:
+        code = self._types[idx]
+        if (fixed := _FIXED_TOKENS[code]) is not None:
+            return fixed
+        return Token(TOKEN_TYPES[code], self._source[self._starts[idx] : self._ends[idx]])
+
+    def tokens(self) -> list[Token]:
+        return list(self)
+
+    def __len__(self) -> int:
+        return len(self._types)
+
+    def __iter__(self) -> Iterator[Token]:
+        for idx in range(len(self._types)):
+            yield self.token(idx)
@@ -1,65 +1,154 @@
+from typing import Iterator
 from backend.internal.lexing import Lexer
-from backend.internal.tokens import Token, TokenType
+from backend.internal.tokens import Token, TokenType, TokenBuffer, Span
+from backend.internal.tokens.token_buffer import TYPE_CODES
+
+ASTERISK_TOKEN = Token(TokenType.ASTERISK, "*")
+
+# Token type pairs with an implicit multiplication between them, e.g. `2x`, `x(`, `)(`
+_MUL_BETWEEN: dict[TokenType, frozenset[TokenType]] = {
+    TokenType.IDENT: frozenset({TokenType.NUMBER, TokenType.LPAREN}),
+    TokenType.NUMBER: frozenset({TokenType.IDENT, TokenType.LPAREN}),
+    TokenType.RPAREN: frozenset({TokenType.IDENT, TokenType.NUMBER, TokenType.LPAREN}),
+}
+_MUL_BETWEEN_CODES: frozenset[tuple[int, int]] = frozenset(
+    (TYPE_CODES[lhs], TYPE_CODES[rhs]) for lhs, rhss in _MUL_BETWEEN.items() for rhs in rhss
+)
+_BANG_CODE = TYPE_CODES[TokenType.BANG]
+_IDENT_CODE = TYPE_CODES[TokenType.IDENT]
+_ASTERISK_CODE = TYPE_CODES[TokenType.ASTERISK]
 
 
 class TokenStream:
-    def __init__(self, lexer: Lexer) -> None:
+    """
+    Reads tokens from the lexer on demand, inserting implicit multiplications
+    and splitting multi-letter identifiers into single symbols on the way.
+    Only one token of lookahead is held, the parser consumes tokens while
+    the input is still being lexed.
+
+    With `compact` the tokens are kept in a `TokenBuffer` instead, which
+    costs a few bytes per token and keeps the source span of each one.
+    """
+
+    def __init__(self, lexer: Lexer, compact: bool = False) -> None:
+        self._tokens: Iterator[Token]
+        self._tokens_list: list[Token] | None = None
+        self._eof: Token | None = None
+
+        self._buffer: TokenBuffer | None = None
         self._read_idx: int = 0
-        self._tokens: list[Token] = lexer.tokenize()
+        if compact:
+            self._buffer = self._preprocess_compact(lexer.compact())
+        else:
+            self._tokens = self._preprocess(iter(lexer))
 
-        self._mul_dict: dict[TokenType, set[TokenType]] = {
-            TokenType.IDENT: {TokenType.NUMBER, TokenType.LPAREN},
-            TokenType.NUMBER: {TokenType.IDENT, TokenType.LPAREN},
-            TokenType.RPAREN: {TokenType.IDENT, TokenType.NUMBER, TokenType.LPAREN},
-        }
+    @property
+    def buffer(self) -> TokenBuffer | None:
+        return self._buffer
 
-        self._preprocess()
+    def span(self) -> Span | None:
+        """
+        Returns the source span of the token last returned by `next`, only
+        known for a compact stream.
+        """
+        if self._buffer is None or self._read_idx == 0:
+            return None
+        return self._buffer.span(self._read_idx - 1)
 
     def preprocess(self) -> list[Token]:
-        return self._tokens
+        """
+        Returns all tokens not read by `next` yet.
+        """
+        if self._buffer is not None:
+            return [self._buffer.token(idx) for idx in range(self._read_idx, len(self._buffer))]
+        if self._tokens_list is None:
+            self._tokens_list = list(self._tokens)
+            self._tokens = iter(self._tokens_list)
+        return self._tokens_list
 
     def next(self) -> Token:
-        token = self._tokens[self._read_idx]
-        if token.ttype != TokenType.EOF:
-            self._read_idx += 1
+        if self._buffer is not None:
+            return self._next_compact(self._buffer)
+        if self._eof is not None:
+            return self._eof
+        token = next(self._tokens)
+        if token.ttype == TokenType.EOF:
+            self._eof = token
         return token
 
-    def _preprocess(self) -> None:
-        tokens: list[Token] = []
-
-        i: int = 0
-        while i < len(self._tokens) - 1:
-            current = self._tokens[i]
-            next = self._tokens[i + 1]
+    def _preprocess(self, tokens: Iterator[Token]) -> Iterator[Token]:
+        current = next(tokens)
+        while current.ttype != TokenType.EOF:
+            following = next(tokens)
 
+            # Formula name is kept as is
             if current.ttype == TokenType.BANG:
-                i += 2
-                tokens.append(current)
-                tokens.append(next)
+                yield current
+                if following.ttype == TokenType.EOF:
+                    break
+                yield following
+                current = next(tokens)
                 continue
+
             if current.ttype == TokenType.IDENT and len(current.literal) > 1:
-                idents = self._mul_split(current.literal)
-                tokens.extend(idents)
+                yield from self._mul_split(current.literal)
+            else:
+                yield current
+            if self._should_mul_between(current.ttype, following.ttype):
+                yield ASTERISK_TOKEN
+            current = following
+
+        yield Token(TokenType.EOF, "EOF")
+
+    def _next_compact(self, buffer: TokenBuffer) -> Token:
+        if self._eof is not None:
+            return self._eof
+        token = buffer.token(self._read_idx)
+        self._read_idx += 1
+        if token.ttype == TokenType.EOF:
+            self._eof = token
+        return token
+
+    def _preprocess_compact(self, tokens: TokenBuffer) -> TokenBuffer:
+        """
+        Same rewrites as `_preprocess`, a split identifier keeps the span of
+        each letter and an implicit `*` gets an empty span after its left operand.
+        """
+        result = TokenBuffer(tokens.source)
+        last = len(tokens) - 1
+
+        i = 0
+        while i < last:
+            code = tokens.code(i)
+            start, end = tokens.span(i)
+
+            if code == _BANG_CODE:
+                result.append(code, start, end)
+                # EOF right after a trailing `!` is appended once, below
+                if i + 1 < last:
+                    result.append(tokens.code(i + 1), *tokens.span(i + 1))
+                i += 2
+                continue
+
+            if code == _IDENT_CODE and end - start > 1:
+                for pos in range(start, end):
+                    result.append(_IDENT_CODE, pos, pos + 1)
+                    if pos < end - 1:
+                        result.append(_ASTERISK_CODE, pos + 1, pos + 1)
             else:
-                tokens.append(current)
-            if self._should_mul_between(current.ttype, next.ttype):
-                tokens.append(Token(TokenType.ASTERISK, "*"))
+                result.append(code, start, end)
+            if (code, tokens.code(i + 1)) in _MUL_BETWEEN_CODES:
+                result.append(_ASTERISK_CODE, end, end)
             i += 1
-        last = self._tokens[len(self._tokens) - 1]
-        tokens.append(last)
-        self._tokens = tokens
 
-    def _mul_split(self, ident: str) -> list[Token]:
-        value: list[Token] = []
+        result.append(tokens.code(last), *tokens.span(last))
+        return result
+
+    def _mul_split(self, ident: str) -> Iterator[Token]:
         for i, sym in enumerate(ident):
-            token = Token(TokenType.IDENT, sym)
-            value.append(token)
+            yield Token(TokenType.IDENT, sym)
             if i < len(ident) - 1:
-                value.append(Token(TokenType.ASTERISK, "*"))
-
-        return value
+                yield ASTERISK_TOKEN
 
     def _should_mul_between(self, lhs: TokenType, rhs: TokenType) -> bool:
-        if lhs in self._mul_dict and rhs in self._mul_dict[lhs]:
-            return True
-        return False
+        return lhs in _MUL_BETWEEN and rhs in _MUL_BETWEEN[lhs]
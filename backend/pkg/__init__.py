@@ -1,6 +1,7 @@
-from .api import compile_math_input, get_implemented_formulas_json
+from .api import compile_math_input, compile_math_batch, get_implemented_formulas_json
 
 __all__ = [
     "compile_math_input",
+    "compile_math_batch",
     "get_implemented_formulas_json",
 ]
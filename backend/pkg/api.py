@@ -1,32 +1,160 @@
 from dataclasses import asdict, dataclass
-from typing import TypeAlias
-from backend.internal.lexing import Lexer
+from typing import Iterator, TypeAlias
+from backend.internal.budget import BudgetLimits
 from backend.internal.math_builtins.formula_entry import FormulaEntry
 from backend.internal.math_builtins.formula_handler import FORMULA_MAP
-from backend.internal.tokenstreams import TokenStream
-from backend.internal.parsing import Parser
-from backend.internal.evaluators import Evaluator
+from backend.internal.parsing import PARSE_CACHE, ParseCacheStats, iter_statements
+from backend.internal.evaluators import Evaluator, IncrementalEvaluator
+from backend.internal.objects import SubjectObject
+from backend.internal.tokens import SourceLines
+from backend.pkg.executor import EvaluationPool, EvaluationTimeout, ExecutorConfig
 
 
-def compile_math_input(input: str) -> list[str]:
+_LIMITS = BudgetLimits.from_env(deadline=ExecutorConfig.from_env().deadline)
+# Per process: on an `EvaluationPool` every worker has its own, see `worker_key`
+_INCREMENTAL_EVALUATOR = IncrementalEvaluator(limits=_LIMITS)
+
+
+@dataclass(frozen=True)
+class StepSpan:
+    """
+    Source span of the line a step comes from, or of the error for a parse
+    error. `line` and `column` are 0-based and locate `start`.
+    """
+
+    start: int
+    end: int
+    line: int
+    column: int
+
+
+@dataclass(frozen=True)
+class Step:
+    output: str
+    span: StepSpan | None
+
+
+def compile_math_input(input: str, incremental: bool = False) -> list[str]:
     """
     Runs the input code through the full pipeline: lexing, parsing, and evaluating.
     Returns the string representations of the resulting SubjectObjects or error messages.
 
     Args:
         input (str): The input code to be processed.
+        incremental (bool): Reuse the cached state of already evaluated line
+            prefixes, so only the edited or appended lines are run.
     Returns:
         list[str]: A list of string representations of the resulting SubjectObjects or error messages.
     """
 
-    lexer = Lexer(input)
-    token_stream = TokenStream(lexer)
-    parser = Parser(token_stream)
-    program = parser.parse()
-    evaluator = Evaluator()
-    result = evaluator.eval(program)
+    return [str(obj) for obj in _evaluate(input, incremental)]
+
+
+def compile_math_steps(input: str, incremental: bool = False) -> list[Step]:
+    """
+    Same as `compile_math_input`, with the source span of every step.
+    """
+
+    return list(stream_math_steps(input, incremental))
+
+
+def stream_math_steps(input: str, incremental: bool = False) -> Iterator[Step]:
+    """
+    Generator version of `compile_math_steps`, a step is yielded as soon as
+    its line is evaluated.
+    """
+
+    lines = SourceLines(input)
+
+    def step(obj: SubjectObject) -> Step:
+        if obj.span is None:
+            return Step(str(obj), None)
+        line, column = lines.locate(obj.span.start)
+        return Step(str(obj), StepSpan(obj.span.start, obj.span.end, line, column))
+
+    return map(step, _evaluate(input, incremental))
+
+
+def worker_key(input: str, incremental: bool) -> str | None:
+    """
+    Key of the pool worker an incremental request should run on, see
+    `EvaluationPool.run`.
+
+    The cached checkpoints live in the worker process that evaluated them,
+    and a checkpoint is only reused by a program with the same first line.
+    Routing programs by their first line sends every edit of a notebook to
+    the worker holding its checkpoints, a busy worker only costs a cache
+    miss. Other requests run on any worker.
+    """
+    if not incremental:
+        return None
+    return input.split("\n", 1)[0]
+
+
+def _evaluate(input: str, incremental: bool) -> Iterator[SubjectObject]:
+    if incremental:
+        return _INCREMENTAL_EVALUATOR.iter_eval(input)
+
+    evaluator = Evaluator(_LIMITS)
+    return evaluator.iter_eval(iter_statements(input))
+
+
+def compile_math_batch(
+    inputs: list[str], incremental: bool = False, pool: EvaluationPool | None = None
+) -> list[list[str]]:
+    """
+    Runs many independent programs in one call, keeping the input order.
+    A failing or timed out program yields a single error step and doesn't
+    affect the others.
+
+    Args:
+        inputs (list[str]): The programs to be processed.
+        incremental (bool): See `compile_math_input`.
+        pool (EvaluationPool | None): Fan the programs out across the pool's
+            workers; None evaluates them in the calling process.
+    Returns:
+        list[list[str]]: The steps of each program, in the order of `inputs`.
+    """
+
+    if pool is None:
+        return [_compile_isolated(code, incremental) for code in inputs]
+
+    results = pool.run_all(
+        _compile_isolated,
+        [(code, incremental) for code in inputs],
+        [worker_key(code, incremental) for code in inputs],
+    )
+    return [
+        [f"Error: {str(result)}"] if isinstance(result, EvaluationTimeout) else result
+        for result in results
+    ]
+
+
+def _compile_isolated(input: str, incremental: bool) -> list[str]:
+    try:
+        return compile_math_input(input, incremental)
+    except Exception as e:
+        return [f"Error: {str(e)}"]
+
+
+def get_parse_cache_stats(pool: EvaluationPool | None = None) -> list[ParseCacheStats]:
+    """
+    Counters of the parse cache, one entry per process holding a cache: the
+    calling process, or every worker of `pool`. A worker busy for longer than
+    the pool's queue timeout is left out.
+    """
+
+    if pool is None:
+        return [_parse_cache_stats()]
+    return [
+        stats
+        for stats in pool.run_on_each_worker(_parse_cache_stats)
+        if not isinstance(stats, EvaluationTimeout)
+    ]
+
 
-    return [str(obj) for obj in result]
+def _parse_cache_stats() -> ParseCacheStats:
+    return PARSE_CACHE.stats()
 
 
 FrontFormula: TypeAlias = dict[str, str]
@@ -0,0 +1,343 @@
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from multiprocessing.managers import SyncManager
+from multiprocessing.pool import AsyncResult, Pool
+from typing import Any, Callable, Hashable, Iterable, Iterator, TypeVar
+
+R = TypeVar("R")
+
+# Extra time the parent waits for a worker to report its own timeout
+# before it assumes the worker is stuck and replaces it.
+_GRACE_SECONDS = 1.0
+
+# Share of the worker timeout left to the evaluation's own deadline, the
+# rest lets the worker turn a missed deadline into an error step
+_DEADLINE_SHARE = 0.8
+
+# Tags of the messages a streaming worker puts on its queue
+_ITEM = "item"
+_END = "end"
+
+
+class EvaluationTimeout(Exception):
+    def __init__(self, timeout: float) -> None:
+        super().__init__(timeout)
+        self.timeout = timeout
+
+    def __str__(self) -> str:
+        return f"Evaluation took longer than {self.timeout:g}s and was stopped"
+
+
+class EvaluationQueueTimeout(EvaluationTimeout):
+    """
+    No worker was free to start the call within `ExecutorConfig.queue_timeout`.
+    The call was never started.
+    """
+
+    def __str__(self) -> str:
+        return f"No worker was free to start the evaluation within {self.timeout:g}s"
+
+
+@dataclass(frozen=True)
+class ExecutorConfig:
+    """
+    Args:
+        workers (int): Number of worker processes, 0 evaluates in the calling process.
+        timeout (float): Wall-clock limit of a single evaluation, in seconds.
+            It runs from when a worker picks the call up.
+        max_tasks_per_worker (int): A worker is replaced after that many evaluations.
+        queue_timeout (float): Longest wait for a free worker, in seconds.
+    """
+
+    workers: int = os.cpu_count() or 1
+    timeout: float = 2.5
+    max_tasks_per_worker: int = 200
+    queue_timeout: float = 10.0
+
+    @property
+    def deadline(self) -> float:
+        """
+        Deadline of one request's evaluation, see `BudgetLimits.deadline`.
+        """
+        return self.timeout * _DEADLINE_SHARE
+
+    @staticmethod
+    def from_env() -> "ExecutorConfig":
+        default = ExecutorConfig()
+        return ExecutorConfig(
+            workers=int(os.environ.get("INTERPRET_WORKERS", default.workers)),
+            timeout=float(os.environ.get("INTERPRET_TIMEOUT", default.timeout)),
+            max_tasks_per_worker=int(
+                os.environ.get("INTERPRET_MAX_TASKS_PER_WORKER", default.max_tasks_per_worker)
+            ),
+            queue_timeout=float(
+                os.environ.get("INTERPRET_QUEUE_TIMEOUT", default.queue_timeout)
+            ),
+        )
+
+
+class _Worker:
+    """
+    One worker process, in a pool of its own so it can be replaced alone.
+    `task` identifies the call it runs, None while the worker is idle.
+    """
+
+    def __init__(self, pool: Pool) -> None:
+        self.pool = pool
+        self.task: object | None = None
+
+
+class EvaluationPool:
+    """
+    Runs CPU-bound evaluations on worker processes, so concurrent requests
+    use all cores instead of serializing on the GIL.
+
+    A call is only handed to an idle worker, so it starts right away and
+    `config.timeout` is counted from there, time spent waiting for a free
+    worker is bounded by `config.queue_timeout` on its own. The worker
+    interrupts itself when the deadline passes, a worker that doesn't answer
+    shortly after is replaced without touching the others.
+
+    A call with a `key` prefers the worker the key maps to, so calls relying
+    on the same per-process caches reach the worker that filled them while
+    it is free.
+    """
+
+    def __init__(self, config: ExecutorConfig) -> None:
+        self._config = config
+        self._workers: list[_Worker] = []
+        self._manager: SyncManager | None = None
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+
+    @property
+    def config(self) -> ExecutorConfig:
+        return self._config
+
+    def run(self, fn: Callable[..., R], *args: Any, key: Hashable | None = None) -> R:
+        """
+        Raises:
+            EvaluationTimeout: the call didn't finish within `config.timeout`,
+                or didn't start within `config.queue_timeout`.
+        """
+        match self.run_all(fn, [args], [key]):
+            case [EvaluationTimeout() as err]:
+                raise err
+            case [result]:
+                return result
+        assert False, "Unreachable"
+
+    def run_all(
+        self,
+        fn: Callable[..., R],
+        args_list: Iterable[tuple],
+        keys: Iterable[Hashable | None] | None = None,
+    ) -> list[R | EvaluationTimeout]:
+        """
+        Runs `fn` for every args tuple across the workers, keeping the order.
+        Calls that timed out are returned as `EvaluationTimeout`, any other
+        exception is re-raised. `keys` gives the key of every call, see `EvaluationPool`.
+        """
+        args_list = list(args_list)
+        if self._config.workers <= 0:
+            return [fn(*args) for args in args_list]
+
+        keys = list(keys) if keys is not None else [None] * len(args_list)
+        if len(args_list) <= 1:
+            return [self._call(fn, args, self._picker(key)) for args, key in zip(args_list, keys)]
+        # Every call waits for its own worker, at most one per worker is in flight
+        with ThreadPoolExecutor(max_workers=min(self._config.workers, len(args_list))) as calls:
+            picks = [self._picker(key) for key in keys]
+            return list(calls.map(lambda args, pick: self._call(fn, args, pick), args_list, picks))
+
+    def run_on_each_worker(self, fn: Callable[..., R], *args: Any) -> list[R | EvaluationTimeout]:
+        """
+        Runs `fn` once on every worker, e.g. to read per-process state.
+        A worker that stays busy for `config.queue_timeout` gives an
+        `EvaluationQueueTimeout`.
+        """
+        if self._config.workers <= 0:
+            return [fn(*args)]
+
+        with self._lock:
+            workers = self._get_workers()
+
+        def on(worker: _Worker) -> R | EvaluationTimeout:
+            return self._call(fn, args, lambda: worker if worker.task is None else None)
+
+        with ThreadPoolExecutor(max_workers=len(workers)) as calls:
+            return list(calls.map(on, workers))
+
+    def stream(
+        self, fn: Callable[..., Iterable[R]], *args: Any, key: Hashable | None = None
+    ) -> Iterator[R]:
+        """
+        Runs `fn` on a worker and yields its items as soon as they are
+        produced, the whole call is bounded by `config.timeout`.
+
+        Raises:
+            EvaluationTimeout: the call didn't finish within `config.timeout`,
+                after yielding the items produced so far, or didn't start
+                within `config.queue_timeout`.
+        """
+        if self._config.workers <= 0:
+            yield from fn(*args)
+            return
+
+        items = self._get_manager().Queue()
+        worker, task = self._start(
+            self._picker(key),
+            call_with_deadline,
+            (self._config.timeout, _put_items, items, fn, *args),
+        )
+        deadline = time.monotonic() + self._config.timeout + _GRACE_SECONDS
+        while True:
+            try:
+                tag, item = items.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                self._replace(worker, task)
+                raise EvaluationTimeout(self._config.timeout)
+            if tag == _END:
+                break
+            yield item
+        # Re-raises the error of the worker, if any
+        task.get(timeout=_GRACE_SECONDS)
+
+    def close(self) -> None:
+        with self._lock:
+            workers, self._workers = self._workers, []
+            manager, self._manager = self._manager, None
+        # Outside of the lock, the pools' result threads take it to release workers
+        for worker in workers:
+            worker.pool.terminate()
+            worker.pool.join()
+        if manager is not None:
+            manager.shutdown()
+
+    def _call(
+        self, fn: Callable[..., R], args: tuple, pick: Callable[[], _Worker | None]
+    ) -> R | EvaluationTimeout:
+        try:
+            worker, task = self._start(pick, call_with_deadline, (self._config.timeout, fn, *args))
+        except EvaluationQueueTimeout as err:
+            return err
+        try:
+            return task.get(timeout=self._config.timeout + _GRACE_SECONDS)
+        except EvaluationTimeout as err:
+            return err
+        except multiprocessing.TimeoutError:
+            self._replace(worker, task)
+            return EvaluationTimeout(self._config.timeout)
+
+    def _start(
+        self, pick: Callable[[], _Worker | None], fn: Callable[..., Any], args: tuple
+    ) -> tuple[_Worker, AsyncResult]:
+        """
+        Waits until `pick` finds an idle worker and starts `fn` on it. The worker is
+        released as soon as the call finishes, whether or not anybody
+        collects the result.
+        """
+        deadline = time.monotonic() + self._config.queue_timeout
+        with self._idle:
+            self._get_workers()
+            while (worker := pick()) is None:
+                if not self._idle.wait(max(0.0, deadline - time.monotonic())):
+                    if (worker := pick()) is not None:
+                        break
+                    raise EvaluationQueueTimeout(self._config.queue_timeout)
+
+            def release(_: Any) -> None:
+                with self._idle:
+                    if worker.task is task:
+                        worker.task = None
+                        self._idle.notify_all()
+
+            task = worker.pool.apply_async(fn, args, callback=release, error_callback=release)
+            worker.task = task
+        return worker, task
+
+    def _picker(self, key: Hashable | None) -> Callable[[], _Worker | None]:
+        """
+        Picks the worker `key` maps to while it is idle, else any idle worker.
+        Called with the lock held.
+        """
+
+        def pick() -> _Worker | None:
+            if key is not None:
+                preferred = self._workers[hash(key) % len(self._workers)]
+                if preferred.task is None:
+                    return preferred
+            return next((worker for worker in self._workers if worker.task is None), None)
+
+        return pick
+
+    def _get_workers(self) -> list[_Worker]:
+        # Called with the lock held
+        if not self._workers:
+            self._workers = [_Worker(self._new_pool()) for _ in range(self._config.workers)]
+        return self._workers
+
+    def _replace(self, worker: _Worker, stuck: AsyncResult) -> None:
+        with self._idle:
+            if worker.task is not stuck:
+                return
+            pool = worker.pool
+            if worker in self._workers:
+                worker.pool = self._new_pool()
+            worker.task = None
+            self._idle.notify_all()
+        pool.terminate()
+
+    def _new_pool(self) -> Pool:
+        return _start_method_context().Pool(
+            processes=1, maxtasksperchild=self._config.max_tasks_per_worker
+        )
+
+    def _get_manager(self) -> SyncManager:
+        # Queues passed to pool workers must be proxies of a manager process
+        with self._lock:
+            if self._manager is None:
+                self._manager = _start_method_context().Manager()
+            return self._manager
+
+
+def call_with_deadline(timeout: float, fn: Callable[..., R], *args: Any) -> R:
+    """
+    Runs `fn` inside a worker, raising `EvaluationTimeout` once `timeout`
+    seconds of wall-clock time have passed.
+    """
+    if not hasattr(signal, "setitimer"):
+        return fn(*args)
+
+    def on_alarm(signum, frame) -> None:
+        _ = signum, frame
+        raise EvaluationTimeout(timeout)
+
+    previous = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return fn(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _put_items(items: queue.Queue, fn: Callable[..., Iterable[Any]], *args: Any) -> None:
+    try:
+        for item in fn(*args):
+            items.put((_ITEM, item))
+    finally:
+        items.put((_END, None))
+
+
+def _start_method_context():
+    # The server runs uvicorn in a thread, forking it directly isn't safe
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
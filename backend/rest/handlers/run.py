@@ -1,16 +1,40 @@
+from dataclasses import asdict
+from typing import Iterator
 from pydantic import BaseModel
 
 from fastapi import APIRouter
-from backend.pkg.api import compile_math_input
+from fastapi.responses import StreamingResponse
+from backend.pkg.api import (
+    Step,
+    compile_math_steps,
+    compile_math_batch,
+    get_parse_cache_stats,
+    stream_math_steps,
+    worker_key,
+)
+from backend.pkg.executor import EvaluationPool, ExecutorConfig
+
+
+POOL = EvaluationPool(ExecutorConfig.from_env())
 
 
 # TODO
 class RunRequest(BaseModel):
     code: str
+    incremental: bool = False
+
+
+class StepSpan(BaseModel):
+    start: int
+    end: int
+    line: int
+    column: int
 
 
 class RunResponse(BaseModel):
     steps: list[str]
+    # Source span of every step, None where it isn't known
+    spans: list[StepSpan | None]
 
 
 router = APIRouter()
@@ -19,7 +43,94 @@ router = APIRouter()
 @router.post("/interpret", response_model=RunResponse)
 def interpret(req: RunRequest):
     try:
-        result = compile_math_input(req.code)
-        return RunResponse(steps=result)
+        result = POOL.run(
+            compile_math_steps, req.code, req.incremental, key=worker_key(req.code, req.incremental)
+        )
+        return RunResponse(
+            steps=[step.output for step in result],
+            spans=[StepSpan(**asdict(step.span)) if step.span else None for step in result],
+        )
+    except Exception as e:
+        return RunResponse(steps=[f"Error: {str(e)}"], spans=[None])
+
+
+class StreamedStep(BaseModel):
+    step: str
+    span: StepSpan | None
+
+
+@router.post("/interpret/stream")
+def interpret_stream(req: RunRequest):
+    """
+    Same as `/interpret`, with the steps sent as newline delimited JSON
+    `StreamedStep`s as soon as each line is evaluated.
+    """
+
+    def lines() -> Iterator[str]:
+        try:
+            key = worker_key(req.code, req.incremental)
+            for step in POOL.stream(stream_math_steps, req.code, req.incremental, key=key):
+                yield _streamed(step).model_dump_json() + "\n"
+        except Exception as e:
+            yield StreamedStep(step=f"Error: {str(e)}", span=None).model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def _streamed(step: Step) -> StreamedStep:
+    return StreamedStep(step=step.output, span=StepSpan(**asdict(step.span)) if step.span else None)
+
+
+class BatchProgram(BaseModel):
+    id: str
+    code: str
+
+
+class BatchRunRequest(BaseModel):
+    programs: list[BatchProgram]
+    incremental: bool = False
+
+
+class BatchResult(BaseModel):
+    id: str
+    steps: list[str]
+
+
+class BatchRunResponse(BaseModel):
+    results: list[BatchResult]
+
+
+@router.post("/interpret_batch", response_model=BatchRunResponse)
+def interpret_batch(req: BatchRunRequest):
+    try:
+        steps = compile_math_batch(
+            [program.code for program in req.programs], req.incremental, POOL
+        )
     except Exception as e:
-        return RunResponse(steps=[f"Error: {str(e)}"])
+        steps = [[f"Error: {str(e)}"] for _ in req.programs]
+    results = [
+        BatchResult(id=program.id, steps=program_steps)
+        for program, program_steps in zip(req.programs, steps)
+    ]
+    return BatchRunResponse(results=results)
+
+
+class ParseCacheStats(BaseModel):
+    hits: int
+    misses: int
+    size: int
+    max_entries: int
+
+
+class StatsResponse(BaseModel):
+    # One entry per worker process, each has a cache of its own
+    parse_cache: list[ParseCacheStats]
+
+
+@router.get("/stats", response_model=StatsResponse)
+def stats():
+    return StatsResponse(
+        parse_cache=[
+            ParseCacheStats(**cache._asdict()) for cache in get_parse_cache_stats(POOL)
+        ]
+    )
@@ -1,11 +1,20 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from backend.rest.handlers import run
 from backend.rest.handlers import formula_list_api
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    _ = app
+    yield
+    run.POOL.close()
+
+
 def create_app() -> FastAPI:
-    app = FastAPI(title="Interpreter Service")
+    app = FastAPI(title="Interpreter Service", lifespan=lifespan)
 
     app.add_middleware(
         CORSMiddleware,
@@ -12,6 +12,15 @@ const CodeCell = ({ cellId, content, onChange, onRemove, isRemovable, onFocus })
       resultRef.current.scrollTop = resultRef.current.scrollHeight;
     }
   },[outputs]); 
+  const showSteps = (lines, steps, spans) => {
+    const result = (steps || []).map((step, i) => ({
+      line: spans?.[i] ? lines[spans[i].line] : lines[i],
+      output: step
+    }));
+
+    setOutputs(result);
+  };
+
   const handleRun = async () => {
   if (!content.trim()) return;
   setRunning(true);
@@ -27,12 +36,7 @@ const CodeCell = ({ cellId, content, onChange, onRemove, isRemovable, onFocus })
       }),
     ]);
 
-    const result = (res.steps || []).map((step, i) => ({
-      line: lines[i],
-      output: step
-    }));
-
-    setOutputs(result);
+    showSteps(lines, res.steps, res.spans);
   } catch (err) {
     console.error("Cannot connect to backend: ", err);
     setOutputs([{ line: "Error", output: err.message }]);
@@ -52,6 +56,17 @@ const CodeCell = ({ cellId, content, onChange, onRemove, isRemovable, onFocus })
     return () => window.removeEventListener("insertFormula", handler);
   }, [cellId, content]);
 
+  useEffect(() => {
+    const handler = (e) => {
+      if (e.detail.cellId === cellId) {
+        const lines = content.split("\n").filter((l) => l.trim() !== "");
+        showSteps(lines, e.detail.steps);
+      }
+    };
+    window.addEventListener("cellResults", handler);
+    return () => window.removeEventListener("cellResults", handler);
+  }, [cellId, content]);
+
   useEffect(() => {
     const handleGlobalRun = () => handleRun();
     window.addEventListener("runAllCells", handleGlobalRun);
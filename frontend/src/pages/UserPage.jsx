@@ -4,6 +4,7 @@ import FormulasViewer from "../components/FormulasViewer";
 import "../styles/UserPage.css";
 import { useNavigate } from "react-router-dom";
 import { v4 as uuidv4 } from 'uuid';
+import { sendBatch } from "../services/api";
 
 function UserPage() {
   const [cells, setCells] = useState(() => {
@@ -37,8 +38,26 @@ function UserPage() {
     if (cells.length > 1) setCells(cells.filter((c) => c.id !== id));
   };
 
-  const runAll = () => {
-    window.dispatchEvent(new CustomEvent("runAllCells"));
+  const runAll = async () => {
+    const programs = cells
+      .filter((cell) => cell.content.trim())
+      .map((cell) => ({
+        id: cell.id,
+        code: cell.content.split("\n").filter((l) => l.trim() !== "").join("\n"),
+      }));
+    if (programs.length === 0) return;
+
+    try {
+      const res = await sendBatch(programs);
+      for (const result of res.results || []) {
+        window.dispatchEvent(
+          new CustomEvent("cellResults", { detail: { cellId: result.id, steps: result.steps } })
+        );
+      }
+    } catch (err) {
+      console.error("Batch run failed, running cells one by one: ", err);
+      window.dispatchEvent(new CustomEvent("runAllCells"));
+    }
   };
 
   const clearAll = () => {
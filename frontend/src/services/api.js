@@ -6,7 +6,23 @@ export async function sendText(code) {
     headers: {
       "Content-Type": "application/json",
     },
-    body: JSON.stringify({ code }),
+    body: JSON.stringify({ code, incremental: true }),
+  });
+
+  if (!res.ok) {
+    throw new Error(`HTTP error! status: ${res.status}`);
+  }
+
+  return res.json();
+}
+
+export async function sendBatch(programs) {
+  const res = await fetch(`${BACKEND_URL}/interpret_batch`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify({ programs, incremental: true }),
   });
 
   if (!res.ok) {